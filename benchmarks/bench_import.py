@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Banc d'essai du temps d'import : coût du plugin au démarrage de QGIS.
+
+Chaque module est importé dans un interpréteur neuf (meilleur de --repeat
+essais) ; le temps mesuré exclut celui des modules de QGIS, importés
+auparavant quand ils sont disponibles. Le rapport indique aussi si NumPy
+et SciPy ont été chargés : polygon_centerline (importé par classFactory)
+et centerline_provider ne doivent pas les charger, les moteurs de calcul
+n'étant importés qu'à leur première utilisation (voir method_registry).
+Sans QGIS, les modules qui en dépendent sont signalés et sautés.
+
+Les résultats sont enregistrés dans benchmarks/results/import-<commit>.json ;
+la commande compare signale les régressions entre deux enregistrements.
+
+Usage (depuis le dossier parent du plugin) :
+    python -m QGIS_centerline.benchmarks.bench_import run
+    python -m QGIS_centerline.benchmarks.bench_import compare results/import-a.json results/import-b.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from ..method_registry import methods
+from .bench_suite import DEFAULT_THRESHOLD, MIN_SECONDS, RESULTS_DIR, environment
+
+PACKAGE = __package__.rpartition(".")[0]
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Modules chargés au démarrage de QGIS, puis ceux chargés au premier calcul
+STARTUP_MODULES = ["polygon_centerline", "centerline_provider", "method_registry"]
+CORE_MODULES = ["centerline_core"]
+
+# Modules de QGIS importés avant la mesure, quand ils sont disponibles
+BASELINE_MODULES = ["qgis.core", "qgis.gui", "qgis.PyQt.QtWidgets"]
+
+# Dépendances lourdes dont le chargement est signalé
+HEAVY_MODULES = ["numpy", "scipy"]
+
+PROBE = """
+import importlib, json, sys, time
+for name in {baseline!r}:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        pass
+start = time.perf_counter()
+try:
+    importlib.import_module({module!r})
+    status = "ok"
+except ImportError as e:
+    status = "import: " + str(e)
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "status": status,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def default_modules():
+    """Modules du démarrage, cœur de calcul et moteurs du registre."""
+    engines = [method.module for method in methods()]
+    return list(dict.fromkeys(STARTUP_MODULES + CORE_MODULES + engines))
+
+
+def measure(module, repeat):
+    """Meilleur temps d'import de module sur repeat interpréteurs neufs."""
+    probe = PROBE.format(baseline=BASELINE_MODULES, module=f"{PACKAGE}.{module}", heavy=HEAVY_MODULES)
+    best = None
+    for _ in range(max(1, repeat)):
+        output = subprocess.run(
+            [sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if result["status"] != "ok":
+            return result
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+def run(args):
+    report = {"environment": environment(), "modules": {}}
+    for module in args.modules:
+        result = measure(module, args.repeat)
+        report["modules"][module] = result
+        if result["status"] != "ok":
+            print(f"{module:22s} : sauté ({result['status']})", file=sys.stderr)
+            continue
+        loaded = ", ".join(result["loaded"]) or "-"
+        print(f"{module:22s} : {1000 * result['seconds']:8.1f} ms  chargés : {loaded}", file=sys.stderr)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        env = report["environment"]
+        name = "import-" + env["commit"] + ("-dirty" if env["dirty"] else "") + ".json"
+        output = os.path.join(RESULTS_DIR, name)
+    with open(output, "w", encoding="utf-8") as stream:
+        json.dump(report, stream, indent=1)
+    print(f"Résultats : {output}", file=sys.stderr)
+
+    # Le démarrage ne doit pas charger les dépendances lourdes
+    startup = [
+        module for module in STARTUP_MODULES
+        if report["modules"].get(module, {}).get("loaded")
+    ]
+    for module in startup:
+        print(f"{module} charge {', '.join(report['modules'][module]['loaded'])} au démarrage.", file=sys.stderr)
+    return 1 if startup else 0
+
+
+def compare(args):
+    """
+    Compare deux enregistrements module par module. Une régression est
+    signalée si le temps d'import augmente de plus de threshold (en relatif,
+    et d'au moins MIN_SECONDS), ou si un module charge une dépendance lourde
+    qu'il ne chargeait pas. Le code de retour vaut 1 en cas de régression.
+    """
+    with open(args.base, encoding="utf-8") as stream:
+        base = json.load(stream)
+    with open(args.new, encoding="utf-8") as stream:
+        new = json.load(stream)
+
+    print(f"{base['environment']['commit']} -> {new['environment']['commit']}")
+    regressions = 0
+    for module, case in new["modules"].items():
+        old = base["modules"].get(module)
+        if old is None or old["status"] != "ok" or case["status"] != "ok":
+            continue
+        added = sorted(set(case["loaded"]) - set(old["loaded"]))
+        ratio = case["seconds"] / old["seconds"] if old["seconds"] > 0 else 1.0
+        worse = bool(added) or (
+            ratio > 1.0 + args.threshold and case["seconds"] - old["seconds"] > MIN_SECONDS
+        )
+        regressions += worse
+        print(
+            f"{module:22s} : {1000 * old['seconds']:8.1f} -> {1000 * case['seconds']:8.1f} ms (x{ratio:5.2f})"
+            + (f", charge désormais {', '.join(added)}" if added else "")
+            + ("  RÉGRESSION" if worse else "")
+        )
+    print(f"{regressions} régression(s).")
+    return 1 if regressions else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="mesurer et enregistrer les temps d'import")
+    run_parser.add_argument("--modules", type=lambda v: [m for m in v.split(",") if m], default=default_modules(),
+                            help="modules du plugin, séparés par des virgules")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--output", help="fichier JSON (par défaut results/import-<commit>.json)")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="comparer deux enregistrements")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare_parser.set_defaults(func=compare)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
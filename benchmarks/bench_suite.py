@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Banc d'essai complet : débit, mémoire de pointe et qualité des méthodes.
+
+Pour chaque forme synthétique (voir shapes.py), chaque nombre de sommets,
+chaque méthode et chaque intervalle de densification (0 : pas de
+densification), mesure le temps de compute_centerline (meilleur de
+--repeat essais), la mémoire de pointe (tracemalloc, essai séparé) et
+l'écart à l'axe médian analytique (distance de Hausdorff et écart moyen).
+Le cœur de calcul ne dépend pas de QGIS : le banc s'exécute avec NumPy et
+SciPy seuls.
+
+Les résultats sont enregistrés dans benchmarks/results/<commit>.json ; la
+commande compare signale les régressions entre deux enregistrements.
+
+Usage (depuis le dossier parent du plugin) :
+    python -m QGIS_centerline.benchmarks.bench_suite run --sizes 100,1000,10000
+    python -m QGIS_centerline.benchmarks.bench_suite compare results/a.json results/b.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+
+from ..centerline_core import DEFAULT_PARAMS, compute_centerline
+from ..method_registry import method_names
+from .shapes import GENERATORS, axis_deviation
+
+METHODS = method_names()
+DEFAULT_SIZES = [100, 1000, 10000, 100000, 1000000]
+DEFAULT_INTERVALS = [0.0, 1.0]
+
+# Au-delà de cette durée (s), les tailles supérieures d'un même cas sont sautées
+DEFAULT_MAX_SECONDS = 60.0
+
+# Variation relative tolérée avant de signaler une régression
+DEFAULT_THRESHOLD = 0.10
+
+# Écart de temps (s) en deçà duquel une variation est attribuée au bruit de mesure
+MIN_SECONDS = 0.005
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def _split(value, cast):
+    return [cast(item) for item in value.split(",") if item]
+
+
+def environment():
+    """Commit courant et environnement d'exécution, enregistrés avec les résultats."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def git(*args):
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=root, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def case_params(method, interval, width):
+    """Paramètres du cas : ceux par défaut, élagage relatif à la largeur de la forme."""
+    params = dict(DEFAULT_PARAMS)
+    params.update({
+        "method": method,
+        "densify": interval > 0,
+        "interval": interval if interval > 0 else DEFAULT_PARAMS["interval"],
+        # Les fourches d'extrémité (largeur / 2 * racine de 2) sont élaguées
+        "min_length": width,
+        "tile_workers": 1,
+    })
+    return params
+
+
+def run_case(shape, params, repeat):
+    """Mesure un cas ; renvoie le dictionnaire de résultats."""
+    vertices = sum(len(ring) - 1 for part in shape.polygons for ring in part)
+    result = {"vertices": vertices}
+
+    best = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        lines, message, _ = compute_centerline(shape.polygons, params)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        compute_centerline(shape.polygons, params)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    result.update({
+        "seconds": best,
+        "vertices_per_second": vertices / best if best > 0 else None,
+        "peak_bytes": peak,
+        "message": message,
+    })
+    if not lines:
+        result["status"] = "empty"
+        return result
+
+    hausdorff, mean = axis_deviation(lines, shape.axis, shape.width / 20.0)
+    result.update({
+        "status": "ok",
+        "output_vertices": int(sum(len(line) for line in lines)),
+        "hausdorff": hausdorff,
+        "hausdorff_width": hausdorff / shape.width,
+        "mean_deviation": mean,
+    })
+    return result
+
+
+def run(args):
+    cases = []
+    report = {"environment": environment(), "cases": cases}
+    print(f"Commit {report['environment']['commit']}"
+          f"{' (modifié)' if report['environment']['dirty'] else ''}", file=sys.stderr)
+
+    for name in args.shapes:
+        for method in args.methods:
+            for interval in args.intervals:
+                skip = False
+                for size in args.sizes:
+                    case = {"shape": name, "size": size, "method": method, "interval": interval}
+                    if skip:
+                        cases.append(dict(case, status="skipped"))
+                        continue
+
+                    shape = GENERATORS[name](size)
+                    try:
+                        case.update(run_case(shape, case_params(method, interval, shape.width), args.repeat))
+                    except MemoryError:
+                        case["status"] = "memory"
+                        skip = True
+                    cases.append(case)
+
+                    if case.get("seconds", 0.0) > args.max_seconds:
+                        skip = True
+                    print(
+                        f"{name:13s} {method:13s} {interval:5g} {size:>8d} : {case['status']:7s}"
+                        f" {case.get('seconds', float('nan')):8.3f} s"
+                        f" {case.get('peak_bytes', 0) / 2 ** 20:8.1f} Mio"
+                        f" hausdorff {case.get('hausdorff', float('nan')):7.2f}",
+                        file=sys.stderr
+                    )
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        env = report["environment"]
+        output = os.path.join(RESULTS_DIR, env["commit"] + ("-dirty" if env["dirty"] else "") + ".json")
+    with open(output, "w", encoding="utf-8") as stream:
+        json.dump(report, stream, indent=1)
+    print(f"Résultats : {output}", file=sys.stderr)
+    return 0
+
+
+def compare(args):
+    """
+    Compare deux enregistrements cas par cas. Une régression est signalée si
+    le temps ou l'écart de Hausdorff augmente de plus de threshold (en
+    relatif, et d'au moins MIN_SECONDS pour le temps et 1 % de la largeur
+    pour l'écart), ou si un cas
+    réussi échoue. Le code de retour vaut 1 en cas de régression.
+    """
+    with open(args.base, encoding="utf-8") as stream:
+        base = json.load(stream)
+    with open(args.new, encoding="utf-8") as stream:
+        new = json.load(stream)
+
+    def key(case):
+        return case["shape"], case["size"], case["method"], case["interval"]
+
+    reference = {key(case): case for case in base["cases"]}
+    print(f"{base['environment']['commit']} -> {new['environment']['commit']}")
+    regressions = 0
+    for case in new["cases"]:
+        old = reference.get(key(case))
+        if old is None or old.get("status") != "ok":
+            continue
+        label = f"{case['shape']:13s} {case['method']:13s} {case['interval']:5g} {case['size']:>8d}"
+        if case.get("status") != "ok":
+            print(f"{label} : RÉGRESSION ({old['status']} -> {case.get('status')})")
+            regressions += 1
+            continue
+
+        speed = case["seconds"] / old["seconds"] if old["seconds"] > 0 else 1.0
+        quality = case["hausdorff_width"] - old["hausdorff_width"]
+        worse = (speed > 1.0 + args.threshold and case["seconds"] - old["seconds"] > MIN_SECONDS) or (
+            quality > 0.01 and case["hausdorff"] > old["hausdorff"] * (1.0 + args.threshold)
+        )
+        regressions += worse
+        print(
+            f"{label} : temps x{speed:5.2f}, mémoire x{case['peak_bytes'] / max(old['peak_bytes'], 1):5.2f},"
+            f" hausdorff {old['hausdorff']:7.2f} -> {case['hausdorff']:7.2f}"
+            + ("  RÉGRESSION" if worse else "")
+        )
+    print(f"{regressions} régression(s).")
+    return 1 if regressions else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="mesurer et enregistrer les résultats")
+    run_parser.add_argument("--shapes", type=lambda v: _split(v, str), default=list(GENERATORS))
+    run_parser.add_argument("--methods", type=lambda v: _split(v, str), default=METHODS)
+    run_parser.add_argument("--sizes", type=lambda v: _split(v, int), default=DEFAULT_SIZES,
+                            help="nombres de sommets, séparés par des virgules")
+    run_parser.add_argument("--intervals", type=lambda v: _split(v, float), default=DEFAULT_INTERVALS,
+                            help="intervalles de densification (0 : aucune)")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS,
+                            help="durée au-delà de laquelle les tailles supérieures sont sautées")
+    run_parser.add_argument("--output", help="fichier JSON (par défaut results/<commit>.json)")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="comparer deux enregistrements")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare_parser.set_defaults(func=compare)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
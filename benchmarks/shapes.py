@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Formes synthétiques pour les bancs d'essai.
+
+Chaque générateur renvoie une SyntheticShape : les parties du polygone (liste
+de parties, chacune liste d'anneaux fermés (N, 2), comme pour
+centerline_core.compute_centerline), son axe médian analytique (liste de
+polylignes) et sa largeur nominale. Le nombre total de sommets est fixé par
+vertices : les anneaux sont rééchantillonnés à pas constant, au prorata de
+leur périmètre, en conservant leurs angles dès que le nombre de sommets le
+permet.
+"""
+from collections import namedtuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+SyntheticShape = namedtuple("SyntheticShape", ["name", "polygons", "axis", "width"])
+
+# Nombre minimal de sommets par anneau
+MIN_RING_VERTICES = 4
+
+
+def resample_ring(ring, count):
+    """
+    Anneau fermé rééchantillonné en count sommets distincts, à pas constant.
+    Si l'anneau a moins de count sommets, ses sommets (les angles) sont
+    conservés ; sinon la forme est approchée par count sommets.
+    """
+    ring = np.asarray(ring, dtype=float)
+    cumulative = np.concatenate([[0.0], np.cumsum(np.hypot(*np.diff(ring, axis=0).T))])
+    if count <= len(ring) - 1:
+        positions = np.linspace(0.0, cumulative[-1], count, endpoint=False)
+    else:
+        targets = np.linspace(0.0, cumulative[-1], count - len(ring) + 1, endpoint=False)
+        positions = np.union1d(targets, cumulative[:-1])
+    points = np.column_stack([
+        np.interp(positions, cumulative, ring[:, 0]),
+        np.interp(positions, cumulative, ring[:, 1]),
+    ])
+    return np.vstack([points, points[:1]])
+
+
+def with_vertices(polygons, vertices):
+    """Répartit vertices sommets entre les anneaux, au prorata de leur périmètre."""
+    rings = [ring for part in polygons for ring in part]
+    lengths = np.array([np.hypot(*np.diff(ring, axis=0).T).sum() for ring in rings])
+    counts = np.maximum(np.round(vertices * lengths / lengths.sum()).astype(int), MIN_RING_VERTICES)
+    resampled = iter([resample_ring(ring, count) for ring, count in zip(rings, counts)])
+    return [[next(resampled) for _ in part] for part in polygons]
+
+
+def _rectangle(x0, y0, x1, y1):
+    return np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]], dtype=float)
+
+
+def river(vertices, length=1000.0, width=20.0, amplitude=60.0, wavelength=400.0):
+    """
+    Rivière sinueuse : sinusoïde épaissie de width. Tant que le rayon de
+    courbure dépasse la demi-largeur, l'axe médian est la sinusoïde
+    elle-même, hors des extrémités.
+    """
+    t = np.linspace(0.0, length, 4000)
+    cy = amplitude * np.sin(2.0 * np.pi * t / wavelength)
+    dx, dy = np.gradient(t), np.gradient(cy)
+    norm = np.hypot(dx, dy)
+    nx, ny = -dy / norm, dx / norm
+
+    half = width / 2.0
+    left = np.column_stack([t + half * nx, cy + half * ny])
+    right = np.column_stack([t - half * nx, cy - half * ny])[::-1]
+    ring = np.vstack([left, right, left[:1]])
+
+    inner = (t >= half) & (t <= length - half)
+    axis = [np.column_stack([t[inner], cy[inner]])]
+    return SyntheticShape("river", with_vertices([[ring]], vertices), axis, width)
+
+
+def road(vertices, length=1000.0, width=20.0):
+    """Route rectiligne : rectangle dont l'axe est le segment médian, à width / 2 des bouts."""
+    ring = _rectangle(0.0, -width / 2.0, length, width / 2.0)
+    axis = [np.array([[width / 2.0, 0.0], [length - width / 2.0, 0.0]])]
+    return SyntheticShape("road", with_vertices([[ring]], vertices), axis, width)
+
+
+def y_junction(vertices, arm=300.0, width=20.0):
+    """
+    Jonction en Y : trois bras de longueur arm et de largeur width, à 120°
+    autour de l'origine. L'axe est formé des trois segments reliant
+    l'origine au bout de chaque bras (moins la demi-largeur).
+    """
+    half = width / 2.0
+    angles = np.radians([90.0, 210.0, 330.0])
+    directions = np.column_stack([np.cos(angles), np.sin(angles)])
+    normals = np.column_stack([-directions[:, 1], directions[:, 0]])
+
+    ring = []
+    for i in range(3):
+        d, n = directions[i], normals[i]
+        d_next, n_next = directions[(i + 1) % 3], normals[(i + 1) % 3]
+        # Coin du bout du bras, puis angle rentrant entre ce bras et le suivant
+        ring.append(arm * d - half * n)
+        ring.append(arm * d + half * n)
+        # Intersection des bords d + n (bras i) et d_next - n_next (bras suivant)
+        a, b = half * n, -half * n_next
+        s = np.linalg.solve(np.column_stack([d, -d_next]), b - a)
+        ring.append(a + s[0] * d)
+    ring = np.array(ring + ring[:1])
+
+    axis = [np.array([[0.0, 0.0], (arm - half) * d]) for d in directions]
+    return SyntheticShape("y_junction", with_vertices([[ring]], vertices), axis, width)
+
+
+def ring_road(vertices, size=400.0, width=20.0):
+    """
+    Boulevard circulaire : carré de côté size percé d'un carré concentrique,
+    couloir de largeur width. L'axe est le carré médian (les diagonales des
+    angles, plus courtes que width, disparaissent à l'élagage).
+    """
+    outer = _rectangle(0.0, 0.0, size, size)
+    inner = _rectangle(width, width, size - width, size - width)[::-1]
+    half = width / 2.0
+    axis = [_rectangle(half, half, size - half, size - half)]
+    return SyntheticShape("ring_road", with_vertices([[outer, inner]], vertices), axis, width)
+
+
+def road_network(vertices, count=5, length=200.0, width=10.0, spacing=40.0):
+    """Multipolygone : count routes parallèles disjointes, chacune avec son axe."""
+    parts, axis = [], []
+    for i in range(count):
+        y = i * spacing
+        parts.append([_rectangle(0.0, y - width / 2.0, length, y + width / 2.0)])
+        axis.append(np.array([[width / 2.0, y], [length - width / 2.0, y]]))
+    return SyntheticShape("road_network", with_vertices(parts, vertices), axis, width)
+
+
+GENERATORS = {
+    "river": river,
+    "road": road,
+    "y_junction": y_junction,
+    "ring_road": ring_road,
+    "road_network": road_network,
+}
+
+
+def sample_lines(lines, step):
+    """Points des polylignes échantillonnées au pas step (sommets compris)."""
+    samples = []
+    for line in lines:
+        line = np.asarray(line, dtype=float)
+        if len(line) == 1:
+            samples.append(line)
+            continue
+        lengths = np.hypot(*np.diff(line, axis=0).T)
+        cumulative = np.concatenate([[0.0], np.cumsum(lengths)])
+        positions = np.union1d(np.arange(0.0, cumulative[-1], step), cumulative)
+        samples.append(np.column_stack([
+            np.interp(positions, cumulative, line[:, 0]),
+            np.interp(positions, cumulative, line[:, 1]),
+        ]))
+    return np.vstack(samples)
+
+
+def axis_deviation(lines, axis, step):
+    """
+    Écart entre des centerlines et l'axe analytique : distance de Hausdorff
+    (symétrique) et écart moyen des centerlines à l'axe, les deux
+    ensembles étant échantillonnés au pas step.
+    """
+    computed, reference = sample_lines(lines, step), sample_lines(axis, step)
+    to_axis, _ = cKDTree(reference).query(computed)
+    to_lines, _ = cKDTree(computed).query(reference)
+    return float(max(to_axis.max(), to_lines.max())), float(to_axis.mean())
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - algorithme de traitement
+                                 A QGIS plugin
+ Algorithme Processing : utilisable depuis la boîte à outils, les modèles,
+ le traitement par lot et qgis_process
+ ***************************************************************************/
+"""
+import os.path
+import time
+
+from qgis.PyQt.QtCore import QCoreApplication
+from qgis.core import (
+    QgsApplication, QgsFeatureSink, QgsProcessing, QgsProcessingAlgorithm, QgsProcessingException,
+    QgsProcessingParameterBoolean, QgsProcessingParameterDefinition, QgsProcessingParameterEnum,
+    QgsProcessingParameterFeatureSink, QgsProcessingParameterFeatureSource,
+    QgsProcessingParameterFileDestination, QgsProcessingParameterNumber
+)
+
+from .centerline_cache import CACHE_FILE_NAME, CenterlineCache
+from .method_registry import method_parameters, methods
+from .profiling import ProfileReport
+
+
+class PolygonCenterlineAlgorithm(QgsProcessingAlgorithm):
+    """Génère des centerlines à partir d'une couche de polygones"""
+
+    INPUT = 'INPUT'
+    METHOD = 'METHOD'
+    DENSIFY = 'DENSIFY'
+    INTERVAL = 'INTERVAL'
+    ADAPTIVE = 'ADAPTIVE'
+    MAX_INTERVAL = 'MAX_INTERVAL'
+    SIMPLIFY = 'SIMPLIFY'
+    TOLERANCE = 'TOLERANCE'
+    SIMPLIFY_METHOD = 'SIMPLIFY_METHOD'
+    SMOOTH_ITERATIONS = 'SMOOTH_ITERATIONS'
+    SNAP_TOLERANCE = 'SNAP_TOLERANCE'
+    PRUNE = 'PRUNE'
+    MIN_LENGTH = 'MIN_LENGTH'
+    PRUNE_MODE = 'PRUNE_MODE'
+    WIDTH_FACTOR = 'WIDTH_FACTOR'
+    ALL_BRANCHES = 'ALL_BRANCHES'
+    COPY_ATTRIBUTES = 'COPY_ATTRIBUTES'
+    NETWORK = 'NETWORK'
+    NETWORK_TOLERANCE = 'NETWORK_TOLERANCE'
+    WORKERS = 'WORKERS'
+    FAST_PATH_TOLERANCE = 'FAST_PATH_TOLERANCE'
+    WIDTH_STEP = 'WIDTH_STEP'
+    USE_CACHE = 'USE_CACHE'
+    PROFILE_ATTRIBUTES = 'PROFILE_ATTRIBUTES'
+    OUTPUT = 'OUTPUT'
+    PROFILE_REPORT = 'PROFILE_REPORT'
+
+    SIMPLIFY_METHODS = [
+        ("Douglas-Peucker", "DOUGLAS_PEUCKER"),
+        ("Visvalingam-Whyatt", "VISVALINGAM"),
+    ]
+    PRUNE_MODES = [
+        ("Longueur fixe", "LENGTH"),
+        ("Relative à la largeur locale", "WIDTH"),
+    ]
+
+    def tr(self, message):
+        return QCoreApplication.translate('PolygonCenterlineAlgorithm', message)
+
+    def createInstance(self):
+        return PolygonCenterlineAlgorithm()
+
+    def name(self):
+        return 'generatecenterlines'
+
+    def displayName(self):
+        return self.tr('Générer des centerlines')
+
+    def shortHelpString(self):
+        return self.tr(
+            "Génère des centerlines (axes médians) à partir de polygones comme "
+            "des rivières, routes ou autres formes allongées. Les résultats sont "
+            "écrits au fil de l'eau dans la couche de sortie."
+        )
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterFeatureSource(
+            self.INPUT, self.tr('Couche de polygones'), [QgsProcessing.TypeVectorPolygon]
+        ))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.METHOD, self.tr('Méthode'), options=[method.label for method in methods()], defaultValue=0
+        ))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.DENSIFY, self.tr('Densifier les polygones'), defaultValue=True
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.INTERVAL, self.tr('Intervalle de densification'),
+            QgsProcessingParameterNumber.Double, defaultValue=1.0, minValue=0.1, maxValue=1000.0
+        ))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.SIMPLIFY, self.tr('Simplifier les centerlines'), defaultValue=True
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.TOLERANCE, self.tr('Tolérance de simplification'),
+            QgsProcessingParameterNumber.Double, defaultValue=0.5, minValue=0.0001, maxValue=100.0
+        ))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.PRUNE, self.tr('Élaguer les branches'), defaultValue=True
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.MIN_LENGTH, self.tr('Longueur minimale des branches'),
+            QgsProcessingParameterNumber.Double, defaultValue=5.0, minValue=0.0, maxValue=1000.0
+        ))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.COPY_ATTRIBUTES, self.tr('Copier les attributs des polygones'), defaultValue=True
+        ))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.NETWORK, self.tr('Mode réseau (raccorder les polygones adjacents)'), defaultValue=False
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.WIDTH_STEP, self.tr('Pas du profil de largeur (mesure M et champs width_*, 0 : désactivé)'),
+            QgsProcessingParameterNumber.Double, defaultValue=0.0, minValue=0.0
+        ))
+
+        advanced = [
+            QgsProcessingParameterBoolean(
+                self.ADAPTIVE, self.tr('Densification adaptative (courbure et largeur)'), defaultValue=False
+            ),
+            QgsProcessingParameterNumber(
+                self.MAX_INTERVAL, self.tr('Intervalle de densification maximal'),
+                QgsProcessingParameterNumber.Double, defaultValue=10.0, minValue=0.1, maxValue=10000.0
+            ),
+            QgsProcessingParameterEnum(
+                self.SIMPLIFY_METHOD, self.tr('Algorithme de simplification'),
+                options=[label for label, _ in self.SIMPLIFY_METHODS], defaultValue=0
+            ),
+            QgsProcessingParameterNumber(
+                self.SMOOTH_ITERATIONS, self.tr('Itérations de lissage de Chaikin (0 : pas de lissage)'),
+                QgsProcessingParameterNumber.Integer, defaultValue=0, minValue=0, maxValue=5
+            ),
+            QgsProcessingParameterNumber(
+                self.SNAP_TOLERANCE, self.tr('Accrochage des extrémités (0 : désactivé)'),
+                QgsProcessingParameterNumber.Double, defaultValue=0.0, minValue=0.0
+            ),
+            QgsProcessingParameterEnum(
+                self.PRUNE_MODE, self.tr("Mode d'élagage"),
+                options=[label for label, _ in self.PRUNE_MODES], defaultValue=0
+            ),
+            QgsProcessingParameterNumber(
+                self.WIDTH_FACTOR, self.tr('Longueur minimale relative (x largeur)'),
+                QgsProcessingParameterNumber.Double, defaultValue=1.0, minValue=0.1, maxValue=100.0
+            ),
+            QgsProcessingParameterBoolean(
+                self.ALL_BRANCHES, self.tr('Conserver toutes les branches (sinon le tronc de chaque partie)'),
+                defaultValue=False
+            ),
+            QgsProcessingParameterNumber(
+                self.NETWORK_TOLERANCE, self.tr('Rayon de raccordement (réseau, 0 : largeur de la frontière)'),
+                QgsProcessingParameterNumber.Double, defaultValue=0.0, minValue=0.0
+            ),
+            QgsProcessingParameterNumber(
+                self.WORKERS, self.tr('Processus de calcul'),
+                QgsProcessingParameterNumber.Integer, defaultValue=1, minValue=1
+            ),
+        ] + [
+            # Paramètres propres aux méthodes, déclarés dans le registre
+            QgsProcessingParameterNumber(
+                parameter.name.upper(), self.tr(parameter.description),
+                QgsProcessingParameterNumber.Integer if parameter.kind == "int"
+                else QgsProcessingParameterNumber.Double,
+                defaultValue=parameter.default, minValue=parameter.minimum, maxValue=parameter.maximum
+            )
+            for parameter in method_parameters()
+        ] + [
+            QgsProcessingParameterNumber(
+                self.FAST_PATH_TOLERANCE, self.tr('Tolérance de la voie rapide (0 : désactivée)'),
+                QgsProcessingParameterNumber.Double, defaultValue=0.0, minValue=0.0, maxValue=0.5
+            ),
+            QgsProcessingParameterBoolean(
+                self.USE_CACHE, self.tr('Utiliser le cache des résultats'), defaultValue=True
+            ),
+            QgsProcessingParameterBoolean(
+                self.PROFILE_ATTRIBUTES, self.tr('Ajouter les mesures de performance aux attributs'),
+                defaultValue=False
+            ),
+            QgsProcessingParameterFileDestination(
+                self.PROFILE_REPORT, self.tr('Rapport de performance'),
+                fileFilter='JSON (*.json);;CSV (*.csv)', optional=True, createByDefault=False
+            ),
+        ]
+        for parameter in advanced:
+            parameter.setFlags(parameter.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+            self.addParameter(parameter)
+
+        self.addParameter(QgsProcessingParameterFeatureSink(
+            self.OUTPUT, self.tr('Centerlines'), QgsProcessing.TypeVectorLine
+        ))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        # Imports différés : le cœur de calcul (NumPy, SciPy) n'est chargé
+        # qu'à la première exécution, et non à l'enregistrement du fournisseur
+        from .centerline_core import default_worker_count, iter_centerlines
+        from .centerline_network import iter_network_centerlines
+        from .centerline_task import centerline_feature, output_fields, output_wkb_type, polygon_wkb
+
+        # La source respecte l'option « entités sélectionnées uniquement » et
+        # les réglages d'itération (géométries invalides, limite d'entités)
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        if source is None:
+            raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
+
+        params = {
+            "method": methods()[self.parameterAsEnum(parameters, self.METHOD, context)].name,
+            "densify": self.parameterAsBoolean(parameters, self.DENSIFY, context),
+            "interval": self.parameterAsDouble(parameters, self.INTERVAL, context),
+            "simplify": self.parameterAsBoolean(parameters, self.SIMPLIFY, context),
+            "tolerance": self.parameterAsDouble(parameters, self.TOLERANCE, context),
+            "simplify_method": self.SIMPLIFY_METHODS[
+                self.parameterAsEnum(parameters, self.SIMPLIFY_METHOD, context)
+            ][1],
+            "smooth_iterations": self.parameterAsInt(parameters, self.SMOOTH_ITERATIONS, context),
+            "snap_tolerance": self.parameterAsDouble(parameters, self.SNAP_TOLERANCE, context),
+            "prune": self.parameterAsBoolean(parameters, self.PRUNE, context),
+            "min_length": self.parameterAsDouble(parameters, self.MIN_LENGTH, context),
+            "prune_mode": self.PRUNE_MODES[self.parameterAsEnum(parameters, self.PRUNE_MODE, context)][1],
+            "width_factor": self.parameterAsDouble(parameters, self.WIDTH_FACTOR, context),
+            "all_branches": self.parameterAsBoolean(parameters, self.ALL_BRANCHES, context),
+        }
+        copy_attrs = self.parameterAsBoolean(parameters, self.COPY_ATTRIBUTES, context)
+        workers = self.parameterAsInt(parameters, self.WORKERS, context)
+        params["adaptive"] = self.parameterAsBoolean(parameters, self.ADAPTIVE, context)
+        params["max_interval"] = self.parameterAsDouble(parameters, self.MAX_INTERVAL, context)
+        for parameter in method_parameters():
+            read = self.parameterAsInt if parameter.kind == "int" else self.parameterAsDouble
+            params[parameter.name] = read(parameters, parameter.name.upper(), context)
+        params["fast_path_tolerance"] = self.parameterAsDouble(parameters, self.FAST_PATH_TOLERANCE, context)
+        params["width_step"] = self.parameterAsDouble(parameters, self.WIDTH_STEP, context)
+        params["tile_workers"] = 1 if workers > 1 else default_worker_count()
+
+        # Mesures de performance, seulement si un rapport ou des attributs sont demandés
+        report_path = self.parameterAsFileOutput(parameters, self.PROFILE_REPORT, context)
+        profile_attributes = self.parameterAsBoolean(parameters, self.PROFILE_ATTRIBUTES, context)
+        params["profile"] = bool(report_path or profile_attributes)
+        report = ProfileReport() if params["profile"] else None
+
+        widths = params["width_step"] > 0
+        fields = output_fields(source.fields(), copy_attrs, profile_attributes, widths)
+        sink, dest_id = self.parameterAsSink(
+            parameters, self.OUTPUT, context,
+            fields, output_wkb_type(params), source.sourceCrs()
+        )
+        if sink is None:
+            raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
+
+        total = 100.0 / source.featureCount() if source.featureCount() else 0
+
+        def jobs():
+            for feature in source.getFeatures():
+                if feedback.isCanceled():
+                    return
+                wkb = polygon_wkb(feature.geometry())
+                if wkb is None:
+                    continue
+                yield (feature.id(), feature.attributes()), wkb
+
+        cache = None
+        if self.parameterAsBoolean(parameters, self.USE_CACHE, context):
+            cache = CenterlineCache(os.path.join(QgsApplication.qgisSettingsDirPath(), CACHE_FILE_NAME))
+
+        network = self.parameterAsBoolean(parameters, self.NETWORK, context)
+        saved_vertices = 0
+        network_links = 0
+        paths = {"fast_path": 0, "full_path": 0}
+        try:
+            if network:
+                results = iter_network_centerlines(
+                    source, params, workers, feedback.isCanceled, cache,
+                    tolerance=self.parameterAsDouble(parameters, self.NETWORK_TOLERANCE, context)
+                )
+            else:
+                results = iter_centerlines(jobs(), params, workers, feedback.isCanceled, cache)
+            for current, ((fid, attributes), wkb, message, stats) in enumerate(results):
+                if message:
+                    feedback.pushWarning(message)
+                saved_vertices += stats.get("saved_vertices", 0)
+                network_links += stats.get("network_links", 0)
+                for path in paths:
+                    paths[path] += stats.get(path, 0)
+                profile = stats.get("profile")
+                write_time = None
+                if wkb is not None:
+                    start = time.perf_counter()
+                    new_feat = centerline_feature(
+                        fields, wkb, attributes, profile, stats.get("width"),
+                        copy_attrs, profile_attributes, widths
+                    )
+                    sink.addFeature(new_feat, QgsFeatureSink.FastInsert)
+                    write_time = time.perf_counter() - start
+                if report is not None:
+                    report.add(fid, profile, write_time)
+                feedback.setProgress(int((current + 1) * total))
+        finally:
+            if cache is not None:
+                cache.close()
+
+        if params["densify"] and params["adaptive"]:
+            feedback.pushInfo(self.tr("Densification adaptative : {} sommets économisés.").format(saved_vertices))
+        if params["fast_path_tolerance"] > 0:
+            feedback.pushInfo(self.tr("Voie rapide : {} entités, chaîne complète : {}.").format(
+                paths["fast_path"], paths["full_path"]
+            ))
+        if network:
+            feedback.pushInfo(self.tr("Mode réseau : {} raccordements.").format(network_links))
+        if cache is not None:
+            feedback.pushInfo(self.tr("Cache : {} trouvées, {} calculées.").format(cache.hits, cache.misses))
+
+        results = {self.OUTPUT: dest_id}
+        if report is not None:
+            feedback.pushInfo(report.summary())
+            if report_path:
+                report.write(report_path)
+                results[self.PROFILE_REPORT] = report_path
+        return results
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - cache des résultats
+                                 A QGIS plugin
+ Cache disque (SQLite) des centerlines, adressé par le contenu
+ ***************************************************************************/
+"""
+import hashlib
+import json
+import sqlite3
+import time
+
+# Taille maximale par défaut des centerlines stockées (octets)
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+
+# Nom du fichier de cache dans le répertoire du profil QGIS
+CACHE_FILE_NAME = "polygon_centerline_cache.sqlite"
+
+# Version des résultats mis en cache, incluse dans la clé : à incrémenter à
+# chaque modification d'un moteur qui change les centerlines produites, pour
+# que les entrées calculées par une version antérieure ne soient plus servies
+# (elles sont ensuite évincées comme les autres, par ancienneté)
+CACHE_VERSION = 8
+
+# Paramètres d'exécution sans effet sur le résultat, exclus de la clé
+EXECUTION_PARAMS = ("tile_workers", "profile")
+
+# Attente maximale (secondes) d'une base verrouillée par une autre connexion,
+# au-delà de laquelle l'accès est traité comme une absence du cache
+BUSY_TIMEOUT = 5
+
+
+class CenterlineCache:
+    """
+    Cache des centerlines calculées, stocké dans une base SQLite.
+
+    La clé d'une entrée est l'empreinte SHA-256 de la version du cache, du
+    WKB de la géométrie et des paramètres de calcul : une entité inchangée
+    calculée avec les mêmes paramètres n'est pas recalculée, quelle que
+    soit la couche d'origine.
+    La taille totale des entrées est bornée par max_size ; au-delà, les
+    entrées les moins récemment utilisées sont supprimées.
+
+    La connexion est ouverte à la première utilisation, donc dans le thread
+    de la tâche qui s'en sert. Le fichier est partagé par les tâches de
+    fond, le mode lié, l'aperçu et Processing : chaque écriture est validée
+    aussitôt, afin que le verrou d'écriture ne soit jamais conservé pendant
+    un calcul. Une base occupée au-delà du délai d'attente est traitée
+    comme une absence du cache, sans faire échouer le calcul.
+    """
+
+    def __init__(self, path, max_size=DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.max_size = max(0, int(max_size))
+        self.hits = 0
+        self.misses = 0
+        # Taille totale des entrées à la dernière écriture de cette connexion
+        self.total_size = 0
+        self.connection = None
+        self.touched = {}
+
+    def _connect(self):
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            # Une validation par écriture : la synchronisation complète est inutile en WAL
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS centerlines ("
+                " key TEXT PRIMARY KEY, wkb BLOB, message TEXT, stats TEXT,"
+                " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS centerlines_last_used ON centerlines (last_used)"
+            )
+            self.total_size = self.connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM centerlines"
+            ).fetchone()[0]
+        return self.connection
+
+    @staticmethod
+    def key(wkb, params):
+        """Clé d'une entrée : empreinte de CACHE_VERSION, du WKB et des paramètres de calcul."""
+        digest = hashlib.sha256(f"{CACHE_VERSION}:".encode("ascii"))
+        digest.update(bytes(wkb))
+        relevant = {k: v for k, v in params.items() if k not in EXECUTION_PARAMS}
+        digest.update(json.dumps(relevant, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Renvoie (WKB, message, statistiques) si la clé est en cache, None
+        sinon (y compris si la base est occupée). Les accès sont comptés
+        (hits, misses).
+        """
+        try:
+            row = self._connect().execute(
+                "SELECT wkb, message, stats FROM centerlines WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.touched[key] = time.time()
+        wkb, message, stats = row
+        return (bytes(wkb) if wkb is not None else None), message, json.loads(stats or "{}")
+
+    def put(self, key, wkb, message, stats):
+        """
+        Enregistre un résultat et valide l'écriture ; les entrées anciennes
+        sont évincées au besoin. La taille totale est recalculée dans la
+        transaction d'écriture, dont le verrou garantit qu'elle compte les
+        entrées écrites par toutes les connexions au fichier. Si la base
+        reste occupée par une autre connexion, le résultat n'est simplement
+        pas mis en cache.
+        """
+        size = len(wkb) if wkb is not None else 0
+        try:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO centerlines (key, wkb, message, stats, size, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, wkb, message, json.dumps(stats), size, time.time())
+            )
+            total_size = connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM centerlines"
+            ).fetchone()[0]
+            if total_size > self.max_size:
+                total_size = self.evict(total_size)
+            self.flush()
+            self.total_size = total_size
+        except sqlite3.OperationalError:
+            if self.connection is not None:
+                self.connection.rollback()
+
+    def evict(self, total_size):
+        """
+        Supprime les entrées les moins récemment utilisées (LRU) et renvoie
+        la taille totale qui en résulte (total_size avant l'éviction).
+        """
+        connection = self._connect()
+        self._touch()
+        target = int(self.max_size * 0.9)
+        excess = total_size - target
+        if excess <= 0:
+            return total_size
+
+        doomed = []
+        freed = 0
+        for key, size in connection.execute("SELECT key, size FROM centerlines ORDER BY last_used"):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        connection.executemany("DELETE FROM centerlines WHERE key = ?", doomed)
+        return total_size - freed
+
+    def _touch(self):
+        """Reporte en base les dates d'utilisation des entrées lues."""
+        if self.touched:
+            self.connection.executemany(
+                "UPDATE centerlines SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self.touched.items()]
+            )
+            self.touched = {}
+
+    def flush(self):
+        """Valide les écritures en attente (dates d'utilisation des entrées lues)."""
+        if self.connection is None:
+            return
+        self._touch()
+        self.connection.commit()
+
+    def close(self):
+        """Valide les écritures et ferme la base."""
+        if self.connection is None:
+            return
+        try:
+            self.flush()
+        except sqlite3.OperationalError:
+            self.connection.rollback()
+        self.connection.close()
+        self.connection = None
+
+    def clear(self):
+        """Vide le cache."""
+        self._connect().execute("DELETE FROM centerlines")
+        self.connection.commit()
+        self.total_size = 0
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - ligne de commande
+                                 A QGIS plugin
+ Génération des centerlines hors de QGIS : GeoPackage en entrée et en sortie
+
+ Exemple :
+     python -m QGIS_centerline.centerline_cli rivieres.gpkg centerlines.gpkg \
+         --method VORONOI --workers 8
+ ***************************************************************************/
+"""
+import argparse
+import sqlite3
+import sys
+import time
+
+from .centerline_cache import CenterlineCache
+from .centerline_core import DEFAULT_PARAMS, default_worker_count, iter_centerlines
+from .gpkg_io import DEFAULT_BATCH_SIZE, GeoPackageReader, GeoPackageWriter
+from .line_smoothing import SIMPLIFY_METHODS
+from .method_registry import method_names, method_parameters
+from .profiling import ProfileReport, profile_fields, profile_values
+from .width_profile import width_fields, width_values
+
+PRUNE_MODES = ["LENGTH", "WIDTH"]
+
+
+def parse_shard(value):
+    """Lit une répartition « i/n » : entités dont l'identifiant vaut i modulo n."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("format attendu : i/n")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError("il faut 0 <= i < n")
+    return index, count
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="centerline_cli",
+        description="Génère des centerlines à partir d'une couche de polygones GeoPackage."
+    )
+    parser.add_argument("input", help="GeoPackage contenant les polygones")
+    parser.add_argument("output", help="GeoPackage de sortie (créé ou complété)")
+    parser.add_argument("--layer", help="couche d'entrée (par défaut la première couche vectorielle)")
+    parser.add_argument("--output-layer", default="centerlines", help="nom de la couche de sortie")
+
+    parser.add_argument("--method", choices=method_names(), default=DEFAULT_PARAMS["method"])
+    parser.add_argument("--densify", action=argparse.BooleanOptionalAction, default=DEFAULT_PARAMS["densify"])
+    parser.add_argument("--interval", type=float, default=DEFAULT_PARAMS["interval"])
+    parser.add_argument("--adaptive", action=argparse.BooleanOptionalAction, default=DEFAULT_PARAMS["adaptive"])
+    parser.add_argument("--max-interval", type=float, default=DEFAULT_PARAMS["max_interval"])
+    parser.add_argument("--simplify", action=argparse.BooleanOptionalAction, default=DEFAULT_PARAMS["simplify"])
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_PARAMS["tolerance"])
+    parser.add_argument("--simplify-method", choices=SIMPLIFY_METHODS, default=DEFAULT_PARAMS["simplify_method"])
+    parser.add_argument("--smooth-iterations", type=int, default=DEFAULT_PARAMS["smooth_iterations"],
+                        help="itérations du lissage de Chaikin (0 : pas de lissage)")
+    parser.add_argument("--snap-tolerance", type=float, default=DEFAULT_PARAMS["snap_tolerance"],
+                        help="distance d'accrochage des extrémités des lignes (0 : désactivé)")
+    parser.add_argument("--prune", action=argparse.BooleanOptionalAction, default=DEFAULT_PARAMS["prune"])
+    parser.add_argument("--min-length", type=float, default=DEFAULT_PARAMS["min_length"])
+    parser.add_argument("--prune-mode", choices=PRUNE_MODES, default=DEFAULT_PARAMS["prune_mode"])
+    parser.add_argument("--width-factor", type=float, default=DEFAULT_PARAMS["width_factor"])
+    parser.add_argument("--all-branches", action=argparse.BooleanOptionalAction,
+                        default=DEFAULT_PARAMS["all_branches"],
+                        help="conserver toutes les branches du squelette au lieu du tronc de chaque partie")
+    parser.add_argument("--fast-path-tolerance", type=float, default=DEFAULT_PARAMS["fast_path_tolerance"],
+                        help="écart toléré au rectangle pour la voie rapide (0 : désactivée)")
+    parser.add_argument("--width-step", type=float, default=DEFAULT_PARAMS["width_step"],
+                        help="pas du profil de largeur : mesure M et champs width_* (0 : désactivé)")
+    # Paramètres propres aux méthodes, déclarés dans le registre
+    for parameter in method_parameters():
+        parser.add_argument("--" + parameter.name.replace("_", "-"),
+                            type=int if parameter.kind == "int" else float,
+                            default=parameter.default, help=parameter.description)
+
+    parser.add_argument("--attributes", action=argparse.BooleanOptionalAction, default=True,
+                        help="copier les attributs des polygones")
+    parser.add_argument("--workers", type=int, default=default_worker_count(),
+                        help="nombre de processus de calcul")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--cache", help="fichier SQLite du cache des résultats")
+    parser.add_argument("--shard", type=parse_shard,
+                        help="ne traiter que les entités d'identifiant i modulo n (format i/n)")
+    parser.add_argument("--profile-report",
+                        help="rapport de performance par étape et par entité (.json ou .csv)")
+    parser.add_argument("--profile-attributes", action="store_true",
+                        help="ajouter les mesures de performance aux attributs des centerlines")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    params = {
+        "method": args.method,
+        "densify": args.densify,
+        "interval": args.interval,
+        "adaptive": args.adaptive,
+        "max_interval": args.max_interval,
+        "simplify": args.simplify,
+        "tolerance": args.tolerance,
+        "simplify_method": args.simplify_method,
+        "smooth_iterations": args.smooth_iterations,
+        "snap_tolerance": args.snap_tolerance,
+        "prune": args.prune,
+        "min_length": args.min_length,
+        "prune_mode": args.prune_mode,
+        "width_factor": args.width_factor,
+        "all_branches": args.all_branches,
+        "fast_path_tolerance": args.fast_path_tolerance,
+        "width_step": args.width_step,
+        **{parameter.name: getattr(args, parameter.name) for parameter in method_parameters()},
+        # Les tuiles ne sont parallélisées que si les entités ne le sont pas
+        "tile_workers": 1 if args.workers > 1 else default_worker_count(),
+        "profile": bool(args.profile_report or args.profile_attributes),
+    }
+
+    try:
+        reader = GeoPackageReader(args.input, args.layer, args.shard)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+
+    columns = list(reader.columns) if args.attributes else []
+    if args.profile_attributes:
+        columns += profile_fields()
+    widths = args.width_step > 0
+    if widths:
+        columns += width_fields()
+    report = ProfileReport() if params["profile"] else None
+    writer = GeoPackageWriter(
+        args.output, args.output_layer, reader.srs(), columns, args.batch_size, measures=widths
+    )
+    cache = CenterlineCache(args.cache) if args.cache else None
+    workers = max(1, min(args.workers, reader.count()))
+
+    start = time.perf_counter()
+    warnings = 0
+    saved_vertices = 0
+    paths = {"fast_path": 0, "full_path": 0}
+    try:
+        jobs = (((fid, attributes), wkb) for fid, attributes, wkb in reader.features())
+        for (fid, attributes), wkb, message, stats in iter_centerlines(jobs, params, workers, cache=cache):
+            if message:
+                warnings += 1
+                print(message, file=sys.stderr)
+            saved_vertices += stats.get("saved_vertices", 0)
+            for path in paths:
+                paths[path] += stats.get(path, 0)
+            profile = stats.get("profile")
+            write_time = None
+            if wkb is not None:
+                values = list(attributes) if args.attributes else []
+                if args.profile_attributes:
+                    values += profile_values(profile)
+                if widths:
+                    values += width_values(stats.get("width"))
+                write_start = time.perf_counter()
+                writer.add(wkb, values)
+                write_time = time.perf_counter() - write_start
+            if report is not None:
+                report.add(fid, profile, write_time)
+    finally:
+        writer.close()
+        reader.close()
+        if cache is not None:
+            cache.close()
+
+    summary = f"{writer.count} centerlines écrites en {time.perf_counter() - start:.1f} s"
+    if warnings:
+        summary += f", {warnings} avertissement(s)"
+    if args.densify and args.adaptive:
+        summary += f", {saved_vertices} sommets économisés"
+    if args.fast_path_tolerance > 0:
+        summary += f", voie rapide : {paths['fast_path']}, chaîne complète : {paths['full_path']}"
+    if cache is not None:
+        summary += f", cache : {cache.hits} trouvées, {cache.misses} calculées"
+    print(summary + ".", file=sys.stderr)
+    if report is not None:
+        print(report.summary(), file=sys.stderr)
+        if args.profile_report:
+            report.write(args.profile_report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - cœur de calcul
+                                 A QGIS plugin
+ Calcul des centerlines sur tableaux de coordonnées, sans Qt ni QGIS :
+ utilisé par le plugin, l'algorithme Processing et la ligne de commande
+ ***************************************************************************/
+"""
+import multiprocessing
+import os
+import shutil
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.spatial import QhullError, cKDTree
+
+from .densify import adaptive_densify, densify_rings
+from .geometry_arrays import PolygonRings, minimum_rectangle, ring_area
+from .line_smoothing import postprocess_lines
+from .method_registry import get_method, method_defaults
+from .profiling import NULL_PROFILER, StageProfiler, memory_tracing
+from .skeleton_graph import SkeletonGraph
+from .width_profile import width_profile
+from .wkb_io import decode_polygons, encode_linestring, encode_multilinestring
+
+# Nombre de géométries en attente par processus de calcul
+PENDING_PER_WORKER = 4
+
+# Allongement minimal (longueur / largeur) d'une forme admise par la voie rapide
+FAST_PATH_ELONGATION = 3.0
+
+# Paramètres par défaut (ceux de la boîte de dialogue)
+DEFAULT_PARAMS = {
+    "method": "MORPHOLOGICAL",
+    "densify": True,
+    "interval": 1.0,
+    "adaptive": False,
+    "max_interval": 10.0,
+    "simplify": True,
+    "tolerance": 0.5,
+    "simplify_method": "DOUGLAS_PEUCKER",
+    "smooth_iterations": 0,
+    "snap_tolerance": 0.0,
+    "prune": True,
+    "min_length": 5.0,
+    "prune_mode": "LENGTH",
+    "width_factor": 1.0,
+    "all_branches": False,
+    # Paramètres propres aux méthodes (max_tile_vertices, cell_size)
+    **method_defaults(),
+    "tile_workers": 1,
+    "profile": False,
+    "fast_path_tolerance": 0.0,
+    "width_step": 0.0,
+}
+
+
+def compute_centerline(polygons, params, profiler=NULL_PROFILER):
+    """
+    Calcule la centerline d'un polygone selon les paramètres fournis
+    (dictionnaire : method, densify, interval, simplify, tolerance,
+    simplify_method, smooth_iterations, snap_tolerance, prune, min_length,
+    prune_mode, width_factor, all_branches, max_tile_vertices, tile_workers,
+    adaptive, max_interval, cell_size, fast_path_tolerance). polygons est une
+    liste de parties, chacune étant une liste d'anneaux fermés (N, 2).
+
+    Les méthodes de squelette (Voronoï, raster, axe cordal) ne renvoient que
+    le tronc de chaque partie, extrait après l'élagage, à moins que
+    all_branches ne demande toutes les branches conservées.
+
+    Renvoie (lignes, message, stats) : lignes est une liste de tableaux
+    (N, 2), ou None si aucune ligne n'a pu être générée ; message décrit
+    l'éventuelle erreur ou méthode de repli ; stats contient les compteurs
+    de l'entité (sommets économisés par la densification adaptative,
+    entités traitées par la voie rapide ou la chaîne complète).
+
+    profiler (voir profiling.StageProfiler) reçoit la durée et la mémoire de
+    pointe de chaque étape ainsi que les compteurs de sommets ; par défaut,
+    aucune mesure n'est prise.
+    """
+    stats = {}
+
+    # Anneaux de toutes les parties et de tous les trous
+    shape = PolygonRings(polygons)
+    if not len(shape):
+        return None, None, stats
+    if profiler.enabled:
+        profiler.count("input_vertices", sum(len(ring) - 1 for ring in shape.rings))
+
+    # Voie rapide : les bandes quasi rectangulaires ont un axe connu
+    tolerance = params.get("fast_path_tolerance") or 0.0
+    if tolerance > 0:
+        with profiler.stage("classify"):
+            line = fast_path_line(shape, tolerance)
+        if line is not None:
+            stats["fast_path"] = 1
+            if profiler.enabled:
+                profiler.count("output_vertices", len(line))
+            return [line], None, stats
+        stats["full_path"] = 1
+
+    # Densifier le polygone si nécessaire
+    with profiler.stage("densify"):
+        if params["densify"] and params.get("adaptive"):
+            rings, stats["saved_vertices"] = adaptive_densify(
+                shape.rings, params["interval"], params.get("max_interval")
+            )
+            shape = shape.with_rings(rings)
+        elif params["densify"]:
+            shape = shape.with_rings(densify_rings(shape.rings, params["interval"]))
+
+    # Générer la centerline avec le moteur de la méthode choisie, importé
+    # à son premier calcul (voir method_registry)
+    try:
+        method = get_method(params["method"])
+    except ValueError as e:
+        return None, str(e), stats
+    message = None
+    with profiler.stage("skeleton"):
+        try:
+            lines = method.engine()(shape, params, profiler)
+        except Exception as e:
+            if method.fallback is None:
+                return None, f"{method.error}: {str(e)}", stats
+            # Si le moteur échoue, revenir à la méthode de repli
+            message = f"{method.error}: {str(e)}. Utilisation de la méthode alternative."
+            method = get_method(method.fallback)
+            try:
+                lines = method.engine()(shape, params, profiler)
+            except Exception as e:
+                return None, f"{method.error}: {str(e)}", stats
+
+    if not lines:
+        return None, message, stats
+
+    # Élaguer si demandé (avant la simplification, sur un réseau réduit),
+    # puis ne garder que le tronc d'un squelette sauf si toutes ses branches
+    # sont demandées
+    if params["prune"]:
+        trunk = method.network and not params.get("all_branches")
+        with profiler.stage("prune"):
+            if params["prune_mode"] == "WIDTH":
+                lines = prune_lines(lines, params["min_length"], shape, params["width_factor"], trunk)
+            else:
+                lines = prune_lines(lines, params["min_length"], trunk=trunk)
+
+    # Accrocher les extrémités, simplifier et lisser si demandé, toutes les
+    # lignes de l'entité en bloc
+    simplify_method = params.get("simplify_method", "DOUGLAS_PEUCKER") if params["simplify"] else None
+    smooth_iterations = params.get("smooth_iterations", 0)
+    snap_tolerance = params.get("snap_tolerance", 0.0)
+    if lines and (simplify_method or smooth_iterations or snap_tolerance > 0):
+        with profiler.stage("simplify"):
+            lines = postprocess_lines(
+                lines, simplify_method, params["tolerance"], smooth_iterations, snap_tolerance
+            )
+
+    if profiler.enabled:
+        profiler.count("output_vertices", sum(len(line) for line in lines))
+    return lines or None, message, stats
+
+
+def process_wkb(wkb, params):
+    """
+    Point d'entrée des processus de calcul : la géométrie arrive et repart
+    sous forme de WKB afin de limiter le coût de sérialisation.
+
+    Avec params["profile"], les mesures de l'entité (durées et mémoire de
+    pointe par étape, compteurs) sont renvoyées dans stats["profile"].
+
+    Avec params["width_step"], les centerlines sont échantillonnées à ce pas
+    et portent la largeur locale du polygone en mesure M ; stats["width"]
+    donne ses valeurs minimale, moyenne et maximale (voir width_profile).
+    """
+    if not params.get("profile"):
+        return _process_wkb(wkb, params, NULL_PROFILER)
+
+    profiler = StageProfiler()
+    with memory_tracing():
+        result, message, stats = _process_wkb(wkb, params, profiler)
+    stats["profile"] = profiler.result()
+    return result, message, stats
+
+
+def _process_wkb(wkb, params, profiler):
+    try:
+        polygons = decode_polygons(wkb)
+    except ValueError:
+        # Pas un polygone
+        return None, None, {}
+
+    lines, message, stats = compute_centerline(polygons, params, profiler)
+    if not lines:
+        return None, message, stats
+    step = params.get("width_step") or 0.0
+    if step > 0:
+        with profiler.stage("width"):
+            lines, stats["width"] = width_profile(lines, PolygonRings(polygons).rings, step)
+    with profiler.stage("encode"):
+        if len(lines) == 1:
+            return encode_linestring(lines[0]), message, stats
+        return encode_multilinestring(lines), message, stats
+
+
+def fast_path_line(shape, tolerance, min_elongation=FAST_PATH_ELONGATION):
+    """
+    Axe analytique d'une bande simple, ou None si la forme relève de la
+    chaîne complète.
+
+    La forme doit être un polygone sans trou ni partie multiple, allongé
+    (rectangle orienté minimal au moins min_elongation fois plus long que
+    large), et le remplir à tolerance près : l'aire du polygone atteint
+    (1 - tolerance) fois celle du rectangle, ce qui borne aussi son défaut de
+    convexité (aire de l'enveloppe convexe comprise entre les deux). L'axe
+    est alors le segment médian du rectangle, arrêté à une demi-largeur de
+    chaque bout comme l'axe médian d'un rectangle.
+    """
+    if len(shape.polygons) != 1 or len(shape.polygons[0]) != 1:
+        return None
+    ring = shape.rings[0]
+    if len(ring) < 4:
+        return None
+    try:
+        center, direction, length, width, hull_area = minimum_rectangle(ring[:-1])
+    except QhullError:
+        # Polygone dégénéré (points alignés)
+        return None
+    if width <= 0 or length < min_elongation * width:
+        return None
+
+    area = ring_area(ring)
+    if area < (1.0 - tolerance) * hull_area or area < (1.0 - tolerance) * length * width:
+        return None
+    half = (length - width) / 2.0
+    return np.array([center - half * direction, center + half * direction])
+
+
+def prune_lines(lines, min_length, shape=None, width_factor=None, trunk=False):
+    """
+    Élague les branches trop courtes de la centerline.
+    Les jonctions et extrémités sont identifiées sur le graphe de la
+    centerline, puis les branches terminales plus courtes que min_length
+    sont supprimées itérativement. Si shape (PolygonRings du polygone) et
+    width_factor sont fournis, le seuil devient width_factor fois la
+    largeur locale du polygone à la jonction (voir SkeletonGraph.prune).
+    Avec trunk, seul le tronc (diamètre) de chaque composante connexe du
+    graphe élagué, donc de chaque partie du polygone, est renvoyé.
+    """
+    graph = SkeletonGraph.from_polylines(lines)
+    if graph.is_empty():
+        return lines
+
+    radii = None
+    if shape is not None and width_factor is not None:
+        # Demi-largeur locale : distance au sommet de contour le plus proche
+        boundary, _ = shape.sites()
+        radii, _ = cKDTree(boundary).query(graph.coords)
+
+    pruned = graph.prune(min_length, radii, width_factor)
+    if trunk:
+        return [pruned.coords[path] for path in pruned.diameter_paths()]
+    return [pruned.coords[chain] for chain in pruned.chains()]
+
+
+def default_worker_count():
+    """Nombre de processus par défaut : tous les cœurs sauf un."""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def python_executable():
+    """
+    Interpréteur Python à utiliser pour les processus de calcul. Dans QGIS,
+    sys.executable désigne souvent l'application elle-même et non Python.
+    """
+    candidates = [
+        os.path.join(sys.exec_prefix, "python.exe"),
+        os.path.join(sys.exec_prefix, "bin", "python3"),
+        shutil.which("python3"),
+        shutil.which("python"),
+        sys.executable,
+    ]
+    for candidate in candidates:
+        if candidate and os.path.isfile(candidate) and os.path.basename(candidate).lower().startswith("python"):
+            return candidate
+    return sys.executable
+
+
+def create_executor(workers):
+    """Crée un pool de processus démarrés par « spawn » (sûr depuis Qt)."""
+    context = multiprocessing.get_context("spawn")
+    context.set_executable(python_executable())
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+
+def iter_centerlines(jobs, params, workers=1, is_canceled=None, cache=None):
+    """
+    Calcule les centerlines d'une suite de travaux (clé, WKB) et produit
+    (clé, WKB résultat, message, statistiques) dans l'ordre des travaux.
+
+    Avec plusieurs processus, le pipeline est borné : au plus
+    PENDING_PER_WORKER géométries par processus sont en attente, et chaque
+    résultat est produit dès que lui et ses prédécesseurs sont disponibles.
+
+    Si un cache (CenterlineCache) est fourni, les géométries déjà calculées
+    avec les mêmes paramètres ne sont pas envoyées au calcul, et les
+    nouveaux résultats y sont enregistrés. Les mesures de performance
+    (stats["profile"]) ne sont pas conservées dans le cache : une entité
+    lue dans le cache n'en a pas.
+    """
+    is_canceled = is_canceled or (lambda: False)
+
+    def lookup(wkb):
+        if cache is None:
+            return None, None
+        cache_key = cache.key(wkb, params)
+        return cache_key, cache.get(cache_key)
+
+    def store(cache_key, result):
+        wkb, message, stats = result
+        # Les échecs ne sont pas mis en cache : ils peuvent être passagers
+        if cache is not None and not (wkb is None and message):
+            cache.put(cache_key, wkb, message, {k: v for k, v in stats.items() if k != "profile"})
+        return result
+
+    if workers <= 1:
+        for key, wkb in jobs:
+            if is_canceled():
+                return
+            cache_key, cached = lookup(wkb)
+            if cached is None:
+                cached = store(cache_key, process_wkb(wkb, params))
+            yield (key,) + cached
+        return
+
+    def ready(entry):
+        return entry[3] is not None or entry[2].done()
+
+    def result(entry):
+        key, cache_key, future, cached = entry
+        if cached is None:
+            cached = store(cache_key, future.result())
+        return (key,) + cached
+
+    pending = deque()
+    executor = create_executor(workers)
+    try:
+        for key, wkb in jobs:
+            if is_canceled():
+                return
+            cache_key, cached = lookup(wkb)
+            future = executor.submit(process_wkb, wkb, params) if cached is None else None
+            pending.append((key, cache_key, future, cached))
+            while len(pending) >= workers * PENDING_PER_WORKER or (pending and ready(pending[0])):
+                yield result(pending.popleft())
+
+        while pending and not is_canceled():
+            yield result(pending.popleft())
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - mode lié
+                                 A QGIS plugin
+ Couche de centerlines tenue à jour pendant l'édition de la couche source
+ ***************************************************************************/
+"""
+from qgis.PyQt.QtCore import QObject, QTimer
+from qgis.core import (
+    Qgis, QgsApplication, QgsFeatureRequest, QgsFields, QgsMessageLog, QgsProject, QgsTask,
+    QgsVectorLayer, QgsVectorLayerFeatureSource
+)
+
+from .centerline_cache import CenterlineCache
+from .centerline_core import PENDING_PER_WORKER, iter_centerlines
+from .centerline_task import centerline_feature, polygon_wkb
+
+# Délai (ms) sans modification avant de recalculer les entités touchées
+DEFAULT_DEBOUNCE_MS = 750
+
+
+class LinkedUpdateTask(QgsTask):
+    """
+    Recalcule en tâche de fond les centerlines d'un ensemble d'entités de la
+    couche source (toutes si fids vaut None). Les entités demandées mais
+    absentes de la source sont considérées comme supprimées.
+    """
+
+    def __init__(self, layer, params, fids=None, workers=1, cache_path=None):
+        super().__init__("Mise à jour des centerlines liées", QgsTask.CanCancel)
+        self.params = dict(params)
+        self.fids = None if fids is None else set(fids)
+        self.workers = max(1, int(workers))
+
+        # Copie thread-safe de la source, modifications en cours comprises
+        self.source = QgsVectorLayerFeatureSource(layer)
+        self.feature_count = layer.featureCount() if fids is None else len(self.fids)
+        self.cache = CenterlineCache(cache_path) if cache_path else None
+
+        self.seen = set()
+        self.results = []
+        self.messages = []
+        self.exception = None
+
+    def feature_request(self):
+        """Requête des entités à recalculer."""
+        request = QgsFeatureRequest()
+        if self.fids is not None:
+            request.setFilterFids(list(self.fids))
+        return request
+
+    def jobs(self):
+        """Itère sur les entités à recalculer : ((fid, attributs), WKB)."""
+        for feature in self.source.getFeatures(self.feature_request()):
+            if self.isCanceled():
+                return
+            self.seen.add(feature.id())
+            wkb = polygon_wkb(feature.geometry())
+            if wkb is None:
+                continue
+            yield (feature.id(), feature.attributes()), wkb
+
+    def run(self):
+        # Les petites mises à jour ne justifient pas le démarrage de processus
+        workers = self.workers if self.feature_count > self.workers * PENDING_PER_WORKER else 1
+        try:
+            results = iter_centerlines(self.jobs(), self.params, workers, self.isCanceled, self.cache)
+            for current, ((fid, attributes), wkb, message, stats) in enumerate(results):
+                if message:
+                    self.messages.append(message)
+                self.results.append((fid, attributes, wkb))
+                self.setProgress(100.0 * (current + 1) / max(1, self.feature_count))
+        except Exception as e:
+            self.exception = e
+            return False
+        finally:
+            if self.cache is not None:
+                self.cache.close()
+        return not self.isCanceled()
+
+    def processed_fids(self):
+        """Entités dont les centerlines doivent être remplacées."""
+        return self.seen if self.fids is None else self.fids
+
+
+class CenterlineLink(QObject):
+    """
+    Couche de centerlines liée à sa couche de polygones.
+
+    Les signaux d'édition de la couche source (geometryChanged,
+    featureAdded, featureDeleted, ainsi que attributeValueChanged lorsque les
+    attributs sont copiés) marquent les entités touchées. Après
+    debounce_ms millisecondes sans nouvelle modification, seules ces
+    entités sont recalculées dans une LinkedUpdateTask, et leurs centerlines
+    sont remplacées dans une couche mémoire. Les modifications survenues
+    pendant un calcul sont traitées au suivant.
+    """
+
+    def __init__(self, iface, layer, params, copy_attrs, workers=1, cache_path=None,
+                 debounce_ms=DEFAULT_DEBOUNCE_MS):
+        super().__init__()
+        self.iface = iface
+        self.source_layer = layer
+        self.params = dict(params)
+        self.copy_attrs = copy_attrs
+        self.workers = max(1, int(workers))
+        self.cache_path = cache_path
+
+        self.fields = layer.fields() if copy_attrs else QgsFields()
+        self.layer = QgsVectorLayer(
+            "MultiLineString?crs=" + layer.crs().authid(), f"Centerlines ({layer.name()})", "memory"
+        )
+        if self.fields.count():
+            self.layer.dataProvider().addAttributes(self.fields)
+            self.layer.updateFields()
+
+        # Centerlines produites pour chaque entité source
+        self.features = {}
+        self.dirty = set()
+        self.task = None
+        self.active = True
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self.update)
+
+        layer.geometryChanged.connect(self.on_geometry_changed)
+        layer.featureAdded.connect(self.on_feature_changed)
+        layer.featureDeleted.connect(self.on_feature_changed)
+        layer.committedFeaturesAdded.connect(self.on_committed_features_added)
+        if copy_attrs:
+            layer.attributeValueChanged.connect(self.on_attribute_changed)
+        layer.willBeDeleted.connect(self.unlink)
+        self.layer.willBeDeleted.connect(self.unlink)
+
+    def start(self):
+        """Ajoute la couche au projet et lance le calcul complet initial."""
+        QgsProject.instance().addMapLayer(self.layer)
+        self.launch(None)
+
+    def on_geometry_changed(self, fid, geometry):
+        self.mark(fid)
+
+    def on_feature_changed(self, fid):
+        self.mark(fid)
+
+    def on_attribute_changed(self, fid, index, value):
+        self.mark(fid)
+
+    def on_committed_features_added(self, layer_id, features):
+        # Les identifiants provisoires (négatifs) des entités ajoutées sont
+        # remplacés à l'enregistrement : leurs centerlines sont rattachées
+        # aux identifiants définitifs
+        for fid in [fid for fid in self.features if fid < 0]:
+            self.mark(fid)
+        for feature in features:
+            self.mark(feature.id())
+
+    def mark(self, fid):
+        """Marque une entité à recalculer et relance le délai d'attente."""
+        if not self.active:
+            return
+        self.dirty.add(fid)
+        self.timer.start()
+
+    def update(self):
+        """Recalcule les entités marquées, sauf si un calcul est déjà en cours."""
+        if not self.active or not self.dirty or self.task is not None:
+            return
+        fids, self.dirty = self.dirty, set()
+        self.launch(fids)
+
+    def launch(self, fids):
+        self.task = LinkedUpdateTask(self.source_layer, self.params, fids, self.workers, self.cache_path)
+        self.task.taskCompleted.connect(lambda task=self.task: self.apply(task, True))
+        self.task.taskTerminated.connect(lambda task=self.task: self.apply(task, False))
+        QgsApplication.taskManager().addTask(self.task)
+
+    def apply(self, task, completed):
+        """Remplace, dans le thread principal, les centerlines recalculées."""
+        if task is not self.task:
+            return
+        self.task = None
+        if not self.active:
+            return
+
+        for message in task.messages:
+            QgsMessageLog.logMessage(message, "Centerline", Qgis.Warning)
+
+        if not completed:
+            # Calcul interrompu : les entités restent à recalculer
+            if task.fids is not None:
+                self.dirty |= task.fids
+            if task.exception is not None:
+                self.iface.messageBar().pushCritical(
+                    "Centerline",
+                    f"Erreur lors de la mise à jour des centerlines: {str(task.exception)}"
+                )
+            return
+
+        provider = self.layer.dataProvider()
+        stale = []
+        for fid in task.processed_fids():
+            stale.extend(self.features.pop(fid, []))
+        if task.fids is None:
+            stale.extend(fid for fids in self.features.values() for fid in fids)
+            self.features = {}
+        if stale:
+            provider.deleteFeatures(stale)
+
+        owners, new_features = [], []
+        for fid, attributes, wkb in task.results:
+            if wkb is None:
+                continue
+            owners.append(fid)
+            new_features.append(centerline_feature(self.fields, wkb, attributes, copy_attrs=self.copy_attrs))
+
+        if new_features:
+            ok, added = provider.addFeatures(new_features)
+            if ok:
+                for fid, feature in zip(owners, added):
+                    self.features.setdefault(fid, []).append(feature.id())
+
+        self.layer.updateExtents()
+        self.layer.triggerRepaint()
+
+        # Modifications arrivées pendant le calcul
+        if self.dirty:
+            self.timer.start()
+
+    def unlink(self):
+        """Détache la couche de centerlines de sa source."""
+        if not self.active:
+            return
+        self.active = False
+        self.timer.stop()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+        layer = self.source_layer
+        for signal, slot in (
+            (layer.geometryChanged, self.on_geometry_changed),
+            (layer.featureAdded, self.on_feature_changed),
+            (layer.featureDeleted, self.on_feature_changed),
+            (layer.committedFeaturesAdded, self.on_committed_features_added),
+            (layer.attributeValueChanged, self.on_attribute_changed),
+            (layer.willBeDeleted, self.unlink),
+            (self.layer.willBeDeleted, self.unlink),
+        ):
+            try:
+                signal.disconnect(slot)
+            except TypeError:
+                pass
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - mode réseau
+                                 A QGIS plugin
+ Centerlines connectées pour les couches dont un même objet (route,
+ rivière) est découpé en polygones adjacents
+ ***************************************************************************/
+"""
+import math
+
+import numpy as np
+from qgis.core import QgsFeatureRequest, QgsGeometry, QgsSpatialIndex, QgsWkbTypes
+
+from .centerline_core import iter_centerlines
+from .centerline_task import polygon_wkb
+from .network_stitch import component_labels, stitch_lines
+from .wkb_io import decode_lines, encode_linestring, encode_multilinestring
+
+
+def boundary_gates(first, second):
+    """
+    Portes entre deux polygones adjacents : (point, largeur) au milieu de
+    chaque portion de frontière commune. Un simple contact en un point ne
+    donne pas de porte ; un recouvrement donne un point intérieur à la zone
+    commune.
+    """
+    shared = first.intersection(second)
+    if shared.isNull() or shared.isEmpty():
+        return []
+
+    gates = []
+    for part in shared.asGeometryCollection():
+        if part.type() == QgsWkbTypes.LineGeometry:
+            for line in part.mergeLines().asGeometryCollection():
+                length = line.length()
+                if length > 0:
+                    point = line.interpolate(length / 2.0).asPoint()
+                    gates.append(((point.x(), point.y()), length))
+        elif part.type() == QgsWkbTypes.PolygonGeometry:
+            point = part.pointOnSurface().asPoint()
+            gates.append(((point.x(), point.y()), math.sqrt(part.area())))
+    return gates
+
+
+class NetworkIndex:
+    """
+    Index des polygones d'une couche pour le mode réseau.
+
+    Les polygones sont rangés dans un QgsSpatialIndex (géométries
+    conservées) ; les voisins de chacun sont cherchés dans son emprise puis
+    confirmés par un test d'intersection préparé. Les composantes connexes du
+    graphe de voisinage sont ensuite traitées l'une après l'autre : aucun
+    traitement ne porte sur la couche entière (ni union, ni comparaison de
+    toutes les paires).
+    """
+
+    def __init__(self, source, request=None, is_canceled=None):
+        is_canceled = is_canceled or (lambda: False)
+        self.index = QgsSpatialIndex(QgsSpatialIndex.FlagStoredGeometries)
+        self.attributes = {}
+        self.fids = []
+        for feature in source.getFeatures(request or QgsFeatureRequest()):
+            if is_canceled():
+                return
+            geometry = feature.geometry()
+            if geometry.isNull() or geometry.isEmpty() or geometry.type() != QgsWkbTypes.PolygonGeometry:
+                continue
+            self.index.addFeature(feature)
+            self.attributes[feature.id()] = feature.attributes()
+            self.fids.append(feature.id())
+
+        position = {fid: i for i, fid in enumerate(self.fids)}
+        pairs = []
+        for fid in self.fids:
+            if is_canceled():
+                return
+            geometry = self.index.geometry(fid)
+            engine = QgsGeometry.createGeometryEngine(geometry.constGet())
+            engine.prepareGeometry()
+            for other in self.index.intersects(geometry.boundingBox()):
+                if other > fid and other in position and engine.intersects(self.index.geometry(other).constGet()):
+                    pairs.append((position[fid], position[other]))
+
+        labels = component_labels(len(self.fids), pairs)
+        self.labels = dict(zip(self.fids, labels.tolist()))
+        self.neighbours = {}
+        for i, j in pairs:
+            first, second = self.fids[i], self.fids[j]
+            self.neighbours.setdefault(first, []).append(second)
+            self.neighbours.setdefault(second, []).append(first)
+
+        # Entités regroupées par composante, dans l'ordre de la couche
+        order = np.argsort(labels, kind="stable")
+        self.fids = [self.fids[i] for i in order]
+
+    def jobs(self, is_canceled=None):
+        """Travaux ((fid, attributs), WKB), composante par composante."""
+        for fid in self.fids:
+            if is_canceled is not None and is_canceled():
+                return
+            wkb = polygon_wkb(self.index.geometry(fid))
+            if wkb is not None:
+                yield (fid, self.attributes[fid]), wkb
+
+    def stitch(self, results, tolerance=None):
+        """
+        Raccorde les centerlines d'une composante (résultats de
+        iter_centerlines) aux frontières communes de ses polygones.
+        """
+        # Les mesures M (largeur) sont conservées par le raccordement
+        lines = {
+            key[0]: (decode_lines(wkb, "width" in stats) if wkb is not None else [])
+            for key, wkb, _, stats in results
+        }
+        gates = {fid: [] for fid in lines}
+        for fid in lines:
+            for other in self.neighbours.get(fid, []):
+                if other > fid and other in lines:
+                    shared = boundary_gates(self.index.geometry(fid), self.index.geometry(other))
+                    gates[fid].extend(shared)
+                    gates[other].extend(shared)
+
+        for key, wkb, message, stats in results:
+            fid = key[0]
+            if gates[fid] and lines[fid]:
+                stitched, links = stitch_lines(lines[fid], gates[fid], tolerance)
+                stats["network_links"] = stats.get("network_links", 0) + links
+                wkb = encode_linestring(stitched[0]) if len(stitched) == 1 else encode_multilinestring(stitched)
+            yield key, wkb, message, stats
+
+
+def iter_network_centerlines(source, params, workers=1, is_canceled=None, cache=None,
+                             request=None, tolerance=None):
+    """
+    Équivalent de iter_centerlines pour le mode réseau : les centerlines des
+    polygones adjacents sont raccordées en un réseau connexe. Les résultats
+    sont produits par composante connexe, dès qu'elle est complète ; seule
+    la composante en cours est gardée en mémoire.
+    """
+    network = NetworkIndex(source, request, is_canceled)
+    results = iter_centerlines(network.jobs(is_canceled), params, workers, is_canceled, cache)
+
+    pending, current = [], None
+    for result in results:
+        label = network.labels[result[0][0]]
+        if pending and label != current:
+            yield from network.stitch(pending, tolerance)
+            pending = []
+        current = label
+        pending.append(result)
+    if pending and not (is_canceled is not None and is_canceled()):
+        yield from network.stitch(pending, tolerance)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - écriture des résultats
+                                 A QGIS plugin
+ Destination des centerlines : couche mémoire ou fichier écrit par lots
+ ***************************************************************************/
+"""
+import os.path
+
+from qgis.core import QgsVectorFileWriter, QgsVectorLayer, QgsWkbTypes
+
+# Pilotes OGR proposés pour l'écriture sur disque, selon l'extension
+FILE_DRIVERS = {
+    ".gpkg": "GPKG",
+    ".fgb": "FlatGeobuf",
+    ".shp": "ESRI Shapefile",
+    ".geojson": "GeoJSON",
+}
+
+FILE_FILTER = "GeoPackage (*.gpkg);;FlatGeobuf (*.fgb)"
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class CenterlineOutput:
+    """
+    Destination des centerlines générées.
+
+    Sans chemin, les entités sont ajoutées à une couche mémoire. Avec un
+    chemin, elles sont écrites au fil de l'eau par QgsVectorFileWriter, par
+    lots de batch_size entités : pour GeoPackage, l'écrivain ouvre une seule
+    transaction validée à la fermeture, et la mémoire consommée reste bornée
+    par la taille du lot quelle que soit la taille de la couche. wkb_type
+    est le type des géométries (MultiLineStringM pour les centerlines
+    portant la largeur locale).
+
+    Le constructeur et layer() doivent être appelés dans le thread principal ;
+    add() et close() peuvent l'être depuis une tâche de fond.
+    """
+
+    def __init__(self, fields, crs, transform_context, path=None,
+                 batch_size=DEFAULT_BATCH_SIZE, layer_name="Centerlines", wkb_type=QgsWkbTypes.MultiLineString):
+        self.path = path or None
+        self.layer_name = layer_name
+        self.batch_size = max(1, int(batch_size))
+        self.count = 0
+        self.buffer = []
+        self.writer = None
+        self.memory_layer = None
+
+        if self.path is None:
+            self.memory_layer = QgsVectorLayer(
+                QgsWkbTypes.displayString(wkb_type) + "?crs=" + crs.authid(), layer_name, "memory"
+            )
+            if fields.count():
+                self.memory_layer.dataProvider().addAttributes(fields)
+                self.memory_layer.updateFields()
+            self.sink = self.memory_layer.dataProvider()
+            return
+
+        extension = os.path.splitext(self.path)[1].lower()
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = FILE_DRIVERS.get(extension, "GPKG")
+        options.layerName = layer_name
+        options.fileEncoding = "UTF-8"
+
+        self.writer = QgsVectorFileWriter.create(
+            self.path, fields, wkb_type, crs, transform_context, options
+        )
+        if self.writer.hasError() != QgsVectorFileWriter.NoError:
+            raise OSError(
+                f"Impossible de créer le fichier {self.path}: {self.writer.errorMessage()}"
+            )
+        self.sink = self.writer
+
+    def add(self, feature):
+        """Ajoute une entité ; le lot est écrit dès qu'il est plein."""
+        self.buffer.append(feature)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Écrit le lot en attente."""
+        if not self.buffer:
+            return
+        if not self.sink.addFeatures(self.buffer):
+            message = self.writer.errorMessage() if self.writer is not None else ""
+            raise OSError(f"Erreur lors de l'écriture des centerlines: {message}")
+        self.count += len(self.buffer)
+        self.buffer = []
+
+    def close(self):
+        """Écrit le dernier lot et ferme le fichier (validation de la transaction)."""
+        self.flush()
+        if self.writer is not None:
+            self.writer.flushBuffer()
+            # La destruction de l'écrivain valide la transaction et ferme le fichier
+            self.writer = None
+            self.sink = None
+
+    def layer(self):
+        """Couche résultat à ajouter au projet, chargée seulement à la fin."""
+        if self.memory_layer is not None:
+            return self.memory_layer
+        uri = self.path
+        if uri.lower().endswith(".gpkg"):
+            uri += "|layername=" + self.layer_name
+        return QgsVectorLayer(uri, self.layer_name, "ogr")
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - aperçu
+                                 A QGIS plugin
+ Aperçu progressif des centerlines sur l'emprise du canevas, pour régler
+ les paramètres avant le calcul complet
+ ***************************************************************************/
+"""
+from qgis.PyQt.QtCore import QObject, QTimer
+from qgis.core import (
+    QgsApplication, QgsCoordinateTransform, QgsFeatureRequest, QgsFields, QgsProject, QgsVectorLayer
+)
+
+from .centerline_link import LinkedUpdateTask
+from .centerline_task import centerline_feature
+
+# Délai (ms) sans changement de paramètre avant de relancer l'aperçu
+PREVIEW_DEBOUNCE_MS = 400
+
+# Facteur appliqué à l'intervalle de densification de la passe grossière
+COARSE_INTERVAL_FACTOR = 5.0
+
+# Nombre maximal d'entités de la passe grossière
+COARSE_FEATURE_LIMIT = 200
+
+
+class PreviewTask(LinkedUpdateTask):
+    """
+    Calcul des centerlines des seules entités de l'emprise rect.
+
+    Le nombre d'entités, qui fixe la taille du pool de processus et la
+    progression, est celui de l'emprise et non celui de la couche : il est
+    compté au début de la tâche, en tâche de fond. En deçà de
+    PENDING_PER_WORKER entités par processus, le calcul reste dans le
+    processus de QGIS (voir LinkedUpdateTask.run).
+    """
+
+    def __init__(self, layer, params, rect, limit=-1, workers=1, cache_path=None):
+        super().__init__(layer, params, None, workers, cache_path)
+        self.rect = rect
+        self.limit = limit
+
+    def feature_request(self):
+        request = QgsFeatureRequest().setFilterRect(self.rect)
+        if self.limit > 0:
+            request.setLimit(self.limit)
+        return request
+
+    def run(self):
+        request = self.feature_request().setNoAttributes().setFlags(QgsFeatureRequest.NoGeometry)
+        self.fids = {feature.id() for feature in self.source.getFeatures(request)}
+        self.feature_count = len(self.fids)
+        return super().run()
+
+
+def coarse_params(params):
+    """Paramètres de la passe grossière : densification relâchée, sans densification adaptative."""
+    coarse = dict(params, adaptive=False, profile=False)
+    coarse["interval"] = params["interval"] * COARSE_INTERVAL_FACTOR
+    return coarse
+
+
+class CenterlinePreview(QObject):
+    """
+    Aperçu des centerlines d'une couche dans une couche mémoire temporaire.
+
+    Seules les entités de l'emprise courante du canevas sont traitées. Une
+    première passe grossière (densification relâchée, nombre d'entités
+    borné, sans processus de calcul) affiche un résultat en moins d'une
+    seconde, puis une passe complète l'affine en tâche de fond. Tout
+    changement de paramètre ou d'emprise annule le calcul en cours et, après
+    PREVIEW_DEBOUNCE_MS millisecondes, relance les deux passes.
+    """
+
+    def __init__(self, iface, workers=1, cache_path=None):
+        super().__init__()
+        self.iface = iface
+        self.workers = max(1, int(workers))
+        self.cache_path = cache_path
+        self.source_layer = None
+        self.params = None
+        self.layer = None
+        self.task = None
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(PREVIEW_DEBOUNCE_MS)
+        self.timer.timeout.connect(self.launch)
+        self.iface.mapCanvas().extentsChanged.connect(self.on_extent_changed)
+
+    def request(self, layer, params):
+        """Demande un aperçu de layer avec params (après le délai d'attente)."""
+        if layer is not self.source_layer:
+            self.remove_layer()
+        self.source_layer = layer
+        self.params = dict(params)
+        self.cancel()
+        self.timer.start()
+
+    def on_extent_changed(self):
+        if self.params is not None:
+            self.cancel()
+            self.timer.start()
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def canvas_rect(self):
+        """Emprise du canevas dans le SCR de la couche source."""
+        canvas = self.iface.mapCanvas()
+        transform = QgsCoordinateTransform(
+            canvas.mapSettings().destinationCrs(), self.source_layer.crs(), QgsProject.instance()
+        )
+        return transform.transformBoundingBox(canvas.extent())
+
+    def launch(self, refine=False):
+        """Lance la passe grossière, ou la passe complète si refine."""
+        if self.source_layer is None or self.params is None:
+            return
+        rect = self.canvas_rect()
+        if refine:
+            task = PreviewTask(self.source_layer, self.params, rect, -1, self.workers, self.cache_path)
+        else:
+            task = PreviewTask(self.source_layer, coarse_params(self.params), rect, COARSE_FEATURE_LIMIT)
+        self.task = task
+        task.taskCompleted.connect(lambda: self.apply(task, refine))
+        task.taskTerminated.connect(lambda: self.apply(task, refine, False))
+        QgsApplication.taskManager().addTask(task)
+
+    def apply(self, task, refine, completed=True):
+        """Affiche le résultat d'une passe, puis enchaîne sur la suivante."""
+        if task is not self.task:
+            return
+        self.task = None
+        if not completed:
+            return
+
+        layer = self.preview_layer()
+        provider = layer.dataProvider()
+        provider.truncate()
+        fields = QgsFields()
+        provider.addFeatures([
+            centerline_feature(fields, wkb, None, copy_attrs=False)
+            for _, _, wkb in task.results if wkb is not None
+        ])
+        layer.updateExtents()
+        layer.triggerRepaint()
+
+        if not refine:
+            self.launch(refine=True)
+
+    def preview_layer(self):
+        """Couche mémoire de l'aperçu, créée au premier résultat."""
+        if self.layer is None:
+            self.layer = QgsVectorLayer(
+                "MultiLineString?crs=" + self.source_layer.crs().authid(), "Aperçu des centerlines", "memory"
+            )
+            self.layer.willBeDeleted.connect(self.on_layer_deleted)
+            QgsProject.instance().addMapLayer(self.layer)
+        return self.layer
+
+    def on_layer_deleted(self):
+        self.layer = None
+
+    def close(self):
+        """Arrête l'aperçu et retire sa couche du projet."""
+        self.timer.stop()
+        self.cancel()
+        self.params = None
+        try:
+            self.iface.mapCanvas().extentsChanged.disconnect(self.on_extent_changed)
+        except TypeError:
+            pass
+        self.remove_layer()
+
+    def remove_layer(self):
+        if self.layer is not None:
+            layer, self.layer = self.layer, None
+            QgsProject.instance().removeMapLayer(layer.id())
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - fournisseur de traitements
+                                 A QGIS plugin
+ Enregistre les algorithmes du plugin dans le cadre Processing
+ ***************************************************************************/
+"""
+import os.path
+
+from qgis.PyQt.QtGui import QIcon
+from qgis.core import QgsProcessingProvider
+
+from .centerline_algorithm import PolygonCenterlineAlgorithm
+
+
+class PolygonCenterlineProvider(QgsProcessingProvider):
+    """Fournisseur Processing du plugin Polygon Centerline"""
+
+    def loadAlgorithms(self):
+        self.addAlgorithm(PolygonCenterlineAlgorithm())
+
+    def id(self):
+        return 'polygoncenterline'
+
+    def name(self):
+        return 'Polygon Centerline'
+
+    def icon(self):
+        return QIcon(os.path.join(os.path.dirname(__file__), 'icon.png'))
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - tâche de fond
+                                 A QGIS plugin
+ Génération des centerlines dans une QgsTask, répartie sur plusieurs processus
+ ***************************************************************************/
+"""
+import time
+
+from qgis.PyQt.QtCore import QVariant
+from qgis.core import (
+    Qgis, QgsFeature, QgsField, QgsFields, QgsGeometry, QgsMessageLog, QgsProject, QgsTask,
+    QgsVectorLayerFeatureSource, QgsWkbTypes
+)
+
+from .centerline_cache import CenterlineCache
+from .centerline_core import iter_centerlines
+from .centerline_output import DEFAULT_BATCH_SIZE, CenterlineOutput
+from .profiling import ProfileReport, profile_fields, profile_values
+from .width_profile import width_fields, width_values
+
+
+def polygon_wkb(geometry):
+    """
+    WKB d'une géométrie polygonale à transmettre au cœur de calcul, None
+    pour une géométrie vide ou d'un autre type. Les polygones courbes sont
+    linéarisés.
+    """
+    if geometry.isNull() or geometry.isEmpty() or geometry.type() != QgsWkbTypes.PolygonGeometry:
+        return None
+    if QgsWkbTypes.isCurvedType(geometry.wkbType()):
+        geometry = QgsGeometry(geometry.constGet().segmentize())
+    return bytes(geometry.asWkb())
+
+
+def qgs_fields(columns):
+    """QgsFields des champs (nom, type SQL REAL ou INTEGER) ajoutés aux entités de sortie."""
+    fields = QgsFields()
+    for name, sql_type in columns:
+        fields.append(QgsField(name, QVariant.Double if sql_type == "REAL" else QVariant.LongLong))
+    return fields
+
+
+def profile_qgs_fields():
+    """Champs des mesures de performance ajoutés aux entités de sortie."""
+    return qgs_fields(profile_fields())
+
+
+def width_qgs_fields():
+    """Champs de largeur (minimale, moyenne, maximale) ajoutés aux entités de sortie."""
+    return qgs_fields(width_fields())
+
+
+def output_fields(source_fields, copy_attrs, profile_attributes=False, widths=False):
+    """
+    Champs des centerlines : ceux de la couche source si copy_attrs, puis
+    ceux des mesures de performance et de la largeur s'ils sont demandés.
+    """
+    fields = QgsFields(source_fields) if copy_attrs else QgsFields()
+    if profile_attributes:
+        for field in profile_qgs_fields():
+            fields.append(field)
+    if widths:
+        for field in width_qgs_fields():
+            fields.append(field)
+    return fields
+
+
+def centerline_feature(fields, wkb, attributes, profile=None, width=None,
+                       copy_attrs=True, profile_attributes=False, widths=False):
+    """
+    Entité de sortie d'une centerline calculée (WKB), sur les champs de
+    output_fields appelé avec les mêmes options : attributs de l'entité
+    source, mesures de performance (profile) et largeur (width, voir
+    width_profile) de l'entité.
+    """
+    centerline = QgsGeometry()
+    centerline.fromWkb(wkb)
+    feature = QgsFeature(fields)
+    feature.setGeometry(centerline)
+    values = list(attributes) if copy_attrs else []
+    if profile_attributes:
+        values += profile_values(profile)
+    if widths:
+        values += width_values(width)
+    if values:
+        feature.setAttributes(values)
+    return feature
+
+
+def output_wkb_type(params):
+    """Type des centerlines : avec mesure M (largeur locale) si params["width_step"]."""
+    if params.get("width_step"):
+        return QgsWkbTypes.MultiLineStringM
+    return QgsWkbTypes.MultiLineString
+
+
+class CenterlineTask(QgsTask):
+    """
+    Génère les centerlines d'une couche de polygones en tâche de fond.
+
+    Les géométries sont envoyées aux processus de calcul sous forme de WKB ;
+    les résultats reviennent en WKB et sont écrits dans l'ordre des entités
+    au fur et à mesure de leur arrivée, par lots, dans une couche mémoire ou
+    directement dans un fichier (output_path). Avec cache_path, les
+    résultats sont lus et enregistrés dans un cache disque.
+
+    Avec params["profile"], les mesures de chaque entité sont écrites dans
+    le rapport report_path (JSON ou CSV) et, avec profile_attributes,
+    ajoutées aux attributs des centerlines.
+
+    Avec network, les centerlines des polygones adjacents sont raccordées
+    à leurs frontières communes (voir centerline_network), dans un rayon
+    network_tolerance (0 : largeur de la frontière).
+
+    Avec params["width_step"], les centerlines portent la largeur locale en
+    mesure M et ses valeurs minimale, moyenne et maximale en attributs.
+    """
+
+    def __init__(self, iface, layer, params, copy_attrs, workers=1,
+                 output_path=None, batch_size=DEFAULT_BATCH_SIZE, cache_path=None,
+                 report_path=None, profile_attributes=False, network=False, network_tolerance=0.0):
+        super().__init__("Génération des centerlines", QgsTask.CanCancel)
+        self.iface = iface
+        self.params = dict(params)
+        self.copy_attrs = copy_attrs
+        self.workers = max(1, int(workers))
+
+        # Copie thread-safe de la source, créée dans le thread principal
+        self.source = QgsVectorLayerFeatureSource(layer)
+        self.feature_count = layer.featureCount()
+
+        # Mesures de performance
+        self.report = ProfileReport() if self.params.get("profile") else None
+        self.report_path = report_path
+        self.profile_attributes = bool(profile_attributes and self.report is not None)
+
+        # Destination, alimentée depuis la tâche avant son ajout au projet
+        self.widths = bool(self.params.get("width_step"))
+        self.fields = output_fields(layer.fields(), copy_attrs, self.profile_attributes, self.widths)
+        self.output = CenterlineOutput(
+            self.fields, layer.crs(), QgsProject.instance().transformContext(),
+            output_path, batch_size, wkb_type=output_wkb_type(self.params)
+        )
+
+        self.cache = CenterlineCache(cache_path) if cache_path else None
+        self.network = network
+        self.network_tolerance = network_tolerance
+
+        self.messages = []
+        self.stats = {}
+        self.exception = None
+
+    def jobs(self):
+        """Itère sur les entités à traiter : ((fid, attributs), WKB)."""
+        for feature in self.source.getFeatures():
+            if self.isCanceled():
+                return
+            wkb = polygon_wkb(feature.geometry())
+            if wkb is None:
+                continue
+            yield (feature.id(), feature.attributes()), wkb
+
+    def write(self, fid, attributes, wkb, message, stats):
+        """Écrit une centerline dans la couche de sortie."""
+        if message:
+            self.messages.append(message)
+        profile = stats.pop("profile", None)
+        width = stats.pop("width", None)
+        for key, value in stats.items():
+            self.stats[key] = self.stats.get(key, 0) + value
+        if wkb is None:
+            if self.report is not None:
+                self.report.add(fid, profile)
+            return
+
+        start = time.perf_counter()
+        self.output.add(centerline_feature(
+            self.fields, wkb, attributes, profile, width,
+            self.copy_attrs, self.profile_attributes, self.widths
+        ))
+        if self.report is not None:
+            self.report.add(fid, profile, time.perf_counter() - start)
+
+    def run(self):
+        workers = min(self.workers, max(1, self.feature_count))
+        try:
+            if self.network:
+                # Import différé : centerline_network dépend de ce module
+                from .centerline_network import iter_network_centerlines
+                results = iter_network_centerlines(
+                    self.source, self.params, workers, self.isCanceled, self.cache,
+                    tolerance=self.network_tolerance
+                )
+            else:
+                results = iter_centerlines(self.jobs(), self.params, workers, self.isCanceled, self.cache)
+            for current, ((fid, attributes), wkb, message, stats) in enumerate(results):
+                self.write(fid, attributes, wkb, message, stats)
+                self.setProgress(100.0 * (current + 1) / max(1, self.feature_count))
+            self.output.close()
+            if self.report is not None and self.report_path:
+                self.report.write(self.report_path)
+        except Exception as e:
+            self.exception = e
+            return False
+        finally:
+            if self.cache is not None:
+                self.cache.close()
+        return not self.isCanceled()
+
+    def finished(self, result):
+        """Appelé dans le thread principal à la fin de la tâche."""
+        for message in self.messages:
+            QgsMessageLog.logMessage(message, "Centerline", Qgis.Warning)
+
+        if self.exception is not None:
+            self.iface.messageBar().pushCritical(
+                "Centerline",
+                f"Erreur lors de la génération des centerlines: {str(self.exception)}"
+            )
+            return
+
+        if not result:
+            self.iface.messageBar().pushInfo("Centerline", "Génération des centerlines annulée.")
+            return
+
+        # Si la couche est vide, sortir
+        if self.output.count == 0:
+            self.iface.messageBar().pushWarning(
+                "Centerline",
+                "Aucune centerline n'a pu être générée. Vérifiez les données d'entrée."
+            )
+            return
+
+        # Ajouter la couche au projet
+        QgsProject.instance().addMapLayer(self.output.layer())
+
+        if self.messages:
+            self.iface.messageBar().pushWarning(
+                "Centerline",
+                f"{len(self.messages)} avertissement(s) pendant le calcul, voir le journal des messages."
+            )
+        summary = f"Génération terminée. {self.output.count} centerlines créées."
+        if "network_links" in self.stats:
+            summary += f" Mode réseau : {self.stats['network_links']} raccordements."
+        if "fast_path" in self.stats or "full_path" in self.stats:
+            summary += (
+                f" Voie rapide : {self.stats.get('fast_path', 0)} entités,"
+                f" chaîne complète : {self.stats.get('full_path', 0)}."
+            )
+        if "saved_vertices" in self.stats:
+            summary += f" Densification adaptative : {self.stats['saved_vertices']} sommets économisés."
+        if self.cache is not None:
+            summary += f" Cache : {self.cache.hits} trouvées, {self.cache.misses} calculées."
+        if self.report is not None:
+            summary += " " + self.report.summary()
+        self.iface.messageBar().pushSuccess("Centerline", summary)
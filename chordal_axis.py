@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - axe cordal
+                                 A QGIS plugin
+ Axe cordal d'un polygone à partir de la triangulation de Delaunay de ses
+ sommets
+ ***************************************************************************/
+"""
+import numpy as np
+from scipy.spatial import Delaunay
+
+from .geometry_arrays import general_position, ring_neighbours
+from .profiling import NULL_PROFILER
+from .skeleton_graph import SkeletonGraph, graph_lines
+
+# Types de triangles intérieurs, selon leur nombre d'arêtes intérieures
+TERMINAL, SLEEVE, JUNCTION = 1, 2, 3
+
+# Écart relatif minimal entre la plus longue arête d'un triangle conservé et
+# la somme des deux autres : en deçà, le triangle est plat (sommets alignés
+# du contour, triangulés grâce à la perturbation des sites)
+MIN_TRIANGLE_FLATNESS = 1e-10
+
+
+def interior_triangles(sites, edges):
+    """
+    Triangulation de Delaunay des sites et masque des triangles intérieurs
+    au polygone dont edges (BoundaryEdges) décrit le contour : le centre de
+    gravité de chaque triangle est testé en un seul lot, après élimination
+    des triangles plats. Renvoie (triangulation, masque, centres de gravité).
+    """
+    local, _ = general_position(sites)
+    tri = Delaunay(local)
+    corners = sites[tri.simplices]
+    sides = np.hypot(*(corners[:, [1, 2, 0]] - corners).transpose(2, 0, 1))
+    longest = sides.max(axis=1)
+    inside = sides.sum(axis=1) - 2.0 * longest > MIN_TRIANGLE_FLATNESS * longest
+    centroids = corners.mean(axis=1)
+    inside[inside] = edges.contains_points(centroids[inside])
+    return tri, inside, centroids
+
+
+def chordal_graph(sites, edges, labels=None, profiler=NULL_PROFILER):
+    """
+    Graphe de l'axe cordal du polygone.
+
+    Les triangles intérieurs sont classés d'après leur nombre d'arêtes
+    intérieures (partagées avec un autre triangle intérieur et n'appartenant
+    pas au contour, reconnu grâce à labels, numéro d'anneau de chaque
+    site) : terminaux (1), manchons (2) et jonctions (3). L'axe relie les
+    milieux des arêtes intérieures : chaque manchon relie ses deux milieux,
+    chaque terminal ou jonction relie les siens à son centre de gravité.
+    Tout le calcul se fait sur les tableaux de la triangulation, sans boucle
+    par triangle.
+
+    Le contour doit être assez densifié pour que ses arêtes appartiennent à
+    la triangulation ; c'est le cas des contours densifiés à un intervalle
+    inférieur à la demi-largeur du polygone. Les étapes « delaunay »
+    (triangulation) et « chord_filter » (classement) sont mesurées par
+    profiler ; les compteurs ridges et kept_ridges y sont les nombres de
+    triangles et de triangles intérieurs.
+    """
+    with profiler.stage("delaunay"):
+        tri, inside, centroids = interior_triangles(sites, edges)
+    with profiler.stage("chord_filter"):
+        # Arêtes de chaque triangle (l'arête k est opposée au sommet k) et
+        # arêtes du contour d'après labels
+        corners = np.stack([np.roll(tri.simplices, -1, axis=1), np.roll(tri.simplices, -2, axis=1)], axis=2)
+        contour = np.zeros(tri.simplices.shape, dtype=bool)
+        if labels is not None:
+            contour[inside] = ring_neighbours(corners[inside].reshape(-1, 2), labels).reshape(-1, 3)
+            # Les oreilles (trois sommets consécutifs d'un anneau) ne portent
+            # pas l'axe : gardées, elles feraient de leur voisin une jonction
+            inside &= contour.sum(axis=1) < 2
+
+        # Voisins renumérotés parmi les triangles intérieurs (-1 : extérieur ou absent)
+        renumber = np.full(len(tri.simplices) + 1, -1, dtype=np.intp)
+        renumber[np.flatnonzero(inside)] = np.arange(np.count_nonzero(inside))
+        neighbours = renumber[tri.neighbors[inside]]
+        simplices, corners, centroids = tri.simplices[inside], corners[inside], centroids[inside]
+        internal = (neighbours >= 0) & ~contour[inside]
+        kinds = internal.sum(axis=1)
+
+        # Identifiant unique de chaque arête intérieure (partagée par deux triangles)
+        pairs = np.sort(corners[internal], axis=1)
+        keys, edge_ids = np.unique(pairs, axis=0, return_inverse=True)
+        edge_ids = edge_ids.reshape(-1)
+        midpoints = sites[keys].mean(axis=1)
+
+        slots = np.full(simplices.shape, -1, dtype=np.intp)
+        slots[internal] = edge_ids
+
+        # Manchons : segment entre les milieux de leurs deux arêtes intérieures
+        sleeves = np.sort(slots[kinds == SLEEVE], axis=1)[:, 1:]
+
+        # Terminaux et jonctions : milieux reliés au centre de gravité
+        hubs = np.flatnonzero((kinds == TERMINAL) | (kinds == JUNCTION))
+        hub_ids = len(midpoints) + np.arange(len(hubs))
+        hub_slots = slots[hubs]
+        spokes = np.column_stack([
+            np.broadcast_to(hub_ids[:, None], hub_slots.shape)[hub_slots >= 0],
+            hub_slots[hub_slots >= 0]
+        ])
+
+        coords = np.concatenate([midpoints, centroids[hubs]])
+        segments = np.concatenate([sleeves, spokes])
+
+    profiler.count("sites", len(sites))
+    profiler.count("ridges", len(tri.simplices))
+    profiler.count("kept_ridges", len(simplices))
+    return SkeletonGraph(coords, segments)
+
+
+def chordal_lines(shape, params, profiler=NULL_PROFILER):
+    """
+    Centerline par l'axe cordal de la triangulation de Delaunay des sommets
+    (voir chordal_axis). Une seule triangulation suffit, là où le squelette
+    de Voronoï teste chacun de ses segments contre le contour : la méthode
+    est plus rapide et son réseau plus régulier aux jonctions. Comme pour
+    voronoi_lines, tout le réseau est renvoyé s'il doit être élagué ou
+    conservé.
+    """
+    points, labels = shape.sites(distinct=True)
+    if len(points) < 3:
+        return []
+    return graph_lines(chordal_graph(points, shape.edges, labels, profiler), params)
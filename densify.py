@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - densification
+                                 A QGIS plugin
+ Densification uniforme ou adaptative des anneaux d'un polygone
+ ***************************************************************************/
+"""
+import math
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Rapport entre l'intervalle de sondage de la largeur et l'intervalle minimal
+PROBE_FACTOR = 4.0
+
+# Nombre de voisins examinés pour trouver la rive opposée
+PROBE_NEIGHBOURS = 32
+
+# Un voisin est sur la rive opposée si la distance le long du contour
+# dépasse OPPOSITE_RATIO fois la distance euclidienne
+OPPOSITE_RATIO = 2.0
+
+
+def _edge_lengths(ring):
+    delta = np.diff(ring, axis=0)
+    return np.hypot(delta[:, 0], delta[:, 1])
+
+
+def _subdivide(ring, counts):
+    """
+    Découpe chaque arête i de l'anneau en counts[i] segments égaux. Renvoie
+    l'anneau fermé densifié et l'indice de l'arête d'origine de chaque point.
+    """
+    starts = ring[:-1]
+    delta = ring[1:] - starts
+    owner = np.repeat(np.arange(len(starts)), counts)
+    step = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    t = (step / np.repeat(counts, counts))[:, None]
+    points = starts[owner] + t * delta[owner]
+    return np.vstack([points, ring[:1]]), owner
+
+
+def uniform_vertex_count(rings, interval):
+    """Nombre de sommets produits par une densification uniforme à interval."""
+    return int(sum(
+        np.maximum(1, np.ceil(_edge_lengths(ring) / interval)).sum() + 1
+        for ring in rings
+    ))
+
+
+def densify_rings(rings, interval):
+    """Densification uniforme : aucun segment ne dépasse interval."""
+    return [
+        _subdivide(ring, np.maximum(1, np.ceil(_edge_lengths(ring) / interval)).astype(np.intp))[0]
+        for ring in rings
+    ]
+
+
+def local_widths(rings, probe_interval):
+    """
+    Estime la largeur locale du polygone le long de chaque arête.
+
+    Le contour est échantillonné à probe_interval ; pour chaque échantillon,
+    la rive opposée est le plus proche voisin (cKDTree) situé sur un autre
+    anneau ou suffisamment loin le long du contour. Renvoie, pour chaque
+    anneau, la largeur minimale observée sur chacune de ses arêtes.
+    """
+    probes, owners, ring_ids, arc, perimeters = [], [], [], [], []
+    for ring_id, ring in enumerate(rings):
+        lengths = _edge_lengths(ring)
+        counts = np.maximum(1, np.ceil(lengths / probe_interval)).astype(np.intp)
+        points, owner = _subdivide(ring, counts)
+        points = points[:-1]
+        cumulative = np.concatenate([[0.0], np.cumsum(lengths)])
+        offset = np.hypot(*(points - ring[owner]).T)
+        probes.append(points)
+        owners.append(owner)
+        ring_ids.append(np.full(len(points), ring_id))
+        arc.append(cumulative[owner] + offset)
+        perimeters.append(cumulative[-1])
+
+    points = np.concatenate(probes)
+    ring_ids = np.concatenate(ring_ids)
+    arc = np.concatenate(arc)
+    perimeters = np.asarray(perimeters)
+
+    k = min(PROBE_NEIGHBOURS, len(points))
+    distances, neighbours = cKDTree(points).query(points, k=k)
+    distances = distances.reshape(len(points), -1)
+    neighbours = neighbours.reshape(len(points), -1)
+
+    # Distance le long du contour entre chaque échantillon et ses voisins
+    same_ring = ring_ids[neighbours] == ring_ids[:, None]
+    along = np.abs(arc[neighbours] - arc[:, None])
+    along = np.minimum(along, perimeters[ring_ids][:, None] - along)
+    opposite = ~same_ring | (along > OPPOSITE_RATIO * distances)
+    opposite[:, 0] = False  # Le point lui-même
+
+    # À défaut de rive opposée parmi les voisins, la largeur dépasse le plus lointain
+    first = np.where(opposite.any(axis=1), opposite.argmax(axis=1), k - 1)
+    width = distances[np.arange(len(points)), first]
+
+    result = []
+    start = 0
+    for ring, owner in zip(rings, owners):
+        edge_width = np.full(len(ring) - 1, np.inf)
+        np.minimum.at(edge_width, owner, width[start:start + len(owner)])
+        result.append(edge_width)
+        start += len(owner)
+    return result
+
+
+def turning_angles(ring):
+    """Angle de changement de direction (radians) à chaque sommet de l'anneau fermé."""
+    delta = np.diff(ring, axis=0)
+    incoming = np.roll(delta, 1, axis=0)
+    cross = incoming[:, 0] * delta[:, 1] - incoming[:, 1] * delta[:, 0]
+    dot = (incoming * delta).sum(axis=1)
+    return np.abs(np.arctan2(cross, dot))
+
+
+def adaptive_densify(rings, interval, max_interval=None, width_ratio=0.5):
+    """
+    Densification adaptative des anneaux.
+
+    L'intervalle de chaque arête vaut width_ratio fois la largeur locale
+    (distance à la rive opposée), borné par [interval, max_interval], puis
+    réduit aux sommets où le contour tourne fortement : les rives droites et
+    larges restent peu denses, les méandres et les passages étroits reçoivent
+    la densité maximale.
+
+    Renvoie (anneaux densifiés, nombre de sommets économisés par rapport à
+    une densification uniforme à interval).
+    """
+    if max_interval is None or max_interval <= interval:
+        max_interval = interval * 10.0
+
+    widths = local_widths(rings, interval * PROBE_FACTOR)
+
+    densified = []
+    for ring, width in zip(rings, widths):
+        spacing = np.clip(width_ratio * width, interval, max_interval)
+
+        # Resserrer les arêtes adjacentes aux virages marqués
+        angle = turning_angles(ring)
+        factor = np.clip(1.0 - angle / math.pi, 0.25, 1.0)
+        spacing = np.maximum(interval, spacing * np.minimum(factor, np.roll(factor, -1)))
+
+        counts = np.maximum(1, np.ceil(_edge_lengths(ring) / spacing)).astype(np.intp)
+        densified.append(_subdivide(ring, counts)[0])
+
+    saved = uniform_vertex_count(rings, interval) - sum(len(ring) for ring in densified)
+    return densified, saved
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - opérations géométriques vectorisées
+                                 A QGIS plugin
+ Tests géométriques en lot sur des tableaux de coordonnées NumPy
+ ***************************************************************************/
+"""
+import numpy as np
+from scipy.spatial import ConvexHull, cKDTree
+
+from .wkb_io import decode_polygons
+
+# Nombre maximal de couples (point, arête) évalués en une seule passe NumPy
+MAX_PAIRS_PER_CHUNK = 2000000
+
+# Nombre d'orientations évaluées ensemble pour le rectangle orienté minimal
+RECTANGLE_CHUNK = 256
+
+# Perturbation des sites avant Qhull (Voronoï, Delaunay), relative à leur
+# étendue. Les contours densifiés alignent des sites régulièrement espacés,
+# cocirculaires par groupes, que Qhull traite sinon par fusions de facettes
+# en temps quasi quadratique.
+SITE_JITTER = 1e-7
+
+# Espacement minimal, relatif à l'étendue, entre deux sites consécutifs d'un
+# anneau : plus proches, ils sont confondus pour Qhull une fois perturbés
+MIN_SITE_SPACING = 10 * SITE_JITTER
+
+
+def geometry_polygons(geometry):
+    """
+    Extrait les parties d'une géométrie polygonale : une liste de polygones,
+    chacun étant une liste d'anneaux (extérieur puis trous) sous forme de
+    tableaux NumPy (N, 2) fermés, décodés directement depuis le WKB.
+    """
+    try:
+        return decode_polygons(geometry.asWkb())
+    except ValueError:
+        # Polygones courbes : linéarisation préalable
+        return decode_polygons(geometry.constGet().segmentize().asWkb())
+
+
+def geometry_rings(geometry):
+    """
+    Extrait tous les anneaux (extérieurs et trous) de toutes les parties
+    d'une géométrie polygonale sous forme de tableaux NumPy (N, 2) fermés.
+    """
+    return [ring for polygon in geometry_polygons(geometry) for ring in polygon]
+
+
+class PolygonRings:
+    """
+    Anneaux de toutes les parties d'une géométrie polygonale (extérieurs et
+    trous), extraits une seule fois et partagés par toutes les étapes du
+    calcul. Chaque anneau est un tableau NumPy (N, 2) fermé ; part_ids et
+    holes donnent, pour chaque anneau, sa partie et s'il s'agit d'un trou.
+    """
+
+    def __init__(self, polygons):
+        self.polygons = polygons
+        self.rings = [ring for polygon in polygons for ring in polygon]
+        self.part_ids = np.array(
+            [part for part, polygon in enumerate(polygons) for _ in polygon], dtype=np.intp
+        )
+        self.holes = np.array(
+            [index > 0 for polygon in polygons for index in range(len(polygon))], dtype=bool
+        )
+        self._edges = None
+
+    @classmethod
+    def from_geometry(cls, geometry):
+        return cls(geometry_polygons(geometry))
+
+    def with_rings(self, rings):
+        """Même structure (parties, trous) avec de nouveaux anneaux, par exemple densifiés."""
+        rings = iter(rings)
+        return PolygonRings([[next(rings) for _ in polygon] for polygon in self.polygons])
+
+    def __len__(self):
+        return len(self.rings)
+
+    @property
+    def edges(self):
+        """Arêtes du contour (BoundaryEdges), construites à la demande."""
+        if self._edges is None:
+            self._edges = BoundaryEdges(self.rings)
+        return self._edges
+
+    def sites(self, distinct=False):
+        """
+        Sommets de tous les anneaux (sans le point de fermeture), à la suite
+        les uns des autres, et numéro d'anneau de chacun. Avec distinct, les
+        sommets plus proches que MIN_SITE_SPACING (relatif à l'étendue) du
+        précédent sont écartés, sauf à laisser moins de trois sommets à leur
+        anneau.
+        """
+        if not self.rings:
+            return np.zeros((0, 2)), np.zeros(0, dtype=np.intp)
+        sizes = [len(ring) - 1 for ring in self.rings]
+        points = np.concatenate([ring[:-1] for ring in self.rings])
+        labels = np.repeat(np.arange(len(self.rings)), sizes)
+        if not distinct:
+            return points, labels
+
+        tolerance = MIN_SITE_SPACING * max(float(np.ptp(points, axis=0).max()), 1.0)
+        keep = np.concatenate([
+            np.hypot(*(ring[:-1] - np.roll(ring[:-1], 1, axis=0)).T) >= tolerance for ring in self.rings
+        ])
+        counts = np.bincount(labels[keep], minlength=len(self.rings))
+        keep |= counts[labels] < 3
+        return points[keep], labels[keep]
+
+
+def ring_neighbours(pairs, labels):
+    """
+    Indique pour chaque couple de sites (indices dans le tableau de
+    PolygonRings.sites) s'il s'agit de deux sommets consécutifs d'un même
+    anneau, c'est-à-dire des extrémités d'une même arête du contour.
+    """
+    pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+    sizes = np.bincount(labels)
+    a, b = pairs[:, 0], pairs[:, 1]
+    gap = np.abs(a - b)
+    return (labels[a] == labels[b]) & ((gap == 1) | (gap == sizes[labels[a]] - 1))
+
+
+def polygon_edges(rings):
+    """
+    Renvoie les extrémités (départ, arrivée) de toutes les arêtes des anneaux.
+    Les anneaux sont supposés fermés (premier point égal au dernier).
+    """
+    starts = np.concatenate([ring[:-1] for ring in rings])
+    ends = np.concatenate([ring[1:] for ring in rings])
+    return starts, ends
+
+
+def principal_axis(points):
+    """Centre et direction unitaire de l'axe principal (ACP) d'un nuage de points."""
+    center = points.mean(axis=0)
+    covariance = np.cov((points - center).T)
+    values, vectors = np.linalg.eigh(covariance)
+    return center, vectors[:, np.argmax(values)]
+
+
+def jitter_scale(points):
+    """Amplitude de la perturbation des sites (voir general_position)."""
+    if len(points) == 0:
+        return 0.0
+    return SITE_JITTER * max(float(np.ptp(points, axis=0).max()), 1.0)
+
+
+def general_position(points, scale=None):
+    """
+    Sites préparés pour Qhull : chacun est déplacé de scale (par défaut
+    jitter_scale) dans une direction tirée de ses coordonnées, de sorte qu'un
+    même site soit déplacé de la même façon d'une tuile à l'autre, puis
+    recentrés sur leur moyenne pour la précision du calcul. Renvoie
+    (sites, origine).
+    """
+    points = np.asarray(points, dtype=float)
+    if scale is None:
+        scale = jitter_scale(points)
+    seed = np.sin(points[:, 0] * 12.9898 + points[:, 1] * 78.233) * 43758.5453
+    angle = (seed - np.floor(seed)) * (2.0 * np.pi)
+    jittered = points + scale * np.column_stack([np.cos(angle), np.sin(angle)])
+    origin = jittered.mean(axis=0)
+    return jittered - origin, origin
+
+
+def ring_area(ring):
+    """Aire (valeur absolue, formule du lacet) d'un anneau fermé (N, 2)."""
+    x, y = ring[:-1, 0], ring[:-1, 1]
+    x_next, y_next = ring[1:, 0], ring[1:, 1]
+    return abs(float(np.sum(x * y_next - x_next * y))) / 2.0
+
+
+def minimum_rectangle(points):
+    """
+    Rectangle orienté d'aire minimale contenant les points (pieds à
+    coulisse : un côté porte une arête de l'enveloppe convexe). Renvoie
+    (centre, direction unitaire du grand côté, longueur, largeur, aire de
+    l'enveloppe convexe).
+    """
+    hull = ConvexHull(points)
+    vertices = points[hull.vertices]
+    edges = np.roll(vertices, -1, axis=0) - vertices
+    directions = edges / np.hypot(edges[:, 0], edges[:, 1])[:, None]
+    directions = directions[np.isfinite(directions).all(axis=1)]
+
+    best = None
+    for first in range(0, len(directions), RECTANGLE_CHUNK):
+        u = directions[first:first + RECTANGLE_CHUNK]
+        along = vertices @ u.T
+        across = vertices @ np.column_stack([-u[:, 1], u[:, 0]]).T
+        extent_u = along.max(axis=0) - along.min(axis=0)
+        extent_v = across.max(axis=0) - across.min(axis=0)
+        k = int(np.argmin(extent_u * extent_v))
+        if best is None or extent_u[k] * extent_v[k] < best[0]:
+            mid_u = (along[:, k].max() + along[:, k].min()) / 2.0
+            mid_v = (across[:, k].max() + across[:, k].min()) / 2.0
+            best = (extent_u[k] * extent_v[k], u[k], extent_u[k], extent_v[k], mid_u, mid_v)
+
+    _, u, extent_u, extent_v, mid_u, mid_v = best
+    v = np.array([-u[1], u[0]])
+    center = mid_u * u + mid_v * v
+    if extent_v > extent_u:
+        u, extent_u, extent_v = v, extent_v, extent_u
+    # En 2D, ConvexHull.volume est l'aire de l'enveloppe
+    return center, u, float(extent_u), float(extent_v), float(hull.volume)
+
+
+def expand_ranges(starts, counts):
+    """
+    Développe des intervalles [start, start + count) en deux tableaux plats :
+    l'indice de l'intervalle propriétaire et la position dans la plage.
+    """
+    total = int(counts.sum())
+    owners = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owners, np.repeat(starts, counts) + offsets
+
+
+def _chunk_bounds(counts, max_pairs):
+    """Découpe une suite de comptes en tranches d'environ max_pairs couples."""
+    cumulative = np.cumsum(counts)
+    bounds = [0]
+    while bounds[-1] < len(counts):
+        start_total = cumulative[bounds[-1] - 1] if bounds[-1] > 0 else 0
+        stop = int(np.searchsorted(cumulative, start_total + max_pairs, side='right'))
+        bounds.append(max(stop, bounds[-1] + 1))
+    return zip(bounds[:-1], bounds[1:])
+
+
+def points_in_polygon(points, starts, ends, max_pairs=MAX_PAIRS_PER_CHUNK):
+    """
+    Test point-dans-polygone (règle pair-impair) pour tous les points à la fois.
+
+    Les points sont triés selon Y : pour chaque arête, les points dont
+    l'ordonnée tombe dans [ymin, ymax) forment une plage contiguë trouvée par
+    recherche dichotomique. Le nombre de couples évalués est donc de l'ordre
+    de (nombre de points x nombre de traversées d'une horizontale), et non
+    de (nombre de points x nombre d'arêtes).
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) == 0:
+        return np.zeros(0, dtype=bool)
+
+    order = np.argsort(points[:, 1], kind='stable')
+    xs = points[order, 0]
+    ys = points[order, 1]
+
+    x0, y0 = starts[:, 0], starts[:, 1]
+    x1, y1 = ends[:, 0], ends[:, 1]
+
+    # Les arêtes horizontales ne coupent jamais le rayon
+    lo = np.searchsorted(ys, np.minimum(y0, y1), side='left')
+    hi = np.searchsorted(ys, np.maximum(y0, y1), side='left')
+    counts = hi - lo
+
+    crossings = np.zeros(len(points), dtype=np.int64)
+    for first, last in _chunk_bounds(counts, max_pairs):
+        edge_idx, point_idx = expand_ranges(lo[first:last], counts[first:last])
+        if len(point_idx) == 0:
+            continue
+        edge_idx += first
+
+        py = ys[point_idx]
+        ex0, ey0 = x0[edge_idx], y0[edge_idx]
+        x_cross = ex0 + (py - ey0) * (x1[edge_idx] - ex0) / (y1[edge_idx] - ey0)
+        hits = point_idx[xs[point_idx] < x_cross]
+        crossings += np.bincount(hits, minlength=len(points))
+
+    inside = np.empty(len(points), dtype=bool)
+    inside[order] = (crossings % 2) == 1
+    return inside
+
+
+def _orientation(ax, ay, bx, by, cx, cy):
+    """Signe du produit vectoriel (b - a) x (c - a)."""
+    return (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+
+
+def segments_cross_edges(seg_starts, seg_ends, starts, ends, max_pairs=MAX_PAIRS_PER_CHUNK, tree=None):
+    """
+    Indique pour chaque segment s'il traverse (intersection propre) au moins
+    une arête du contour.
+
+    Les arêtes candidates sont celles dont le milieu se trouve à moins de
+    (demi-longueur du segment + demi-longueur maximale d'une arête) du milieu
+    du segment : aucune intersection ne peut exister au-delà. La recherche se
+    fait dans un cKDTree (construit sur les milieux des arêtes s'il n'est pas
+    fourni), puis le test d'orientation est évalué en bloc.
+    """
+    seg_starts = np.asarray(seg_starts, dtype=float)
+    seg_ends = np.asarray(seg_ends, dtype=float)
+    result = np.zeros(len(seg_starts), dtype=bool)
+    if len(seg_starts) == 0 or len(starts) == 0:
+        return result
+
+    edge_half = np.hypot(*(ends - starts).T).max() * 0.5
+    if tree is None:
+        tree = cKDTree((starts + ends) * 0.5)
+
+    seg_mid = (seg_starts + seg_ends) * 0.5
+    radius = np.hypot(*(seg_ends - seg_starts).T) * 0.5 + edge_half
+    radius *= 1.0 + 1e-9
+
+    # Taille de tranche estimée d'après une densité moyenne de candidats
+    step = max(1, int(max_pairs // 64))
+    for first in range(0, len(seg_starts), step):
+        last = min(first + step, len(seg_starts))
+        neighbours = tree.query_ball_point(seg_mid[first:last], radius[first:last])
+        counts = np.fromiter((len(n) for n in neighbours), dtype=np.intp, count=last - first)
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        seg_idx = np.repeat(np.arange(first, last), counts)
+        edge_idx = np.fromiter((i for n in neighbours for i in n), dtype=np.intp, count=total)
+
+        ax, ay = seg_starts[seg_idx, 0], seg_starts[seg_idx, 1]
+        bx, by = seg_ends[seg_idx, 0], seg_ends[seg_idx, 1]
+        cx, cy = starts[edge_idx, 0], starts[edge_idx, 1]
+        dx, dy = ends[edge_idx, 0], ends[edge_idx, 1]
+
+        d1 = _orientation(ax, ay, bx, by, cx, cy)
+        d2 = _orientation(ax, ay, bx, by, dx, dy)
+        d3 = _orientation(cx, cy, dx, dy, ax, ay)
+        d4 = _orientation(cx, cy, dx, dy, bx, by)
+        crossing = (d1 * d2 < 0) & (d3 * d4 < 0)
+        result[seg_idx[crossing]] = True
+
+    return result
+
+
+class BoundaryEdges:
+    """
+    Arêtes du contour d'un polygone (tous anneaux confondus). L'index spatial
+    des arêtes n'est construit qu'une fois, à la première utilisation, et
+    partagé entre les appels successifs (par exemple d'une tuile à l'autre).
+    """
+
+    def __init__(self, rings):
+        self.starts, self.ends = polygon_edges(rings)
+        self._tree = None
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            self._tree = cKDTree((self.starts + self.ends) * 0.5)
+        return self._tree
+
+    def contains_points(self, points):
+        """Test point-dans-polygone en lot."""
+        return points_in_polygon(points, self.starts, self.ends)
+
+    def interior_segments(self, vertices, segments):
+        """
+        Filtre en lot les segments (paires d'indices dans vertices)
+        entièrement contenus dans le polygone.
+
+        Équivalent au test QgsGeometry.contains(segment) : les deux extrémités
+        doivent être à l'intérieur et le segment ne doit traverser aucune
+        arête. Renvoie un masque booléen aligné sur segments.
+        """
+        vertices = np.asarray(vertices, dtype=float)
+        segments = np.asarray(segments, dtype=np.intp).reshape(-1, 2)
+        if len(segments) == 0 or len(self) == 0:
+            return np.zeros(len(segments), dtype=bool)
+
+        # Test point-dans-polygone sur les seuls sommets utilisés
+        used = np.unique(segments)
+        inside = np.zeros(len(vertices), dtype=bool)
+        inside[used] = self.contains_points(vertices[used])
+
+        mask = inside[segments].all(axis=1)
+        candidates = np.flatnonzero(mask)
+
+        # Rejeter les segments qui sortent puis rentrent dans le polygone
+        crossing = segments_cross_edges(
+            vertices[segments[candidates, 0]],
+            vertices[segments[candidates, 1]],
+            self.starts, self.ends, tree=self.tree
+        )
+        mask[candidates[crossing]] = False
+        return mask
+
+
+def interior_segments(vertices, segments, rings):
+    """
+    Filtre en lot les segments (paires d'indices dans vertices) entièrement
+    contenus dans le polygone décrit par rings. Voir
+    BoundaryEdges.interior_segments.
+    """
+    segments = np.asarray(segments, dtype=np.intp).reshape(-1, 2)
+    if not rings:
+        return np.zeros(len(segments), dtype=bool)
+    return BoundaryEdges(rings).interior_segments(vertices, segments)
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - lecture et écriture GeoPackage
+                                 A QGIS plugin
+ Accès direct aux couches GeoPackage par sqlite3, sans GDAL ni QGIS
+ ***************************************************************************/
+"""
+import os
+import sqlite3
+import struct
+
+import numpy as np
+
+from .wkb_io import decode_lines, encode_multilinestring
+
+GPKG_APPLICATION_ID = 0x47504B47
+GPKG_USER_VERSION = 10300
+
+# Taille (octets) de l'emprise selon le code du champ « envelope » de l'en-tête
+ENVELOPE_SIZES = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Systèmes de référence exigés par la spécification
+REQUIRED_SRS = [
+    ("Undefined cartesian SRS", -1, "NONE", -1, "undefined", "undefined cartesian coordinate reference system"),
+    ("Undefined geographic SRS", 0, "NONE", 0, "undefined", "undefined geographic coordinate reference system"),
+]
+
+CORE_TABLES = [
+    """CREATE TABLE IF NOT EXISTS gpkg_spatial_ref_sys (
+        srs_name TEXT NOT NULL, srs_id INTEGER NOT NULL PRIMARY KEY,
+        organization TEXT NOT NULL, organization_coordsys_id INTEGER NOT NULL,
+        definition TEXT NOT NULL, description TEXT)""",
+    """CREATE TABLE IF NOT EXISTS gpkg_contents (
+        table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL,
+        identifier TEXT UNIQUE, description TEXT DEFAULT '',
+        last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+        min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, srs_id INTEGER,
+        CONSTRAINT fk_gc_r_srs_id FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id))""",
+    """CREATE TABLE IF NOT EXISTS gpkg_geometry_columns (
+        table_name TEXT NOT NULL, column_name TEXT NOT NULL,
+        geometry_type_name TEXT NOT NULL, srs_id INTEGER NOT NULL,
+        z TINYINT NOT NULL, m TINYINT NOT NULL,
+        CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name),
+        CONSTRAINT fk_gc_tn FOREIGN KEY (table_name) REFERENCES gpkg_contents(table_name),
+        CONSTRAINT fk_gc_srs FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id))""",
+]
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def gpkg_to_wkb(blob):
+    """WKB contenu dans une géométrie GeoPackage, None si elle est vide."""
+    if blob is None:
+        return None
+    blob = bytes(blob)
+    if blob[:2] != b"GP":
+        raise ValueError("En-tête de géométrie GeoPackage invalide")
+    flags = blob[3]
+    if flags & 0x10:
+        return None
+    envelope = ENVELOPE_SIZES.get((flags >> 1) & 0x07)
+    if envelope is None:
+        raise ValueError("Emprise de géométrie GeoPackage invalide")
+    return blob[8 + envelope:]
+
+
+def wkb_to_gpkg(wkb, srs_id, bounds):
+    """Géométrie GeoPackage (petit-boutiste, emprise XY) à partir de WKB."""
+    header = struct.pack("<2sBBi", b"GP", 0, 0x01 | (1 << 1), srs_id)
+    min_x, min_y, max_x, max_y = bounds
+    return header + struct.pack("<4d", min_x, max_x, min_y, max_y) + wkb
+
+
+class GeoPackageReader:
+    """
+    Lecture d'une couche vectorielle d'un GeoPackage : identifiant,
+    attributs et WKB de chaque entité. Avec shard = (i, n), seules les
+    entités dont l'identifiant vaut i modulo n sont lues, ce qui permet de
+    répartir une couche entre plusieurs machines.
+    """
+
+    def __init__(self, path, layer=None, shard=None):
+        if not os.path.isfile(path):
+            raise OSError(f"Fichier introuvable : {path}")
+        self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        self.shard = shard
+
+        rows = self.connection.execute(
+            "SELECT c.table_name, g.column_name, g.srs_id FROM gpkg_contents c"
+            " JOIN gpkg_geometry_columns g ON g.table_name = c.table_name"
+            " WHERE c.data_type = 'features'"
+        ).fetchall()
+        if layer is not None:
+            rows = [row for row in rows if row[0] == layer]
+        if not rows:
+            raise ValueError(f"Couche introuvable dans {path}: {layer or '(aucune couche vectorielle)'}")
+        self.layer, self.geometry_column, self.srs_id = rows[0]
+
+        info = self.connection.execute(f"PRAGMA table_info({_quote(self.layer)})").fetchall()
+        self.fid_column = next((name for _, name, _, _, _, pk in info if pk == 1), "rowid")
+        self.columns = [
+            (name, column_type) for _, name, column_type, _, _, pk in info
+            if pk != 1 and name != self.geometry_column
+        ]
+
+    def srs(self):
+        """Ligne de gpkg_spatial_ref_sys du système de référence de la couche."""
+        return self.connection.execute(
+            "SELECT srs_name, srs_id, organization, organization_coordsys_id, definition, description"
+            " FROM gpkg_spatial_ref_sys WHERE srs_id = ?", (self.srs_id,)
+        ).fetchone()
+
+    def _where(self):
+        if self.shard is None:
+            return "", ()
+        index, count = self.shard
+        return f" WHERE {_quote(self.fid_column)} % ? = ?", (count, index)
+
+    def count(self):
+        where, args = self._where()
+        return self.connection.execute(f"SELECT COUNT(*) FROM {_quote(self.layer)}" + where, args).fetchone()[0]
+
+    def features(self):
+        """Itère sur (identifiant, attributs, WKB) ; les géométries vides sont ignorées."""
+        names = [self.fid_column, self.geometry_column] + [name for name, _ in self.columns]
+        where, args = self._where()
+        cursor = self.connection.execute(
+            f"SELECT {', '.join(_quote(name) for name in names)} FROM {_quote(self.layer)}" + where, args
+        )
+        for row in cursor:
+            wkb = gpkg_to_wkb(row[1])
+            if wkb is not None:
+                yield row[0], row[2:], wkb
+
+    def close(self):
+        self.connection.close()
+
+
+class GeoPackageWriter:
+    """
+    Écriture d'une couche MultiLineString dans un GeoPackage (créé au
+    besoin ; une couche de même nom est remplacée). Les entités sont
+    insérées par lots de batch_size dans une transaction unique, validée à
+    la fermeture. Avec measures, les géométries portent une mesure M.
+    """
+
+    def __init__(self, path, layer, srs=None, columns=(), batch_size=DEFAULT_BATCH_SIZE, measures=False):
+        self.connection = sqlite3.connect(path)
+        self.layer = layer
+        self.columns = list(columns)
+        self.measures = measures
+        self.srs_id = srs[1] if srs else -1
+        self.batch_size = max(1, int(batch_size))
+        self.buffer = []
+        self.count = 0
+        self.bounds = [np.inf, np.inf, -np.inf, -np.inf]
+
+        connection = self.connection
+        connection.execute(f"PRAGMA application_id = {GPKG_APPLICATION_ID}")
+        connection.execute(f"PRAGMA user_version = {GPKG_USER_VERSION}")
+        for statement in CORE_TABLES:
+            connection.execute(statement)
+        connection.executemany("INSERT OR IGNORE INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)", REQUIRED_SRS)
+        if srs:
+            connection.execute("INSERT OR IGNORE INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)", srs)
+
+        table = _quote(layer)
+        connection.execute(f"DROP TABLE IF EXISTS {table}")
+        connection.execute("DELETE FROM gpkg_geometry_columns WHERE table_name = ?", (layer,))
+        connection.execute("DELETE FROM gpkg_contents WHERE table_name = ?", (layer,))
+        definitions = ["fid INTEGER PRIMARY KEY AUTOINCREMENT", "geom MULTILINESTRING"]
+        definitions += [f"{_quote(name)} {column_type}" for name, column_type in self.columns]
+        connection.execute(f"CREATE TABLE {table} ({', '.join(definitions)})")
+        connection.execute(
+            "INSERT INTO gpkg_contents (table_name, data_type, identifier, srs_id) VALUES (?, 'features', ?, ?)",
+            (layer, layer, self.srs_id)
+        )
+        connection.execute(
+            "INSERT INTO gpkg_geometry_columns VALUES (?, 'geom', 'MULTILINESTRING', ?, 0, ?)",
+            (layer, self.srs_id, int(measures))
+        )
+
+        names = ["geom"] + [name for name, _ in self.columns]
+        self.insert = (
+            f"INSERT INTO {table} ({', '.join(_quote(name) for name in names)})"
+            f" VALUES ({', '.join('?' * len(names))})"
+        )
+
+    def add(self, wkb, attributes=()):
+        """Ajoute une centerline (WKB LineString ou MultiLineString, avec M si measures)."""
+        lines = decode_lines(wkb, self.measures)
+        points = np.concatenate(lines)[:, :2]
+        low, high = points.min(axis=0), points.max(axis=0)
+        bounds = (low[0], low[1], high[0], high[1])
+        self.bounds = [
+            min(self.bounds[0], bounds[0]), min(self.bounds[1], bounds[1]),
+            max(self.bounds[2], bounds[2]), max(self.bounds[3], bounds[3]),
+        ]
+        blob = wkb_to_gpkg(encode_multilinestring(lines), self.srs_id, bounds)
+        self.buffer.append((blob,) + tuple(attributes))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Écrit le lot en attente."""
+        if self.buffer:
+            self.connection.executemany(self.insert, self.buffer)
+            self.count += len(self.buffer)
+            self.buffer = []
+
+    def close(self):
+        """Écrit le dernier lot, met à jour l'emprise de la couche et valide."""
+        self.flush()
+        if self.count:
+            self.connection.execute(
+                "UPDATE gpkg_contents SET min_x = ?, min_y = ?, max_x = ?, max_y = ? WHERE table_name = ?",
+                tuple(float(v) for v in self.bounds) + (self.layer,)
+            )
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - simplification et lissage
+                                 A QGIS plugin
+ Post-traitement en lot des centerlines sur des tableaux de coordonnées NumPy
+ ***************************************************************************/
+"""
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+SIMPLIFY_METHODS = ("DOUGLAS_PEUCKER", "VISVALINGAM")
+
+
+def pack_lines(lines):
+    """
+    Regroupe des polylignes (N, k) en un seul tableau de sommets et le
+    tableau offsets de leurs bornes : la ligne i occupe les sommets
+    offsets[i] à offsets[i + 1] - 1. Les lignes peuvent provenir de
+    plusieurs entités ; chaque opération de ce module les traite toutes
+    en une passe.
+    """
+    lines = [np.asarray(line, dtype=float) for line in lines]
+    offsets = np.zeros(len(lines) + 1, dtype=np.intp)
+    np.cumsum([len(line) for line in lines], out=offsets[1:])
+    return np.concatenate(lines), offsets
+
+
+def unpack_lines(points, offsets):
+    """Inverse de pack_lines : liste des polylignes."""
+    return np.split(points, offsets[1:-1])
+
+
+def compress_lines(points, offsets, keep):
+    """Ne conserve que les sommets du masque keep et recalcule les bornes des lignes."""
+    counts = np.add.reduceat(keep.astype(np.intp), offsets[:-1])
+    new_offsets = np.zeros_like(offsets)
+    np.cumsum(counts, out=new_offsets[1:])
+    return points[keep], new_offsets
+
+
+def _endpoint_mask(points, offsets):
+    """Masque des extrémités des lignes, toujours conservées."""
+    mask = np.zeros(len(points), dtype=bool)
+    mask[offsets[:-1]] = True
+    mask[offsets[1:] - 1] = True
+    return mask
+
+
+def douglas_peucker(points, offsets, tolerance):
+    """
+    Masque des sommets conservés par l'algorithme de Douglas-Peucker.
+
+    Les intervalles à examiner de toutes les lignes sont traités ensemble :
+    chaque passe calcule en bloc la distance de leurs points intermédiaires
+    au segment qui les sous-tend, puis coupe au point le plus éloigné les
+    intervalles dont l'écart dépasse tolerance. Le nombre de passes est la
+    profondeur de la récursion, et non le nombre de lignes.
+    """
+    xy = points[:, :2]
+    keep = _endpoint_mask(points, offsets)
+    first, last = offsets[:-1], offsets[1:] - 1
+    while True:
+        active = last - first >= 2
+        first, last = first[active], last[active]
+        if not len(first):
+            return keep
+
+        # Points intermédiaires de tous les intervalles, intervalle par intervalle
+        counts = last - first - 1
+        interval = np.repeat(np.arange(len(first)), counts)
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+        index = np.arange(bounds[-1]) - bounds[interval] + first[interval] + 1
+
+        a = xy[first][interval]
+        delta = (xy[last] - xy[first])[interval]
+        relative = xy[index] - a
+        length2 = np.einsum("ij,ij->i", delta, delta)
+        t = np.einsum("ij,ij->i", relative, delta) / np.where(length2 > 0, length2, 1.0)
+        offset = relative - np.clip(t, 0.0, 1.0)[:, None] * delta
+        distance = np.hypot(offset[:, 0], offset[:, 1])
+
+        # Point le plus éloigné de chaque intervalle (le premier en cas d'égalité)
+        farthest = np.maximum.reduceat(distance, bounds[:-1])
+        candidates = np.flatnonzero(distance == farthest[interval])
+        owner = interval[candidates]
+        first_candidate = np.ones(len(candidates), dtype=bool)
+        first_candidate[1:] = owner[1:] != owner[:-1]
+        split = index[candidates[first_candidate]]
+
+        cut = farthest > tolerance
+        keep[split[cut]] = True
+        first, last, split = first[cut], last[cut], split[cut]
+        first, last = np.concatenate([first, split]), np.concatenate([split, last])
+
+
+def visvalingam(points, offsets, tolerance):
+    """
+    Masque des sommets conservés par l'algorithme de Visvalingam-Whyatt,
+    avec un seuil d'aire effective tolerance².
+
+    Plutôt que de retirer les sommets un à un par ordre d'aire croissante,
+    chaque passe retire en bloc, sur toutes les lignes, un sommet sur deux
+    dans chaque suite de sommets voisins d'aire inférieure au seuil, puis
+    recalcule l'aire de leurs voisins. Comme dans l'algorithme d'origine,
+    tout sommet retiré a une aire effective inférieure au seuil ; le nombre
+    de passes croît avec le logarithme de la longueur de ces suites.
+    """
+    xy = points[:, :2]
+    keep = np.ones(len(points), dtype=bool)
+    ends = _endpoint_mask(points, offsets)
+    threshold = 2.0 * tolerance * tolerance
+    while True:
+        kept = np.flatnonzero(keep)
+        inner = np.flatnonzero(~ends[kept])
+        if not len(inner):
+            return keep
+
+        # Double de l'aire du triangle formé avec les voisins conservés
+        vertex, before, after = xy[kept[inner]], xy[kept[inner - 1]], xy[kept[inner + 1]]
+        u, v = before - vertex, after - vertex
+        area = np.abs(u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0])
+        candidate = area < threshold
+        if not candidate.any():
+            return keep
+
+        # Un candidat sur deux dans chaque suite de candidats voisins
+        marked = np.zeros(len(kept), dtype=bool)
+        marked[inner[candidate]] = True
+        follows = np.zeros(len(kept), dtype=bool)
+        follows[1:] = marked[1:] & marked[:-1]
+        position = np.arange(len(kept))
+        run_start = np.maximum.accumulate(np.where(follows, 0, position))
+        keep[kept[marked & ((position - run_start) % 2 == 0)]] = False
+
+
+def chaikin(points, offsets):
+    """
+    Une itération du lissage de Chaikin (découpe des coins au quart et aux
+    trois quarts de chaque segment), extrémités conservées : une ligne de
+    n sommets en compte 2n. Les lignes de deux sommets, déjà droites, sont
+    laissées telles quelles. Toutes les colonnes (y compris une mesure M)
+    sont interpolées.
+    """
+    if not len(points):
+        return points, offsets
+    smoothed = np.empty((2 * len(points), points.shape[1]))
+    smoothed[2 * offsets[:-1]] = points[offsets[:-1]]
+    smoothed[2 * offsets[1:] - 1] = points[offsets[1:] - 1]
+
+    # Segments internes aux lignes : le sommet i et son successeur
+    inside = np.ones(len(points), dtype=bool)
+    inside[offsets[1:] - 1] = False
+    segment = np.flatnonzero(inside)
+    a, b = points[segment], points[segment + 1]
+    smoothed[2 * segment + 1] = 0.75 * a + 0.25 * b
+    smoothed[2 * segment + 2] = 0.25 * a + 0.75 * b
+
+    # Les lignes de deux sommets gardent leurs seules extrémités
+    straight = np.flatnonzero(np.diff(offsets) == 2)
+    keep = np.ones(len(smoothed), dtype=bool)
+    keep[2 * offsets[straight] + 1] = False
+    keep[2 * offsets[straight] + 2] = False
+    return compress_lines(smoothed, 2 * offsets, keep)
+
+
+def snap_endpoints(points, offsets, tolerance):
+    """
+    Accroche entre elles les extrémités des lignes distantes de moins de
+    tolerance : chaque groupe d'extrémités reliées de proche en proche
+    (une requête cKDTree, puis composantes connexes) est remplacé par son
+    barycentre.
+    """
+    ends = np.concatenate([offsets[:-1], offsets[1:] - 1])
+    pairs = cKDTree(points[ends, :2]).query_pairs(tolerance, output_type="ndarray")
+    if not len(pairs):
+        return points
+    graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(len(ends), len(ends)))
+    _, labels = connected_components(graph, directed=False)
+    counts = np.bincount(labels)
+    snapped = points.copy()
+    for axis in range(2):
+        snapped[ends, axis] = (np.bincount(labels, points[ends, axis]) / counts)[labels]
+    return snapped
+
+
+def postprocess_lines(lines, simplify_method=None, tolerance=0.0, smooth_iterations=0, snap_tolerance=0.0):
+    """
+    Accroche les extrémités (snap_tolerance), simplifie (simplify_method,
+    DOUGLAS_PEUCKER ou VISVALINGAM, à tolerance près) puis lisse par
+    smooth_iterations itérations de Chaikin un ensemble de polylignes,
+    toutes traitées en bloc sans géométrie QGIS intermédiaire. Les lignes
+    réduites à un point par l'accrochage sont écartées.
+    """
+    if not lines:
+        return lines
+    points, offsets = pack_lines(lines)
+
+    if snap_tolerance > 0:
+        points = snap_endpoints(points, offsets, snap_tolerance)
+        lengths = np.hypot(*np.diff(points[:, :2], axis=0).T)
+        # Longueur de chaque ligne : les segments entre deux lignes sont exclus
+        lengths[offsets[1:-1] - 1] = 0.0
+        line_lengths = np.add.reduceat(np.append(lengths, 0.0), offsets[:-1])
+        if not line_lengths.all():
+            counts = np.diff(offsets)[line_lengths > 0]
+            points = points[np.repeat(line_lengths > 0, np.diff(offsets))]
+            offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.intp)
+            if not len(points):
+                return []
+
+    if simplify_method and tolerance > 0:
+        simplify = visvalingam if simplify_method == "VISVALINGAM" else douglas_peucker
+        points, offsets = compress_lines(points, offsets, simplify(points, offsets, tolerance))
+
+    for _ in range(smooth_iterations):
+        points, offsets = chaikin(points, offsets)
+
+    return unpack_lines(points, offsets)
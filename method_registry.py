@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - registre des méthodes
+                                 A QGIS plugin
+ Méthodes de calcul disponibles, leurs paramètres propres et leur moteur,
+ importé seulement au premier calcul
+ ***************************************************************************/
+"""
+import importlib
+from collections import namedtuple
+
+# Ce module ne dépend ni de NumPy ni de SciPy : la boîte de dialogue,
+# l'algorithme Processing et la ligne de commande se construisent à partir
+# du registre sans charger les moteurs de calcul.
+
+# Nombre de sites au-delà duquel le diagramme de Voronoï est calculé par tuiles
+DEFAULT_MAX_TILE_VERTICES = 200000
+
+# Paramètre propre à une ou plusieurs méthodes : nom de la clé de params,
+# libellé de la boîte de dialogue, description (Processing, ligne de
+# commande), type ("int" ou "double"), valeur par défaut, bornes, texte
+# affiché pour la valeur minimale (None : la valeur elle-même), pas et
+# suffixe du champ de saisie
+MethodParameter = namedtuple(
+    "MethodParameter", "name label description kind default minimum maximum special_value step suffix",
+    defaults=(None, 1, "")
+)
+
+MAX_TILE_VERTICES = MethodParameter(
+    "max_tile_vertices", "Sommets max. par tuile (Voronoï)",
+    "Sommets max. par tuile (Voronoï, 0 : pas de découpage)",
+    "int", DEFAULT_MAX_TILE_VERTICES, 0, 100000000, "Pas de découpage", step=10000
+)
+
+CELL_SIZE = MethodParameter(
+    "cell_size", "Taille de cellule (raster)",
+    "Taille de cellule (raster, 0 : automatique)",
+    "double", 0.0, 0.0, 10000.0, "Automatique", suffix=" unités"
+)
+
+
+class CenterlineMethod:
+    """
+    Méthode de calcul des centerlines.
+
+    Le moteur est la fonction function du module module du plugin, appelée
+    comme function(shape, params, profiler) avec les anneaux du polygone
+    (geometry_arrays.PolygonRings) et renvoyant la liste des lignes (N, 2).
+    Le module n'est importé qu'au premier appel de engine(). parameters
+    liste les MethodParameter propres à la méthode ; error préfixe le
+    message d'une erreur de calcul, après laquelle la méthode fallback est
+    essayée si elle est indiquée. network indique un moteur de squelette,
+    qui renvoie toutes les branches quand elles doivent être élaguées ou
+    conservées (voir skeleton_graph.graph_lines) : le tronc de chaque
+    partie est alors extrait après l'élagage.
+    """
+
+    def __init__(self, name, label, module, function, parameters=(), error=None, fallback=None,
+                 network=False):
+        self.name = name
+        self.label = label
+        self.module = module
+        self.function = function
+        self.parameters = tuple(parameters)
+        self.error = error or f"Erreur lors du calcul ({label})"
+        self.fallback = fallback
+        self.network = network
+        self._engine = None
+
+    def engine(self):
+        """Fonction de calcul de la méthode, importée au premier appel."""
+        if self._engine is None:
+            module = importlib.import_module(f".{self.module}", __package__)
+            self._engine = getattr(module, self.function)
+        return self._engine
+
+
+# Méthodes dans l'ordre de leur enregistrement, qui est aussi celui des
+# options de l'algorithme Processing : une nouvelle méthode est ajoutée à
+# la fin pour ne pas décaler les indices des modèles existants
+_METHODS = {}
+
+
+def register_method(method):
+    """Ajoute une méthode au registre (ou remplace celle de même nom)."""
+    _METHODS[method.name] = method
+    return method
+
+
+def get_method(name):
+    """Méthode enregistrée sous name ; ValueError si elle n'existe pas."""
+    try:
+        return _METHODS[name]
+    except KeyError:
+        raise ValueError(f"Méthode inconnue : {name}")
+
+
+def methods():
+    """Méthodes enregistrées, dans l'ordre d'enregistrement."""
+    return list(_METHODS.values())
+
+
+def method_names():
+    """Noms (clés de params["method"]) des méthodes enregistrées."""
+    return list(_METHODS)
+
+
+def method_parameters():
+    """Paramètres propres aux méthodes, chacun une seule fois, dans l'ordre des méthodes."""
+    parameters = {}
+    for method in _METHODS.values():
+        for parameter in method.parameters:
+            parameters.setdefault(parameter.name, parameter)
+    return list(parameters.values())
+
+
+def method_defaults():
+    """Valeurs par défaut des paramètres propres aux méthodes."""
+    return {parameter.name: parameter.default for parameter in method_parameters()}
+
+
+register_method(CenterlineMethod(
+    "MORPHOLOGICAL", "Squelettisation morphologique", "scanline", "morphological_lines",
+    error="Erreur lors de la squelettisation"
+))
+register_method(CenterlineMethod(
+    "VORONOI", "Diagramme de Voronoï", "voronoi_skeleton", "voronoi_lines", [MAX_TILE_VERTICES],
+    error="Erreur lors du calcul de Voronoï", fallback="MORPHOLOGICAL", network=True
+))
+register_method(CenterlineMethod(
+    "CONTOUR", "Contour parallèle", "raster_skeleton", "contour_lines", [CELL_SIZE],
+    error="Erreur lors de la génération du contour parallèle"
+))
+register_method(CenterlineMethod(
+    "RASTER", "Transformée de distance (raster)", "raster_skeleton", "raster_lines", [CELL_SIZE],
+    error="Erreur lors de la squelettisation raster", network=True
+))
+register_method(CenterlineMethod(
+    "CHORDAL", "Axe cordal (triangulation de Delaunay)", "chordal_axis", "chordal_lines",
+    error="Erreur lors du calcul de l'axe cordal", network=True
+))
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - raccordement en réseau
+                                 A QGIS plugin
+ Raccordement des centerlines de polygones adjacents à leurs frontières
+ communes, composante connexe par composante connexe
+ ***************************************************************************/
+"""
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+
+def component_labels(count, pairs):
+    """
+    Numéro de composante connexe de chacun des count polygones, pairs (K, 2)
+    donnant les indices des polygones adjacents.
+    """
+    pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+    links = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(count, count))
+    _, labels = connected_components(links, directed=False)
+    return labels
+
+
+def free_ends(lines):
+    """
+    Extrémités libres des polylignes : (indices des lignes, côté 0 = début
+    et 1 = fin, coordonnées). Une extrémité partagée par plusieurs lignes
+    (jonction) n'est pas libre.
+    """
+    if not lines:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros((0, 2))
+    ends = np.array([[line[0, :2], line[-1, :2]] for line in lines], dtype=float).reshape(-1, 2)
+    _, inverse, counts = np.unique(ends, axis=0, return_inverse=True, return_counts=True)
+    free = np.flatnonzero(counts[inverse.ravel()] == 1)
+    return free // 2, free % 2, ends[free]
+
+
+def stitch_lines(lines, gates, tolerance=None):
+    """
+    Raccorde les centerlines d'un polygone à ses portes : points (K, 2) pris
+    au milieu de chaque frontière commune avec un voisin, gates étant une
+    liste de (point, largeur de la frontière).
+
+    Chaque porte est reliée à l'extrémité libre la plus proche dans un rayon
+    tolerance (par défaut la largeur de la frontière : l'axe médian s'arrête
+    à une demi-largeur du bord), qui est prolongée jusqu'à elle ; à défaut,
+    un segment la relie au sommet de centerline le plus proche. Les
+    polygones voisins se raccordant au même point, le réseau est connexe.
+
+    Les lignes (N, 3) portant une mesure M (largeur) la conservent : un
+    point ajouté reprend la mesure du sommet auquel il est raccordé.
+
+    Renvoie (lignes, nombre de portes raccordées).
+    """
+    lines = [np.asarray(line, dtype=float) for line in lines]
+    if not lines or not gates:
+        return lines, 0
+
+    line_ids, sides, points = free_ends(lines)
+    tree = cKDTree(points) if len(points) else None
+    vertices = np.concatenate(lines)
+    vertex_tree = cKDTree(vertices[:, :2])
+    used = np.zeros(len(points), dtype=bool)
+    connectors = []
+
+    for gate, width in gates:
+        gate = np.asarray(gate, dtype=float)
+        radius = tolerance if tolerance else width
+        match = None
+        if tree is not None:
+            count = min(len(points), 4)
+            distances, candidates = tree.query(gate, k=count)
+            for distance, candidate in zip(np.atleast_1d(distances), np.atleast_1d(candidates)):
+                if distance <= radius and not used[candidate]:
+                    match = candidate
+                    break
+
+        if match is not None:
+            used[match] = True
+            line = lines[line_ids[match]]
+            if sides[match]:
+                lines[line_ids[match]] = np.vstack([line, np.append(gate, line[-1, 2:])])
+            else:
+                lines[line_ids[match]] = np.vstack([np.append(gate, line[0, 2:]), line])
+        else:
+            _, nearest = vertex_tree.query(gate)
+            connectors.append(np.vstack([vertices[nearest], np.append(gate, vertices[nearest, 2:])]))
+
+    return lines + connectors, len(gates)
@@ -9,27 +9,27 @@
         copyright            : (C) 2025
  ***************************************************************************/
 """
-from qgis.PyQt.QtCore import QSettings, QTranslator, QCoreApplication, Qt
+from qgis.PyQt.QtCore import QCoreApplication
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QAction, QDialog, QFormLayout, QComboBox, QDialogButtonBox, QSpinBox, QDoubleSpinBox, QCheckBox, QVBoxLayout, QLabel
-from qgis.core import (
-    QgsProject, QgsVectorLayer, QgsField, QgsFeature, QgsGeometry, 
-    QgsProcessingFeedback, QgsWkbTypes, QgsSpatialIndex, QgsFeatureRequest,
-    QgsProcessingUtils, QgsMessageLog, QgsCoordinateReferenceSystem,
-    NULL, QgsVectorFileWriter, QgsPointXY, QgsRectangle, QgsPoint
-)
-from qgis.core import QgsApplication, QgsProcessingAlgorithm, QgsProcessingParameterFeatureSource, QgsProcessingParameterNumber, QgsProcessingParameterBoolean, QgsProcessingParameterVectorDestination
+from qgis.core import QgsApplication, QgsProject, QgsVectorLayer, QgsWkbTypes
 import os.path
-import processing
-from PyQt5.QtCore import QVariant
-import numpy as np
-from scipy.spatial import Voronoi
-import math
+
+from qgis.gui import QgsFileWidget
+
+# Ce module est importé au démarrage de QGIS (classFactory) : le cœur de
+# calcul et ses moteurs (NumPy, SciPy) ne sont importés qu'à leur première
+# utilisation, et les méthodes proposées viennent du registre
+from .centerline_cache import CACHE_FILE_NAME
+from .centerline_output import DEFAULT_BATCH_SIZE, FILE_FILTER
+from .centerline_provider import PolygonCenterlineProvider
+from .method_registry import get_method, method_parameters, methods
 
 class PolygonCenterlineDialog(QDialog):
     def __init__(self, iface):
         super(PolygonCenterlineDialog, self).__init__()
         self.iface = iface
+        self.preview = None
         self.setupUI()
         
     def setupUI(self):
@@ -46,9 +46,8 @@ class PolygonCenterlineDialog(QDialog):
         
         # Paramètre de la méthode
         self.method_combo = QComboBox()
-        self.method_combo.addItem("Squelettisation morphologique", "MORPHOLOGICAL")
-        self.method_combo.addItem("Diagramme de Voronoï", "VORONOI")
-        self.method_combo.addItem("Contour parallèle", "CONTOUR")
+        for method in methods():
+            self.method_combo.addItem(method.label, method.name)
         form_layout.addRow("Méthode:", self.method_combo)
         
         # Paramètres de densification
@@ -62,6 +61,45 @@ class PolygonCenterlineDialog(QDialog):
         self.interval_spin.setSuffix(" unités")
         form_layout.addRow("Intervalle de densification:", self.interval_spin)
         
+        # Paramètres propres aux méthodes, déclarés dans le registre et
+        # actifs seulement pour les méthodes qui les utilisent
+        self.method_spins = {}
+        for parameter in method_parameters():
+            if parameter.kind == "int":
+                spin = QSpinBox()
+            else:
+                spin = QDoubleSpinBox()
+                spin.setDecimals(3)
+            spin.setRange(parameter.minimum, parameter.maximum)
+            spin.setSingleStep(parameter.step)
+            spin.setValue(parameter.default)
+            spin.setSuffix(parameter.suffix)
+            if parameter.special_value:
+                spin.setSpecialValueText(parameter.special_value)
+            form_layout.addRow(f"{parameter.label}:", spin)
+            self.method_spins[parameter.name] = spin
+        self.method_combo.currentIndexChanged.connect(self.update_method_parameters)
+        self.update_method_parameters()
+        
+        # Voie rapide : axe direct des bandes quasi rectangulaires (0 : désactivée)
+        self.fast_path_spin = QDoubleSpinBox()
+        self.fast_path_spin.setRange(0.0, 0.5)
+        self.fast_path_spin.setDecimals(3)
+        self.fast_path_spin.setSingleStep(0.01)
+        self.fast_path_spin.setValue(0.0)
+        self.fast_path_spin.setSpecialValueText("Désactivée")
+        form_layout.addRow("Tolérance de la voie rapide:", self.fast_path_spin)
+        
+        self.adaptive_check = QCheckBox("Densification adaptative (courbure et largeur)")
+        self.adaptive_check.setChecked(False)
+        form_layout.addRow(self.adaptive_check)
+        
+        self.max_interval_spin = QDoubleSpinBox()
+        self.max_interval_spin.setRange(0.1, 10000.0)
+        self.max_interval_spin.setValue(10.0)
+        self.max_interval_spin.setSuffix(" unités")
+        form_layout.addRow("Intervalle de densification maximal:", self.max_interval_spin)
+        
         # Paramètres de squelettisation
         self.simplify_check = QCheckBox("Simplifier les centerlines")
         self.simplify_check.setChecked(True)
@@ -73,6 +111,25 @@ class PolygonCenterlineDialog(QDialog):
         self.tolerance_spin.setSuffix(" unités")
         form_layout.addRow("Tolérance de simplification:", self.tolerance_spin)
         
+        self.simplify_method_combo = QComboBox()
+        self.simplify_method_combo.addItem("Douglas-Peucker", "DOUGLAS_PEUCKER")
+        self.simplify_method_combo.addItem("Visvalingam-Whyatt", "VISVALINGAM")
+        form_layout.addRow("Algorithme de simplification:", self.simplify_method_combo)
+        
+        # Lissage de Chaikin (0 : pas de lissage) et accrochage des extrémités
+        self.smooth_spin = QSpinBox()
+        self.smooth_spin.setRange(0, 5)
+        self.smooth_spin.setValue(0)
+        self.smooth_spin.setSpecialValueText("Pas de lissage")
+        form_layout.addRow("Itérations de lissage:", self.smooth_spin)
+        
+        self.snap_spin = QDoubleSpinBox()
+        self.snap_spin.setRange(0.0, 1000.0)
+        self.snap_spin.setValue(0.0)
+        self.snap_spin.setSuffix(" unités")
+        self.snap_spin.setSpecialValueText("Désactivé")
+        form_layout.addRow("Accrochage des extrémités:", self.snap_spin)
+        
         # Paramètres de pruning
         self.prune_check = QCheckBox("Élaguer les branches")
         self.prune_check.setChecked(True)
@@ -84,11 +141,85 @@ class PolygonCenterlineDialog(QDialog):
         self.min_length_spin.setSuffix(" unités")
         form_layout.addRow("Longueur minimale des branches:", self.min_length_spin)
         
+        self.prune_mode_combo = QComboBox()
+        self.prune_mode_combo.addItem("Longueur fixe", "LENGTH")
+        self.prune_mode_combo.addItem("Relative à la largeur locale", "WIDTH")
+        form_layout.addRow("Mode d'élagage:", self.prune_mode_combo)
+        
+        self.width_factor_spin = QDoubleSpinBox()
+        self.width_factor_spin.setRange(0.1, 100.0)
+        self.width_factor_spin.setValue(1.0)
+        self.width_factor_spin.setSuffix(" x largeur")
+        form_layout.addRow("Longueur minimale relative:", self.width_factor_spin)
+        
+        self.all_branches_check = QCheckBox("Conserver toutes les branches (sinon le tronc de chaque partie)")
+        self.all_branches_check.setChecked(False)
+        form_layout.addRow(self.all_branches_check)
+        
         # Paramètres d'attributs
         self.copy_attributes = QCheckBox("Copier les attributs des polygones")
         self.copy_attributes.setChecked(True)
         form_layout.addRow(self.copy_attributes)
         
+        # Paramètres d'exécution
+        from .centerline_core import default_worker_count
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, max(1, os.cpu_count() or 1))
+        self.workers_spin.setValue(default_worker_count())
+        form_layout.addRow("Processus de calcul:", self.workers_spin)
+        
+        # Cache disque des résultats (entités inchangées non recalculées)
+        self.cache_check = QCheckBox("Utiliser le cache des résultats")
+        self.cache_check.setChecked(True)
+        form_layout.addRow(self.cache_check)
+        
+        # Paramètres de sortie (vide : couche temporaire en mémoire)
+        self.output_file = QgsFileWidget()
+        self.output_file.setStorageMode(QgsFileWidget.SaveFile)
+        self.output_file.setFilter(FILE_FILTER)
+        self.output_file.lineEdit().setPlaceholderText("[Couche temporaire]")
+        form_layout.addRow("Fichier de sortie:", self.output_file)
+        
+        # Mode réseau : centerlines des polygones adjacents raccordées
+        self.network_check = QCheckBox("Mode réseau (raccorder les polygones adjacents)")
+        self.network_check.setChecked(False)
+        form_layout.addRow(self.network_check)
+        
+        # Profil de largeur : largeur locale en mesure M et champs width_*
+        self.width_step_spin = QDoubleSpinBox()
+        self.width_step_spin.setRange(0.0, 10000.0)
+        self.width_step_spin.setValue(0.0)
+        self.width_step_spin.setSuffix(" unités")
+        self.width_step_spin.setSpecialValueText("Désactivé")
+        form_layout.addRow("Pas du profil de largeur:", self.width_step_spin)
+        
+        # Mode lié : couche mémoire tenue à jour pendant l'édition de la source
+        self.link_check = QCheckBox("Lier à la couche source (mise à jour pendant l'édition)")
+        self.link_check.setChecked(False)
+        self.link_check.toggled.connect(lambda checked: self.output_file.setEnabled(not checked))
+        form_layout.addRow(self.link_check)
+        
+        self.batch_spin = QSpinBox()
+        self.batch_spin.setRange(1, 1000000)
+        self.batch_spin.setValue(DEFAULT_BATCH_SIZE)
+        form_layout.addRow("Taille des lots d'écriture:", self.batch_spin)
+        
+        # Mesures de performance (vide : pas de rapport)
+        self.report_file = QgsFileWidget()
+        self.report_file.setStorageMode(QgsFileWidget.SaveFile)
+        self.report_file.setFilter("JSON (*.json);;CSV (*.csv)")
+        self.report_file.lineEdit().setPlaceholderText("[Aucun rapport]")
+        form_layout.addRow("Rapport de performance:", self.report_file)
+        
+        self.profile_attributes_check = QCheckBox("Ajouter les mesures de performance aux attributs")
+        self.profile_attributes_check.setChecked(False)
+        form_layout.addRow(self.profile_attributes_check)
+        
+        # Aperçu sur l'emprise du canevas, relancé à chaque changement de paramètre
+        self.preview_check = QCheckBox("Aperçu sur l'emprise de la carte")
+        self.preview_check.setChecked(False)
+        form_layout.addRow(self.preview_check)
+        
         layout.addLayout(form_layout)
         
         # Information d'aide
@@ -105,6 +236,74 @@ class PolygonCenterlineDialog(QDialog):
         layout.addWidget(self.button_box)
         
         self.setLayout(layout)
+        
+        for combo in (self.layer_combo, self.method_combo, self.simplify_method_combo, self.prune_mode_combo):
+            combo.currentIndexChanged.connect(self.update_preview)
+        for check in (self.densify_check, self.adaptive_check, self.simplify_check, self.prune_check,
+                      self.all_branches_check, self.preview_check):
+            check.toggled.connect(self.update_preview)
+        for spin in (self.interval_spin, self.fast_path_spin, self.max_interval_spin,
+                     self.tolerance_spin, self.smooth_spin, self.snap_spin, self.min_length_spin,
+                     self.width_factor_spin, *self.method_spins.values()):
+            spin.valueChanged.connect(self.update_preview)
+        self.finished.connect(self.close_preview)
+    
+    def update_method_parameters(self, *args):
+        """N'active que les paramètres propres à la méthode choisie."""
+        used = {parameter.name for parameter in get_method(self.method_combo.currentData()).parameters}
+        for name, spin in self.method_spins.items():
+            spin.setEnabled(name in used)
+    
+    def method_params(self):
+        """Valeurs des paramètres propres aux méthodes (voir method_registry)."""
+        return {name: spin.value() for name, spin in self.method_spins.items()}
+    
+    def params(self):
+        """Paramètres de calcul saisis dans la boîte de dialogue."""
+        from .centerline_core import default_worker_count
+        return {
+            "method": self.method_combo.currentData(),
+            "densify": self.densify_check.isChecked(),
+            "interval": self.interval_spin.value(),
+            "adaptive": self.adaptive_check.isChecked(),
+            "max_interval": self.max_interval_spin.value(),
+            "simplify": self.simplify_check.isChecked(),
+            "tolerance": self.tolerance_spin.value(),
+            "simplify_method": self.simplify_method_combo.currentData(),
+            "smooth_iterations": self.smooth_spin.value(),
+            "snap_tolerance": self.snap_spin.value(),
+            "prune": self.prune_check.isChecked(),
+            "min_length": self.min_length_spin.value(),
+            "prune_mode": self.prune_mode_combo.currentData(),
+            "width_factor": self.width_factor_spin.value(),
+            "all_branches": self.all_branches_check.isChecked(),
+            "fast_path_tolerance": self.fast_path_spin.value(),
+            **self.method_params(),
+            # Les tuiles ne sont parallélisées que si les entités ne le sont pas
+            "tile_workers": 1 if self.workers_spin.value() > 1 else default_worker_count(),
+        }
+    
+    def update_preview(self, *args):
+        """Relance l'aperçu (voir CenterlinePreview) après un changement de paramètre."""
+        if not self.preview_check.isChecked():
+            self.close_preview()
+            return
+        layer = QgsProject.instance().mapLayer(self.layer_combo.currentData())
+        if layer is None:
+            return
+        if self.preview is None:
+            # Les résultats de l'aperçu alimentent le cache du calcul complet
+            cache_path = None
+            if self.cache_check.isChecked():
+                cache_path = os.path.join(QgsApplication.qgisSettingsDirPath(), CACHE_FILE_NAME)
+            from .centerline_preview import CenterlinePreview
+            self.preview = CenterlinePreview(self.iface, self.workers_spin.value(), cache_path)
+        self.preview.request(layer, self.params())
+    
+    def close_preview(self, *args):
+        if self.preview is not None:
+            self.preview.close()
+            self.preview = None
 
 class PolygonCenterline:
     """QGIS Plugin pour générer des centerlines à partir de polygones"""
@@ -115,6 +314,9 @@ class PolygonCenterline:
         self.actions = []
         self.menu = self.tr('&Polygon Centerline')
         self.first_start = None
+        self.task = None
+        self.provider = None
+        self.links = []
 
     def tr(self, message):
         return QCoreApplication.translate('PolygonCenterline', message)
@@ -153,8 +355,15 @@ class PolygonCenterline:
         self.actions.append(action)
         return action
 
+    def initProcessing(self):
+        """Enregistrer le fournisseur Processing (boîte à outils, modèles, qgis_process)"""
+        self.provider = PolygonCenterlineProvider()
+        QgsApplication.processingRegistry().addProvider(self.provider)
+
     def initGui(self):
         """Créer les éléments de l'interface graphique"""
+        self.initProcessing()
+        
         icon_path = os.path.join(self.plugin_dir, 'icon.png')
         self.add_action(
             icon_path,
@@ -171,6 +380,14 @@ class PolygonCenterline:
                 self.tr('&Polygon Centerline'),
                 action)
             self.iface.removeToolBarIcon(action)
+        
+        if self.provider is not None:
+            QgsApplication.processingRegistry().removeProvider(self.provider)
+            self.provider = None
+        
+        for link in self.links:
+            link.unlink()
+        self.links = []
 
     def run(self):
         """Exécuter le plugin lorsque l'utilisateur clique sur l'icône"""
@@ -193,413 +410,76 @@ class PolygonCenterline:
                 )
                 return
                 
-            # Paramètres
-            method = dlg.method_combo.currentData()
-            densify = dlg.densify_check.isChecked()
-            interval = dlg.interval_spin.value()
-            simplify = dlg.simplify_check.isChecked()
-            tolerance = dlg.tolerance_spin.value()
-            prune = dlg.prune_check.isChecked()
-            min_length = dlg.min_length_spin.value()
-            copy_attrs = dlg.copy_attributes.isChecked()
-            
-            # Générer les centerlines
+            # Générer les centerlines avec les paramètres de calcul de la
+            # boîte de dialogue et ses options d'exécution
             self.generate_centerlines(
-                layer, method, densify, interval, simplify, tolerance, 
-                prune, min_length, copy_attrs
+                layer, dict(dlg.params(), width_step=dlg.width_step_spin.value()),
+                copy_attrs=dlg.copy_attributes.isChecked(),
+                workers=dlg.workers_spin.value(),
+                output_path=dlg.output_file.filePath(),
+                batch_size=dlg.batch_spin.value(),
+                use_cache=dlg.cache_check.isChecked(),
+                linked=dlg.link_check.isChecked(),
+                report_path=dlg.report_file.filePath(),
+                profile_attributes=dlg.profile_attributes_check.isChecked(),
+                network=dlg.network_check.isChecked()
             )
     
-    def generate_centerlines(self, layer, method, densify, interval, simplify, tolerance, prune, min_length, copy_attrs):
-        """Génère des centerlines à partir d'une couche de polygones"""
-        self.iface.messageBar().pushInfo(
-            "Centerline",
-            "Génération des centerlines en cours..."
-        )
-        
-        # Créer une couche temporaire pour stocker les résultats
-        temp_layer = QgsVectorLayer("LineString?crs=" + layer.crs().authid(), "Centerlines", "memory")
-        temp_provider = temp_layer.dataProvider()
-        
-        # Copier les champs source si demandé
-        if copy_attrs:
-            temp_provider.addAttributes(layer.fields())
-            temp_layer.updateFields()
-        
-        # Traiter chaque polygone
-        feature_count = layer.featureCount()
-        for current, feature in enumerate(layer.getFeatures()):
-            # Mettre à jour la barre de progression
-            progress = int(current / feature_count * 100)
-            self.iface.mainWindow().statusBar().showMessage(
-                f"Traitement des polygones: {current+1}/{feature_count} ({progress}%)"
-            )
-            
-            geom = feature.geometry()
-            if geom.isEmpty() or geom.isNull():
-                continue
-                
-            # Vérifier que c'est un polygone
-            if geom.type() != QgsWkbTypes.PolygonGeometry:
-                continue
-            
-            # Densifier le polygone si nécessaire
-            if densify:
-                geom = geom.densifyByDistance(interval)
-            
-            # Générer la centerline selon la méthode choisie
-            centerline = None
-            if method == "MORPHOLOGICAL":
-                # Utiliser l'algorithme de squelettisation morphologique via GRASS
-                try:
-                    # Dans un cas réel, on appellerait l'algorithme GRASS v.thin
-                    # Ici, on utilise notre implémentation de squelettisation
-                    centerline = self.generate_morphological_skeleton(geom)
-                except Exception as e:
-                    self.iface.messageBar().pushWarning(
-                        "Centerline",
-                        f"Erreur lors de la squelettisation: {str(e)}"
-                    )
-                    continue
-            
-            elif method == "VORONOI":
-                # Utiliser l'algorithme basé sur le diagramme de Voronoï
-                try:
-                    centerline = self.generate_voronoi_skeleton(geom)
-                except Exception as e:
-                    self.iface.messageBar().pushWarning(
-                        "Centerline",
-                        f"Erreur lors de la génération du diagramme de Voronoï: {str(e)}"
-                    )
-                    continue
-                    
-            else:  # CONTOUR
-                # Utiliser l'algorithme de contour parallèle
-                try:
-                    centerline = self.generate_contour_centerline(geom)
-                except Exception as e:
-                    self.iface.messageBar().pushWarning(
-                        "Centerline",
-                        f"Erreur lors de la génération du contour parallèle: {str(e)}"
-                    )
-                    continue
-            
-            if not centerline or centerline.isEmpty():
-                continue
-                
-            # Simplifier si demandé
-            if simplify and not centerline.isEmpty():
-                centerline = centerline.simplify(tolerance)
-            
-            # Élaguer si demandé
-            if prune and not centerline.isEmpty():
-                centerline = self.prune_branches(centerline, min_length)
-            
-            # Créer une nouvelle entité pour la centerline
-            new_feat = QgsFeature()
-            new_feat.setGeometry(centerline)
-            
-            # Copier les attributs si nécessaire
-            if copy_attrs:
-                new_feat.setAttributes(feature.attributes())
-                
-            temp_provider.addFeature(new_feat)
-        
-        # Réinitialiser la barre d'état
-        self.iface.mainWindow().statusBar().clearMessage()
-        
-        # Si la couche est vide, sortir
-        if temp_layer.featureCount() == 0:
-            self.iface.messageBar().pushWarning(
+    def generate_centerlines(self, layer, params, copy_attrs=True, workers=1,
+                             output_path=None, batch_size=DEFAULT_BATCH_SIZE, use_cache=False, linked=False,
+                             report_path=None, profile_attributes=False, network=False):
+        """
+        Génère des centerlines à partir d'une couche de polygones.
+        params est le dictionnaire des paramètres de calcul (voir
+        PolygonCenterlineDialog.params et centerline_core.DEFAULT_PARAMS,
+        dont les valeurs complètent celles qui manquent).
+        Le calcul est lancé en tâche de fond (annulable depuis la barre de
+        progression de QGIS) et réparti sur workers processus. Si output_path
+        est fourni, les résultats sont écrits par lots dans ce fichier
+        (GeoPackage, FlatGeobuf) au lieu d'une couche mémoire. Avec use_cache,
+        les centerlines déjà calculées sont relues depuis le cache du profil.
+        Avec linked, la couche produite reste liée à la source : les entités
+        modifiées sont recalculées au fil de l'édition (voir CenterlineLink).
+        Avec report_path ou profile_attributes, la durée et la mémoire de
+        chaque étape sont mesurées par entité (voir profiling). Avec network,
+        les centerlines des polygones adjacents sont raccordées en un réseau
+        connexe (voir centerline_network).
+        """
+        from .centerline_core import DEFAULT_PARAMS
+        from .centerline_task import CenterlineTask
+        
+        params = dict(DEFAULT_PARAMS, **params)
+        
+        cache_path = None
+        if use_cache:
+            cache_path = os.path.join(QgsApplication.qgisSettingsDirPath(), CACHE_FILE_NAME)
+        
+        if linked:
+            # Le mode lié ne produit ni rapport de performance, ni réseau, ni profil de largeur
+            from .centerline_link import CenterlineLink
+            self.links = [link for link in self.links if link.active]
+            link = CenterlineLink(self.iface, layer, dict(params, width_step=0.0), copy_attrs, workers, cache_path)
+            self.links.append(link)
+            link.start()
+            self.iface.messageBar().pushInfo(
                 "Centerline",
-                "Aucune centerline n'a pu être générée. Vérifiez les données d'entrée."
+                "Couche de centerlines liée : elle suivra les modifications de la couche source."
             )
             return
-            
-        # Ajouter la couche au projet
-        QgsProject.instance().addMapLayer(temp_layer)
-        
-        self.iface.messageBar().pushSuccess(
-            "Centerline",
-            f"Génération terminée. {temp_layer.featureCount()} centerlines créées."
-        )
-    
-    def generate_morphological_skeleton(self, geometry):
-        """
-        Génère un squelette morphologique à partir d'un polygone.
-        Cette fonction utilise un algorithme de base pour simuler la squelettisation.
-        Dans un plugin réel, on utiliserait GRASS v.thin ou un autre algorithme spécialisé.
-        """
-        # Dans un plugin réel, on pourrait appeler GRASS via processing:
-        # params = {
-        #     'input': QgsProcessingFeatureSourceDefinition(layer.id(), False),
-        #     'output': 'memory:'
-        # }
-        # result = processing.run("grass7:v.thin", params)
-        # return result['output']
-        
-        # Pour cette implémentation, on utilise une méthode simplifiée
-        # qui calcule approximativement la ligne médiane
-        # On divise le polygone en tranches verticales et on trouve le point central de chaque tranche
-        
-        # Extraire les coordonnées du contour du polygone
-        if geometry.isMultipart():
-            polygons = geometry.asMultiPolygon()
-            # Prendre le plus grand polygone
-            largest_polygon = polygons[0]
-            max_area = QgsGeometry.fromPolygonXY([largest_polygon[0]]).area()
-            
-            for poly in polygons:
-                area = QgsGeometry.fromPolygonXY([poly[0]]).area()
-                if area > max_area:
-                    largest_polygon = poly
-                    max_area = area
-            
-            exterior_ring = largest_polygon[0]
-        else:
-            exterior_ring = geometry.asPolygon()[0]
-        
-        # Obtenir le rectangle englobant
-        bbox = geometry.boundingBox()
-        x_min = bbox.xMinimum()
-        x_max = bbox.xMaximum()
-        y_min = bbox.yMinimum()
-        y_max = bbox.yMaximum()
-        
-        # Diviser le rectangle en tranches
-        num_slices = max(50, int((x_max - x_min) / (bbox.height() * 0.05)))
-        slice_width = (x_max - x_min) / num_slices
-        
-        # Points centraux pour chaque tranche
-        centerline_points = []
-        
-        for i in range(num_slices + 1):
-            x = x_min + i * slice_width
-            
-            # Créer une ligne verticale qui traverse le polygone
-            line = QgsGeometry.fromPolylineXY([
-                QgsPointXY(x, y_min - 10),
-                QgsPointXY(x, y_max + 10)
-            ])
-            
-            # Intersection avec le polygone
-            intersection = line.intersection(geometry)
-            
-            if not intersection.isEmpty():
-                if intersection.type() == QgsWkbTypes.LineGeometry:
-                    # Si l'intersection est une ligne, prendre son milieu
-                    if intersection.isMultipart():
-                        # Prendre la ligne la plus longue
-                        lines = intersection.asMultiPolyline()
-                        longest_line = lines[0]
-                        max_length = 0
-                        for line in lines:
-                            length = QgsGeometry.fromPolylineXY(line).length()
-                            if length > max_length:
-                                longest_line = line
-                                max_length = length
-                        
-                        mid_point = QgsPointXY(
-                            longest_line[0].x(),
-                            (longest_line[0].y() + longest_line[-1].y()) / 2
-                        )
-                    else:
-                        line_points = intersection.asPolyline()
-                        mid_point = QgsPointXY(
-                            line_points[0].x(),
-                            (line_points[0].y() + line_points[-1].y()) / 2
-                        )
-                    
-                    centerline_points.append(mid_point)
-        
-        # Créer la ligne à partir des points
-        if len(centerline_points) > 1:
-            return QgsGeometry.fromPolylineXY(centerline_points)
-        else:
-            return QgsGeometry()
-    
-    def generate_voronoi_skeleton(self, geometry):
-        """
-        Génère une centerline basée sur le diagramme de Voronoï.
-        Cette méthode est particulièrement adaptée aux formes complexes.
-        """
-        # Pour un plugin réel, on appellerait un algorithme existant.
-        # Ici, on développe une implémentation simplifiée.
-        
-        # Extraire les points du contour du polygone
-        if geometry.isMultipart():
-            polygons = geometry.asMultiPolygon()
-            # Prendre le plus grand polygone
-            largest_polygon = polygons[0]
-            max_area = QgsGeometry.fromPolygonXY([largest_polygon[0]]).area()
-            
-            for poly in polygons:
-                area = QgsGeometry.fromPolygonXY([poly[0]]).area()
-                if area > max_area:
-                    largest_polygon = poly
-                    max_area = area
-            
-            boundary_points = largest_polygon[0]
-        else:
-            boundary_points = geometry.asPolygon()[0]
         
-        # Convertir les points en tableau numpy pour Voronoi
-        points = np.array([[p.x(), p.y()] for p in boundary_points])
-        
-        # Calculer le diagramme de Voronoï
+        # Conserver une référence à la tâche tant qu'elle s'exécute
         try:
-            vor = Voronoi(points)
-            
-            # Extraire les segments Voronoï intérieurs
-            centerline_segments = []
-            
-            for ridge_vertices in vor.ridge_vertices:
-                if -1 not in ridge_vertices:  # Ignorer les segments infinis
-                    # Obtenir les coordonnées des points
-                    p1 = vor.vertices[ridge_vertices[0]]
-                    p2 = vor.vertices[ridge_vertices[1]]
-                    
-                    # Créer un segment de ligne
-                    segment = QgsGeometry.fromPolylineXY([
-                        QgsPointXY(p1[0], p1[1]),
-                        QgsPointXY(p2[0], p2[1])
-                    ])
-                    
-                    # Vérifier que le segment est à l'intérieur du polygone
-                    if geometry.contains(segment):
-                        centerline_segments.append(segment)
-            
-            # Fusionner les segments pour former la centerline
-            if centerline_segments:
-                merged_lines = QgsGeometry.unaryUnion(centerline_segments)
-                
-                # Ne conserver que la plus longue ligne connectée
-                if merged_lines.isMultipart():
-                    lines = merged_lines.asMultiPolyline()
-                    longest_line = lines[0]
-                    max_length = QgsGeometry.fromPolylineXY(longest_line).length()
-                    
-                    for line in lines:
-                        length = QgsGeometry.fromPolylineXY(line).length()
-                        if length > max_length:
-                            longest_line = line
-                            max_length = length
-                    
-                    return QgsGeometry.fromPolylineXY(longest_line)
-                else:
-                    return merged_lines
-            
-        except Exception as e:
-            # Si l'algorithme de Voronoï échoue, revenir à la méthode morphologique
-            self.iface.messageBar().pushWarning(
-                "Centerline",
-                f"Erreur lors du calcul de Voronoï: {str(e)}. Utilisation de la méthode alternative."
+            self.task = CenterlineTask(
+                self.iface, layer, dict(params, profile=bool(report_path or profile_attributes)),
+                copy_attrs, workers, output_path, batch_size, cache_path, report_path, profile_attributes,
+                network
             )
-            return self.generate_morphological_skeleton(geometry)
-        
-        return QgsGeometry()
-    
-    def generate_contour_centerline(self, geometry):
-        """
-        Génère une centerline basée sur le retrait progressif des contours.
-        Cette méthode est particulièrement adaptée aux formes allongées comme les rivières.
-        """
-        # Pour un plugin réel, on utiliserait des algorithmes optimisés.
-        # Ici, on développe une implémentation simplifiée.
-        
-        # Obtenir le contour du polygone
-        if geometry.isMultipart():
-            polygons = geometry.asMultiPolygon()
-            # Prendre le plus grand polygone
-            largest_polygon = polygons[0]
-            max_area = QgsGeometry.fromPolygonXY([largest_polygon[0]]).area()
-            
-            for poly in polygons:
-                area = QgsGeometry.fromPolygonXY([poly[0]]).area()
-                if area > max_area:
-                    largest_polygon = poly
-                    max_area = area
-            
-            current_geom = QgsGeometry.fromPolygonXY([largest_polygon[0]])
-        else:
-            current_geom = geometry.clone()
-        
-        # Calculer la distance de retrait basée sur la largeur approximative
-        bbox = geometry.boundingBox()
-        buffer_distance = min(bbox.width(), bbox.height()) * 0.1
-        
-        # Stocker le squelette en construction
-        shrinking_polygons = []
-        
-        # Réduire progressivement le polygone
-        max_iterations = 20  # Éviter les boucles infinies
-        i = 0
-        
-        while i < max_iterations and not current_geom.isEmpty():
-            shrinking_polygons.append(current_geom.clone())
-            
-            # Réduire le polygone
-            current_geom = current_geom.buffer(-buffer_distance, 5, QgsGeometry.CapRound, QgsGeometry.JoinRound)
-            
-            # Si le polygone devient trop petit ou se divise, arrêter
-            if current_geom.isEmpty() or current_geom.isMultipart():
-                break
-                
-            i += 1
-        
-        # Extraire les centroïdes des polygones en rétrécissement
-        centerline_points = []
-        
-        for poly in shrinking_polygons:
-            center = poly.centroid().asPoint()
-            centerline_points.append(center)
-        
-        # Si on n'a pas assez de points, utiliser une autre méthode
-        if len(centerline_points) <= 2:
-            return self.generate_morphological_skeleton(geometry)
-        
-        # Créer la ligne à partir des points centraux
-        return QgsGeometry.fromPolylineXY(centerline_points)
-    
-    def prune_branches(self, centerline, min_length):
-        """
-        Élague les branches trop courtes de la centerline.
-        Pour un plugin réel, on utiliserait des algorithmes de théorie des graphes.
-        """
-        if centerline.isEmpty():
-            return centerline
-            
-        # Si la centerline est déjà une ligne simple, la renvoyer telle quelle
-        if centerline.type() == QgsWkbTypes.LineGeometry and not centerline.isMultipart():
-            return centerline
-            
-        # Si c'est une multiligne, ne garder que les segments assez longs
-        if centerline.isMultipart():
-            lines = centerline.asMultiPolyline()
-            valid_lines = []
-            
-            for line in lines:
-                line_geom = QgsGeometry.fromPolylineXY(line)
-                if line_geom.length() >= min_length:
-                    valid_lines.append(line)
-            
-            # S'il n'y a plus de lignes valides, renvoyer la plus longue
-            if not valid_lines:
-                longest_line = lines[0]
-                max_length = QgsGeometry.fromPolylineXY(longest_line).length()
-                
-                for line in lines:
-                    length = QgsGeometry.fromPolylineXY(line).length()
-                    if length > max_length:
-                        longest_line = line
-                        max_length = length
-                
-                return QgsGeometry.fromPolylineXY(longest_line)
-            
-            if len(valid_lines) == 1:
-                return QgsGeometry.fromPolylineXY(valid_lines[0])
-            else:
-                # Fusionner les lignes valides si possible
-                multi_line = QgsGeometry.fromMultiPolylineXY(valid_lines)
-                return multi_line
+        except OSError as e:
+            self.iface.messageBar().pushCritical("Centerline", str(e))
+            return
+        QgsApplication.taskManager().addTask(self.task)
         
-        return centerline
+        self.iface.messageBar().pushInfo(
+            "Centerline",
+            "Génération des centerlines en cours..."
+        )
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - mesures de performance
+                                 A QGIS plugin
+ Temps, mémoire de pointe et compteurs par étape et par entité
+ ***************************************************************************/
+"""
+import contextlib
+import csv
+import json
+import threading
+import time
+import tracemalloc
+
+# Étapes mesurées dans le cœur de calcul, dans l'ordre de la chaîne
+STAGES = (
+    "classify", "densify", "skeleton", "voronoi", "ridge_filter", "delaunay", "chord_filter",
+    "prune", "simplify", "width", "encode"
+)
+
+# Compteurs relevés pour chaque entité
+COUNTS = ("input_vertices", "sites", "ridges", "kept_ridges", "output_vertices")
+
+# Nombre d'entités les plus lentes citées dans le rapport
+SLOWEST_COUNT = 20
+
+
+class NullProfiler:
+    """Mesures désactivées : chaque appel se réduit à un retour immédiat."""
+
+    enabled = False
+    _context = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._context
+
+    def count(self, name, value):
+        pass
+
+    def result(self):
+        return None
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class StageProfiler:
+    """
+    Mesures d'une entité : durée et mémoire de pointe (tracemalloc) de
+    chaque étape, et compteurs. Les étapes peuvent être imbriquées (par
+    exemple « voronoi » dans « skeleton ») ou répétées (une fois par tuile) :
+    les durées s'additionnent et la pointe retenue est la plus haute.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.times = {}
+        self.memory = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] - base if tracing else 0
+            with self.lock:
+                self.times[name] = self.times.get(name, 0.0) + elapsed
+                self.memory[name] = max(self.memory.get(name, 0), peak)
+
+    def count(self, name, value):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + int(value)
+
+    def result(self):
+        """Mesures sous forme de dictionnaire sérialisable."""
+        return {
+            "total": time.perf_counter() - self.started,
+            "times": dict(self.times),
+            "memory": dict(self.memory),
+            "counts": dict(self.counts),
+        }
+
+
+@contextlib.contextmanager
+def memory_tracing():
+    """Active tracemalloc le temps du bloc s'il ne l'est pas déjà."""
+    if tracemalloc.is_tracing():
+        yield
+        return
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        tracemalloc.stop()
+
+
+def profile_fields():
+    """Champs (nom, type SQL) ajoutés aux entités de sortie : durées en ms, pointe en Kio, compteurs."""
+    return (
+        [("prof_total_ms", "REAL")]
+        + [(f"prof_{stage}_ms", "REAL") for stage in STAGES]
+        + [("prof_peak_kib", "REAL")]
+        + [(f"prof_{name}", "INTEGER") for name in COUNTS]
+    )
+
+
+def profile_values(profile):
+    """Valeurs alignées sur profile_fields (None pour une entité lue dans le cache)."""
+    if not profile:
+        return [None] * len(profile_fields())
+    times, counts = profile["times"], profile["counts"]
+    return (
+        [profile["total"] * 1000.0]
+        + [times.get(stage, 0.0) * 1000.0 for stage in STAGES]
+        + [max(profile["memory"].values(), default=0) / 1024.0]
+        + [counts.get(name, 0) for name in COUNTS]
+    )
+
+
+class ProfileReport:
+    """
+    Rapport de performance d'un traitement : mesures de chaque entité,
+    totaux par étape et entités les plus lentes. Écrit en JSON ou en CSV
+    selon l'extension du fichier.
+    """
+
+    def __init__(self):
+        self.features = []
+        self.cached = 0
+
+    def add(self, fid, profile, write_time=None):
+        """Enregistre les mesures d'une entité (profile vaut None si elle vient du cache)."""
+        if not profile:
+            self.cached += 1
+            return
+        record = {"fid": fid, **profile}
+        if write_time is not None:
+            record["times"] = dict(profile["times"], write=write_time)
+        self.features.append(record)
+
+    def totals(self):
+        totals = {}
+        for record in self.features:
+            for stage, elapsed in record["times"].items():
+                totals[stage] = totals.get(stage, 0.0) + elapsed
+        return totals
+
+    def slowest(self, count=SLOWEST_COUNT):
+        return sorted(self.features, key=lambda record: record["total"], reverse=True)[:count]
+
+    def summary(self):
+        """Résumé d'une ligne : étape et entité les plus coûteuses."""
+        if not self.features:
+            return f"Aucune mesure ({self.cached} entité(s) lue(s) dans le cache)."
+        totals = self.totals()
+        stage = max(totals, key=totals.get)
+        slowest = self.slowest(1)[0]
+        return (
+            f"Étape la plus coûteuse : {stage} ({totals[stage]:.2f} s) ; "
+            f"entité la plus lente : {slowest['fid']} ({slowest['total']:.2f} s)."
+        )
+
+    def write(self, path):
+        if path.lower().endswith(".csv"):
+            self.write_csv(path)
+        else:
+            self.write_json(path)
+
+    def write_json(self, path):
+        report = {
+            "feature_count": len(self.features),
+            "cached_count": self.cached,
+            "stage_totals": self.totals(),
+            "slowest": [record["fid"] for record in self.slowest()],
+            "features": self.features,
+        }
+        with open(path, "w", encoding="utf-8") as stream:
+            json.dump(report, stream, indent=1, default=str)
+
+    def write_csv(self, path):
+        stages = list(STAGES) + ["write"]
+        with open(path, "w", newline="", encoding="utf-8") as stream:
+            writer = csv.writer(stream)
+            writer.writerow(
+                ["fid", "total_s"] + [f"{stage}_s" for stage in stages]
+                + [f"{stage}_peak_bytes" for stage in STAGES] + list(COUNTS)
+            )
+            for record in self.slowest(len(self.features)):
+                writer.writerow(
+                    [record["fid"], record["total"]]
+                    + [record["times"].get(stage, 0.0) for stage in stages]
+                    + [record["memory"].get(stage, 0) for stage in STAGES]
+                    + [record["counts"].get(name, 0) for name in COUNTS]
+                )
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - squelette raster
+                                 A QGIS plugin
+ Squelette par rastérisation, transformée de distance et amincissement
+ ***************************************************************************/
+"""
+import threading
+
+import numpy as np
+from scipy import ndimage
+
+from .geometry_arrays import polygon_edges
+from .profiling import NULL_PROFILER
+from .scanline import morphological_centerline, scanline_spans
+from .skeleton_graph import SkeletonGraph, graph_lines
+
+# Nombre maximal de cellules d'un raster (borne la mémoire par entité)
+MAX_CELLS = 4000000
+
+# Nombre de cellules visées dans la largeur de l'entité (taille automatique)
+CELLS_PER_WIDTH = 10.0
+
+# Les barbules plus courtes que SPUR_RATIO fois la largeur locale sont des
+# artefacts de la rastérisation (marches d'escalier du contour)
+SPUR_RATIO = 0.5
+
+
+class RasterWorkspace:
+    """
+    Tampons réutilisés d'une entité à l'autre : un lot de polygones de
+    tailles comparables ne provoque qu'une poignée d'allocations. Chaque
+    tampon ne fait que grandir ; les tableaux renvoyés en sont des vues.
+    """
+
+    def __init__(self):
+        self._buffers = {}
+
+    def array(self, name, shape, dtype, fill=None):
+        size = int(np.prod(shape))
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.dtype != dtype or buffer.size < size:
+            buffer = np.empty(size, dtype=dtype)
+            self._buffers[name] = buffer
+        view = buffer[:size].reshape(shape)
+        if fill is not None:
+            view.fill(fill)
+        return view
+
+
+# Un espace de travail par thread (tâches de fond et algorithmes concurrents)
+_local = threading.local()
+
+
+def workspace():
+    """Espace de travail du thread courant."""
+    if not hasattr(_local, "workspace"):
+        _local.workspace = RasterWorkspace()
+    return _local.workspace
+
+
+def auto_cell_size(rings, max_cells=MAX_CELLS):
+    """
+    Taille de cellule : environ CELLS_PER_WIDTH cellules dans la largeur
+    moyenne (2 x aire / périmètre), sans dépasser max_cells cellules. L'aire
+    est la somme des aires des anneaux, ce qui suffit à fixer une résolution.
+    """
+    points = np.concatenate([ring[:-1] for ring in rings])
+    extent = np.ptp(points, axis=0)
+    starts, ends = polygon_edges(rings)
+    perimeter = np.hypot(*(ends - starts).T).sum()
+    area = sum(
+        abs(np.dot(r[:-1, 0], r[1:, 1]) - np.dot(r[1:, 0], r[:-1, 1])) * 0.5 for r in rings
+    )
+    width = 2.0 * area / perimeter if perimeter > 0 else extent.max()
+    return max(width / CELLS_PER_WIDTH, float(np.sqrt(extent[0] * extent[1] / max_cells)), 1e-9)
+
+
+def raster_cell_size(rings, cell_size=None, max_cells=MAX_CELLS):
+    """
+    Taille de cellule effective : cell_size, ou auto_cell_size si absent ou
+    nul, relevée au besoin pour que l'emprise ne dépasse pas max_cells
+    cellules (y compris pour une taille imposée).
+    """
+    if not cell_size:
+        return auto_cell_size(rings, max_cells)
+    points = np.concatenate([ring[:-1] for ring in rings])
+    extent = np.ptp(points, axis=0)
+    return max(cell_size, float(np.sqrt(extent[0] * extent[1] / max_cells)))
+
+
+def rasterize(rings, cell_size, work=None):
+    """
+    Rastérise les anneaux (règle pair-impair) en un masque booléen dont les
+    cellules ont cell_size de côté, entouré d'une marge d'une cellule vide.
+
+    Les intervalles intérieurs de chaque ligne de cellules sont obtenus par
+    le balayage vectorisé de scanline.scanline_spans, puis remplis par une
+    somme cumulée le long des lignes. Renvoie (masque, origine (x, y) du
+    coin inférieur gauche).
+    """
+    work = work or workspace()
+    starts, ends = polygon_edges(rings)
+    low = np.minimum(starts.min(axis=0), ends.min(axis=0)) - cell_size
+    high = np.maximum(starts.max(axis=0), ends.max(axis=0)) + cell_size
+    width, height = np.ceil((high - low) / cell_size).astype(int) + 1
+
+    # Balayage selon les lignes : u = y, v = x
+    rows_y = low[1] + (np.arange(height) + 0.5) * cell_size
+    row_idx, x_start, x_end = scanline_spans(starts[:, ::-1], ends[:, ::-1], rows_y)
+
+    first = np.ceil((x_start - low[0]) / cell_size - 0.5).astype(np.intp)
+    last = np.floor((x_end - low[0]) / cell_size - 0.5).astype(np.intp)
+    keep = last >= first
+    row_idx, first, last = row_idx[keep], first[keep], last[keep]
+
+    marks = work.array("marks", (height, width + 1), np.int32, fill=0)
+    np.add.at(marks, (row_idx, first), 1)
+    np.add.at(marks, (row_idx, last + 1), -1)
+    np.cumsum(marks, axis=1, out=marks)
+
+    mask = work.array("mask", (height, width), bool)
+    np.greater(marks[:, :width], 0, out=mask)
+    return mask, low
+
+
+def thin(mask, work=None):
+    """
+    Amincissement de Zhang-Suen, vectorisé sur toute l'image : à chaque
+    sous-itération, les 8 voisins de chaque cellule sont des vues décalées
+    du masque et les cellules supprimables sont retirées en bloc. Le nombre
+    d'itérations est de l'ordre de la demi-largeur en cellules. Le masque
+    est aminci sur place.
+    """
+    work = work or workspace()
+    shape = (mask.shape[0] - 2, mask.shape[1] - 2)
+    image = mask.view(np.uint8)
+    count = work.array("count", shape, np.uint8)
+    transitions = work.array("transitions", shape, np.uint8)
+    scratch = work.array("scratch", shape, np.uint8)
+    remove = work.array("remove", shape, bool)
+    center = image[1:-1, 1:-1]
+
+    # P2 (nord) à P9 (nord-ouest), dans le sens horaire
+    p2, p3, p4 = image[2:, 1:-1], image[2:, 2:], image[1:-1, 2:]
+    p5, p6, p7 = image[:-2, 2:], image[:-2, 1:-1], image[:-2, :-2]
+    p8, p9 = image[1:-1, :-2], image[2:, :-2]
+    ring = [p2, p3, p4, p5, p6, p7, p8, p9, p2]
+
+    changed = True
+    while changed:
+        changed = False
+        for step in (0, 1):
+            count.fill(0)
+            transitions.fill(0)
+            for a, b in zip(ring[:-1], ring[1:]):
+                np.add(count, a, out=count)
+                np.greater(b, a, out=scratch)
+                np.add(transitions, scratch, out=transitions)
+
+            np.greater_equal(count, 2, out=remove)
+            remove &= count <= 6
+            remove &= transitions == 1
+            remove &= center != 0
+            if step == 0:
+                remove &= (p2 & p4 & p6) == 0
+                remove &= (p4 & p6 & p8) == 0
+            else:
+                remove &= (p2 & p4 & p8) == 0
+                remove &= (p2 & p6 & p8) == 0
+
+            if remove.any():
+                center[remove] = 0
+                changed = True
+    return mask
+
+
+def pixel_graph(skeleton, origin, cell_size):
+    """
+    Graphe des cellules du squelette (8-connexité). Une liaison diagonale est
+    ignorée lorsque les deux cellules sont déjà reliées par un voisin commun
+    orthogonal, afin de ne pas créer de triangles parasites.
+    """
+    rows, cols = np.nonzero(skeleton)
+    labels = np.full(skeleton.shape, -1, dtype=np.intp)
+    labels[rows, cols] = np.arange(len(rows))
+
+    s = skeleton
+    pairs = [
+        (labels[:, :-1], labels[:, 1:], s[:, :-1] & s[:, 1:]),
+        (labels[:-1, :], labels[1:, :], s[:-1, :] & s[1:, :]),
+        (labels[:-1, :-1], labels[1:, 1:],
+         s[:-1, :-1] & s[1:, 1:] & ~s[:-1, 1:] & ~s[1:, :-1]),
+        (labels[:-1, 1:], labels[1:, :-1],
+         s[:-1, 1:] & s[1:, :-1] & ~s[:-1, :-1] & ~s[1:, 1:]),
+    ]
+    edges = np.concatenate([
+        np.column_stack([a[linked], b[linked]]) for a, b, linked in pairs
+    ])
+    coords = origin + (np.column_stack([cols, rows]) + 0.5) * cell_size
+    return SkeletonGraph(coords, edges), rows, cols
+
+
+def raster_skeleton_graph(rings, cell_size=None, max_cells=MAX_CELLS):
+    """
+    Squelette d'un polygone par la voie raster : rastérisation, transformée
+    de distance euclidienne (scipy.ndimage), amincissement puis conversion
+    des cellules du squelette en graphe. Le coût dépend de la surface du
+    raster et non du nombre de sommets.
+
+    La transformée de distance donne la demi-largeur locale en chaque cellule
+    du squelette ; elle sert à éliminer les barbules dues aux marches
+    d'escalier du contour. Renvoie un SkeletonGraph.
+    """
+    cell_size = raster_cell_size(rings, cell_size, max_cells)
+
+    work = workspace()
+    mask, origin = rasterize(rings, cell_size, work)
+    distance = ndimage.distance_transform_edt(mask, sampling=cell_size)
+    skeleton = thin(mask, work)
+
+    graph, rows, cols = pixel_graph(skeleton, origin, cell_size)
+    if graph.is_empty():
+        return graph
+
+    radii = distance[rows[graph.source_ids], cols[graph.source_ids]]
+    return graph.prune(cell_size, radii, SPUR_RATIO)
+
+
+def contour_centroids(rings, step, max_levels=20, cell_size=None, max_cells=MAX_CELLS):
+    """
+    Centroïdes des retraits successifs du polygone, de step en step.
+
+    Le polygone rétréci d'une distance d est l'ensemble des cellules dont la
+    transformée de distance dépasse d : une seule rastérisation et une seule
+    transformée remplacent les tampons négatifs successifs. Le retrait
+    s'arrête lorsque le polygone disparaît ou se divise (plusieurs
+    composantes connexes), au plus après max_levels niveaux. Renvoie les
+    centroïdes (M, 2), le premier étant celui du polygone d'origine.
+    """
+    cell_size = raster_cell_size(rings, cell_size, max_cells)
+
+    work = workspace()
+    mask, origin = rasterize(rings, cell_size, work)
+    distance = ndimage.distance_transform_edt(mask, sampling=cell_size)
+
+    rows, cols = np.nonzero(mask)
+    depth = distance[rows, cols]
+    centers = origin + (np.column_stack([cols, rows]) + 0.5) * cell_size
+
+    centroids = []
+    for level in range(max_levels):
+        inside = depth > level * step
+        if not inside.any():
+            break
+        if level > 0 and ndimage.label(distance > level * step)[1] > 1:
+            break
+        centroids.append(centers[inside].mean(axis=0))
+    return np.array(centroids).reshape(-1, 2)
+
+
+def raster_lines(shape, params, profiler=NULL_PROFILER):
+    """
+    Centerline par la voie raster : le polygone est rastérisé à
+    params["cell_size"] (automatique si absent ou nul), puis squelettisé par
+    transformée de distance et amincissement (voir raster_skeleton_graph).
+    Le coût dépend de la surface du raster et non du nombre de sommets.
+    """
+    return graph_lines(raster_skeleton_graph(shape.rings, params.get("cell_size")), params)
+
+
+def contour_lines(shape, params, profiler=NULL_PROFILER):
+    """
+    Centerline basée sur le retrait progressif des contours.
+    Cette méthode est particulièrement adaptée aux formes allongées comme les rivières.
+
+    Les retraits successifs (un dixième de la plus petite dimension de
+    l'emprise) sont lus sur la transformée de distance du polygone
+    rastérisé (voir contour_centroids) ; la ligne relie
+    leurs centroïdes. Chaque partie est traitée séparément.
+    """
+    points = np.concatenate([ring[:-1] for ring in shape.rings])
+    step = np.ptp(points, axis=0).min() * 0.1
+
+    lines = []
+    for rings in shape.polygons:
+        centroids = contour_centroids(rings, step, cell_size=params.get("cell_size"))
+
+        # Si on n'a pas assez de points, utiliser une autre méthode
+        if len(centroids) <= 2:
+            centroids = morphological_centerline(rings)
+
+        if len(centroids) > 1:
+            lines.append(centroids)
+    return lines
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - balayage par tranches
+                                 A QGIS plugin
+ Moteur de balayage vectorisé de la méthode morphologique
+ ***************************************************************************/
+"""
+import numpy as np
+
+from .geometry_arrays import expand_ranges, polygon_edges, principal_axis
+from .profiling import NULL_PROFILER
+
+# Bornes du nombre de tranches par entité
+MIN_SLICES = 50
+MAX_SLICES = 20000
+
+# Épaisseur d'une tranche rapportée à la largeur de l'entité
+SLICE_RATIO = 0.05
+
+
+def slice_count(length, width, min_slices=MIN_SLICES, max_slices=MAX_SLICES):
+    """Nombre de tranches proportionnel à l'allongement de l'entité."""
+    if width <= 0:
+        return min_slices
+    return int(np.clip(length / (width * SLICE_RATIO), min_slices, max_slices))
+
+
+def scanline_spans(starts, ends, positions):
+    """
+    Intervalles intérieurs le long des lignes de balayage u = positions[k],
+    calculés en une passe sur les tableaux d'arêtes (coordonnées (u, v)).
+
+    Pour chaque arête, les lignes qu'elle traverse forment une plage
+    contiguë de positions triées ; toutes les intersections sont calculées
+    d'un bloc, triées par (ligne, v) puis appariées deux à deux (règle
+    pair-impair). Renvoie (indice de ligne, v de début, v de fin) pour chaque
+    intervalle.
+    """
+    u0, v0 = starts[:, 0], starts[:, 1]
+    u1, v1 = ends[:, 0], ends[:, 1]
+
+    # Règle demi-ouverte : chaque ligne coupe un nombre pair d'arêtes
+    lo = np.searchsorted(positions, np.minimum(u0, u1), side='left')
+    hi = np.searchsorted(positions, np.maximum(u0, u1), side='left')
+    edge_idx, line_idx = expand_ranges(lo, hi - lo)
+    if len(line_idx) == 0:
+        empty = np.zeros(0)
+        return np.zeros(0, dtype=np.intp), empty, empty
+
+    eu0, ev0 = u0[edge_idx], v0[edge_idx]
+    v = ev0 + (positions[line_idx] - eu0) * (v1[edge_idx] - ev0) / (u1[edge_idx] - eu0)
+
+    order = np.lexsort((v, line_idx))
+    line_idx, v = line_idx[order], v[order]
+    return line_idx[0::2], v[0::2], v[1::2]
+
+
+def morphological_centerline(rings, min_slices=MIN_SLICES, max_slices=MAX_SLICES):
+    """
+    Ligne médiane approchée par tranches, orientée selon l'axe principal.
+
+    Les anneaux sont exprimés dans le repère de leur axe principal (ACP), de
+    sorte que les entités nord-sud sont tranchées dans leur longueur. Le
+    nombre de tranches croît avec l'allongement de l'entité ; pour chaque
+    tranche, le milieu du plus long intervalle intérieur est retenu. Renvoie
+    les points de la ligne (M, 2) dans le repère d'origine.
+    """
+    points = np.concatenate([ring[:-1] for ring in rings])
+    center, direction = principal_axis(points)
+    normal = np.array([-direction[1], direction[0]])
+    frame = np.column_stack([direction, normal])
+
+    starts, ends = polygon_edges([(ring - center) @ frame for ring in rings])
+    u_min = min(starts[:, 0].min(), ends[:, 0].min())
+    u_max = max(starts[:, 0].max(), ends[:, 0].max())
+    v_extent = max(starts[:, 1].max(), ends[:, 1].max()) - min(starts[:, 1].min(), ends[:, 1].min())
+
+    count = slice_count(u_max - u_min, v_extent, min_slices, max_slices)
+    step = (u_max - u_min) / count
+    positions = u_min + (np.arange(count) + 0.5) * step
+
+    line_idx, v_start, v_end = scanline_spans(starts, ends, positions)
+    if len(line_idx) == 0:
+        return np.zeros((0, 2))
+
+    # Plus long intervalle de chaque tranche : le dernier après tri par longueur
+    order = np.lexsort((v_end - v_start, line_idx))
+    line_idx, v_start, v_end = line_idx[order], v_start[order], v_end[order]
+    last = np.r_[line_idx[1:] != line_idx[:-1], True]
+
+    u = positions[line_idx[last]]
+    v = (v_start[last] + v_end[last]) * 0.5
+    return center + np.column_stack([u, v]) @ frame.T
+
+
+def morphological_lines(shape, params=None, profiler=NULL_PROFILER):
+    """
+    Squelette morphologique approché : le polygone est tranché
+    perpendiculairement à son axe principal et le milieu du plus long
+    intervalle intérieur de chaque tranche est retenu (voir
+    scanline.morphological_centerline). Chaque partie donne sa ligne.
+    """
+    lines = [morphological_centerline(rings) for rings in shape.polygons]
+    return [points for points in lines if len(points) > 1]
@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - graphe de squelette
+                                 A QGIS plugin
+ Représentation compacte (CSR) d'un squelette sous forme de graphe
+ ***************************************************************************/
+"""
+import heapq
+import itertools
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+
+
+class SkeletonGraph:
+    """
+    Graphe non orienté d'un squelette (sommets Voronoï et segments conservés).
+
+    Les sommets sont renumérotés de façon compacte et l'adjacence est stockée
+    au format CSR : les voisins du sommet i sont
+    indices[indptr[i]:indptr[i + 1]] et edge_ids donne, pour chaque entrée,
+    l'indice de l'arête correspondante dans edges.
+    """
+
+    def __init__(self, coords, edges):
+        coords = np.asarray(coords, dtype=float)
+        edges = np.asarray(edges, dtype=np.intp).reshape(-1, 2)
+
+        # Supprimer les boucles et les arêtes en double
+        edges = edges[edges[:, 0] != edges[:, 1]]
+        edges = np.unique(np.sort(edges, axis=1), axis=0)
+
+        # Renuméroter les seuls sommets utilisés
+        used, inverse = np.unique(edges, return_inverse=True)
+        self.coords = coords[used]
+        self.source_ids = used
+        self.edges = inverse.reshape(-1, 2).astype(np.intp)
+
+        delta = self.coords[self.edges[:, 1]] - self.coords[self.edges[:, 0]]
+        self.lengths = np.hypot(delta[:, 0], delta[:, 1])
+
+        # Adjacence CSR symétrique
+        n = len(self.coords)
+        m = len(self.edges)
+        heads = np.concatenate([self.edges[:, 0], self.edges[:, 1]])
+        tails = np.concatenate([self.edges[:, 1], self.edges[:, 0]])
+        order = np.argsort(heads, kind='stable')
+
+        self.indptr = np.zeros(n + 1, dtype=np.intp)
+        np.cumsum(np.bincount(heads, minlength=n), out=self.indptr[1:])
+        self.indices = tails[order]
+        self.edge_ids = np.concatenate([np.arange(m), np.arange(m)])[order]
+        self.degree = np.diff(self.indptr)
+
+    @property
+    def vertex_count(self):
+        return len(self.coords)
+
+    @property
+    def edge_count(self):
+        return len(self.edges)
+
+    def is_empty(self):
+        return len(self.edges) == 0
+
+    def matrix(self):
+        """Matrice d'adjacence pondérée par la longueur des arêtes."""
+        n = self.vertex_count
+        return csr_matrix(
+            (self.lengths[self.edge_ids], self.indices, self.indptr),
+            shape=(n, n)
+        )
+
+    def components(self):
+        """Renvoie (nombre de composantes, étiquette de chaque sommet)."""
+        return connected_components(self.matrix(), directed=False)
+
+    def main_component(self):
+        """Étiquette de la composante connexe de plus grande longueur totale."""
+        count, labels = self.components()
+        if count == 1:
+            return labels, 0
+        totals = np.bincount(labels[self.edges[:, 0]], weights=self.lengths, minlength=count)
+        return labels, int(np.argmax(totals))
+
+    def diameter_path(self):
+        """
+        Tronc principal : chemin le plus long (au sens des plus courts chemins)
+        de la plus grande composante, obtenu par deux passes de Dijkstra.
+        Renvoie la suite des indices de sommets.
+        """
+        if self.is_empty():
+            return np.zeros(0, dtype=np.intp)
+
+        labels, main = self.main_component()
+        graph = self.matrix()
+
+        start = int(np.flatnonzero(labels == main)[0])
+        distances = dijkstra(graph, directed=False, indices=start)
+        distances[~np.isfinite(distances)] = -1.0
+        first = int(np.argmax(distances))
+
+        distances, predecessors = dijkstra(
+            graph, directed=False, indices=first, return_predecessors=True
+        )
+        distances[~np.isfinite(distances)] = -1.0
+        last = int(np.argmax(distances))
+
+        path = [last]
+        while path[-1] != first:
+            path.append(int(predecessors[path[-1]]))
+        return np.array(path[::-1], dtype=np.intp)
+
+    def diameter_paths(self):
+        """
+        Tronc de chaque composante connexe (une par partie d'un polygone
+        multiple) : diamètre de la composante, obtenu comme diameter_path
+        mais pour toutes les composantes à la fois (deux passes de Dijkstra
+        à sources multiples). Renvoie une liste de suites d'indices de
+        sommets, par longueur décroissante.
+        """
+        if self.is_empty():
+            return []
+
+        count, labels = self.components()
+        graph = self.matrix()
+
+        def farthest(distances):
+            # Sommet le plus éloigné de sa source dans chaque composante
+            order = np.lexsort((distances, labels))
+            last = np.flatnonzero(np.r_[labels[order][1:] != labels[order][:-1], True])
+            return order[last]
+
+        starts = np.unique(labels, return_index=True)[1]
+        distances = dijkstra(graph, directed=False, indices=starts, min_only=True)
+        firsts = farthest(distances)
+
+        # Avec min_only, dijkstra renvoie aussi la source de chaque sommet
+        distances, predecessors = dijkstra(
+            graph, directed=False, indices=firsts, min_only=True, return_predecessors=True
+        )[:2]
+        lasts = farthest(distances)
+
+        paths = []
+        for first, last in zip(firsts.tolist(), lasts.tolist()):
+            path = [last]
+            while path[-1] != first:
+                path.append(int(predecessors[path[-1]]))
+            paths.append(np.array(path[::-1], dtype=np.intp))
+        lengths = distances[lasts]
+        return [paths[i] for i in np.argsort(-lengths, kind="stable")]
+
+    def chains(self):
+        """
+        Décompose le graphe en chaînes : suites de sommets de degré 2 reliant
+        deux nœuds (extrémités ou jonctions). Les cycles isolés sont renvoyés
+        fermés. Chaque chaîne est un tableau d'indices de sommets ; ce sont les
+        branches du squelette.
+        """
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        edge_ids = self.edge_ids.tolist()
+        degree = self.degree.tolist()
+        visited = bytearray(self.edge_count)
+        chains = []
+
+        def walk(node, k):
+            edge = edge_ids[k]
+            visited[edge] = 1
+            path = [node]
+            current = indices[k]
+            while degree[current] == 2 and current != node:
+                path.append(current)
+                k = indptr[current]
+                if edge_ids[k] == edge:
+                    k += 1
+                edge = edge_ids[k]
+                visited[edge] = 1
+                current = indices[k]
+            path.append(current)
+            return np.array(path, dtype=np.intp)
+
+        for node in np.flatnonzero(self.degree != 2).tolist():
+            for k in range(indptr[node], indptr[node + 1]):
+                if not visited[edge_ids[k]]:
+                    chains.append(walk(node, k))
+
+        # Cycles composés uniquement de sommets de degré 2
+        for edge in np.flatnonzero(np.frombuffer(bytes(visited), dtype=np.uint8) == 0).tolist():
+            if visited[edge]:
+                continue
+            node = int(self.edges[edge, 0])
+            k = indptr[node] if edge_ids[indptr[node]] == edge else indptr[node] + 1
+            chains.append(walk(node, k))
+
+        return chains
+
+    def path_length(self, path):
+        """Longueur d'un chemin donné par ses indices de sommets."""
+        delta = np.diff(self.coords[path], axis=0)
+        return float(np.hypot(delta[:, 0], delta[:, 1]).sum())
+
+    def prune(self, min_length, radii=None, width_factor=None):
+        """
+        Élague itérativement les branches terminales (chaînes reliant une
+        extrémité à une jonction) plus courtes que le seuil.
+
+        Le seuil vaut min_length, ou, si width_factor est fourni, width_factor
+        fois la largeur locale (2 x radii) à la jonction de rattachement ; la
+        longueur d'une branche est alors diminuée de la baisse de la
+        demi-largeur entre la jonction et l'extrémité, qui mesure la part de
+        la branche due au seul rétrécissement du contour : une branche allant
+        dans un coin, dont la longueur est de l'ordre de la demi-largeur, est
+        ainsi supprimée quelle que soit la position de sa jonction. Les
+        branches candidates sont traitées dans une file de priorité ordonnée
+        par longueur relative au seuil ; la suppression d'une branche peut
+        réduire une jonction au degré 2. Si l'une des deux chaînes restantes
+        est elle-même une branche terminale sous le seuil (les deux coins
+        d'une extrémité), elle est supprimée aussi ; sinon elles sont
+        fusionnées et la branche résultante redevient candidate.
+
+        Renvoie un nouveau SkeletonGraph ne contenant que les arêtes conservées.
+        """
+        chains = self.chains()
+        if not chains:
+            return self
+
+        # Chaînes de base : extrémités, longueur et parent après fusion
+        ends = [(int(c[0]), int(c[-1])) for c in chains]
+        lengths = [self.path_length(c) for c in chains]
+        parent = list(range(len(chains)))
+        alive = [True] * len(chains)
+        removed = [False] * len(chains)
+
+        degree = self.degree.copy()
+        incident = {}
+        for cid, (u, v) in enumerate(ends):
+            incident.setdefault(u, set()).add(cid)
+            incident.setdefault(v, set()).add(cid)
+
+        scaled = width_factor is not None and radii is not None
+
+        def threshold(node):
+            if scaled:
+                return width_factor * 2.0 * float(radii[node])
+            return min_length
+
+        def ratio(cid, junction):
+            # Longueur de la branche cid rattachée à junction, relative au seuil
+            limit = threshold(junction)
+            if limit <= 0:
+                return None
+            length = lengths[cid]
+            if scaled:
+                u, v = ends[cid]
+                leaf = u if junction == v else v
+                length -= max(0.0, float(radii[junction] - radii[leaf]))
+            return length / limit
+
+        # Le compteur départage les égalités : une même chaîne peut être mise
+        # deux fois en file, et les jonctions (None pour une composante
+        # isolée) ne sont jamais comparées
+        heap = []
+        order = itertools.count()
+
+        def push(cid):
+            u, v = ends[cid]
+            if u == v:
+                return
+            if degree[u] == 1 and degree[v] >= 3:
+                junction = v
+            elif degree[v] == 1 and degree[u] >= 3:
+                junction = u
+            elif degree[u] == 1 and degree[v] == 1:
+                if min_length > 0:
+                    heapq.heappush(heap, (lengths[cid] / min_length, next(order), cid, None))
+                return
+            else:
+                return
+            value = ratio(cid, junction)
+            if value is not None:
+                heapq.heappush(heap, (value, next(order), cid, junction))
+
+        def is_spur(cid, junction):
+            # Branche terminale rattachée à junction et plus courte que le seuil
+            u, v = ends[cid]
+            leaf = u if junction == v else v
+            if u == v or degree[leaf] != 1:
+                return False
+            value = ratio(cid, junction)
+            return value is not None and value < 1.0
+
+        def remove(cid, leaf, junction):
+            alive[cid] = False
+            removed[cid] = True
+            incident[junction].discard(cid)
+            incident[leaf].discard(cid)
+            degree[leaf] -= 1
+            degree[junction] -= 1
+
+        for cid in range(len(chains)):
+            push(cid)
+
+        longest = max(range(len(chains)), key=lengths.__getitem__)
+
+        while heap:
+            value, _, cid, junction = heapq.heappop(heap)
+            if value >= 1.0:
+                break
+            if not alive[cid]:
+                continue
+
+            u, v = ends[cid]
+            if junction is None:
+                # Composante isolée : ne supprimer que si plus courte que le
+                # seuil et qu'il reste une chaîne plus longue ailleurs
+                if cid == longest or not (degree[u] == 1 and degree[v] == 1):
+                    continue
+                alive[cid] = False
+                removed[cid] = True
+                continue
+
+            leaf = u if junction == v else v
+            if degree[leaf] != 1 or degree[junction] < 3:
+                continue
+
+            remove(cid, leaf, junction)
+
+            remaining = list(incident[junction])
+            if degree[junction] == 2 and len(remaining) == 2:
+                spurs = [other for other in remaining if is_spur(other, junction)]
+                if len(spurs) == 1:
+                    # Branche sœur sous le seuil : supprimée, et non fusionnée
+                    # avec la chaîne restante qui s'arrête à la jonction
+                    a, b = ends[spurs[0]]
+                    remove(spurs[0], a if b == junction else b, junction)
+                    remaining = list(incident[junction])
+            if degree[junction] == 1 and remaining:
+                push(remaining[0])
+            elif degree[junction] == 2 and len(remaining) == 2:
+                # Fusionner les deux chaînes restantes en une seule branche
+                a, b = remaining
+                other_a = ends[a][1] if ends[a][0] == junction else ends[a][0]
+                other_b = ends[b][1] if ends[b][0] == junction else ends[b][0]
+                merged = len(ends)
+                ends.append((other_a, other_b))
+                lengths.append(lengths[a] + lengths[b])
+                parent.append(merged)
+                alive.append(True)
+                removed.append(False)
+                for old in (a, b):
+                    alive[old] = False
+                    parent[old] = merged
+                    for node in ends[old]:
+                        incident[node].discard(old)
+                incident[other_a].add(merged)
+                incident[other_b].add(merged)
+                incident[junction] = set()
+                if lengths[merged] > lengths[longest]:
+                    longest = merged
+                push(merged)
+
+        def is_removed(cid):
+            # Remonter les fusions successives avec compression de chemin
+            root = cid
+            while parent[root] != root and not removed[root]:
+                root = parent[root]
+            flag = removed[root]
+            while parent[cid] != cid and cid != root:
+                parent[cid], cid = root, parent[cid]
+            return flag
+
+        kept = [chains[cid] for cid in range(len(chains)) if not is_removed(cid)]
+        if not kept:
+            return self
+        edges = np.concatenate([np.column_stack([c[:-1], c[1:]]) for c in kept])
+        return SkeletonGraph(self.coords, edges)
+
+    @classmethod
+    def from_polylines(cls, lines):
+        """
+        Construit un graphe à partir de polylignes (tableaux (N, 2)) : les
+        sommets de mêmes coordonnées sont fusionnés.
+        """
+        lines = [np.asarray(line, dtype=float) for line in lines if len(line) > 1]
+        if not lines:
+            return cls(np.zeros((0, 2)), np.zeros((0, 2), dtype=np.intp))
+        coords = np.concatenate(lines)
+        unique, inverse = np.unique(coords, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        offsets = np.cumsum([0] + [len(line) for line in lines])
+        starts = np.concatenate([np.arange(a, b - 1) for a, b in zip(offsets[:-1], offsets[1:])])
+        edges = np.column_stack([inverse[starts], inverse[starts + 1]])
+        return cls(unique, edges)
+
+
+def graph_lines(graph, params):
+    """
+    Lignes renvoyées par un moteur de squelette : toutes les branches du
+    graphe si elles doivent être élaguées (params["prune"], le tronc est
+    alors extrait après l'élagage) ou conservées (params["all_branches"]),
+    sinon le tronc (diamètre) de chaque composante connexe, c'est-à-dire de
+    chaque partie du polygone.
+    """
+    if graph.is_empty():
+        return []
+    if params["prune"] or params.get("all_branches"):
+        return [graph.coords[chain] for chain in graph.chains()]
+    return [graph.coords[path] for path in graph.diameter_paths()]
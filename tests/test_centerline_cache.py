@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""
+Tests du cache SQLite des centerlines (CenterlineCache).
+
+Lancement (depuis le dossier parent du plugin ou depuis le plugin) :
+    python -m pytest -q
+"""
+from ..centerline_cache import CenterlineCache
+
+
+def test_shared_file_respects_max_size(tmp_path):
+    """Deux connexions au même fichier : la borne max_size vaut pour leur total."""
+    path = str(tmp_path / "cache.sqlite")
+    first = CenterlineCache(path, max_size=1000)
+    second = CenterlineCache(path, max_size=1000)
+    for index in range(10):
+        for cache in (first, second):
+            cache.put(f"{id(cache)}-{index}", b"x" * 100, None, {})
+
+    total = first._connect().execute("SELECT SUM(size) FROM centerlines").fetchone()[0]
+    assert total <= 1000
+    first.close()
+    second.close()
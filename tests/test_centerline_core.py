@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+Tests du cœur de calcul (compute_centerline), sans QGIS.
+"""
+import numpy as np
+import pytest
+
+from ..centerline_core import DEFAULT_PARAMS, compute_centerline
+
+
+def rectangle(x0, y0, x1, y1):
+    return np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]], dtype=float)
+
+
+@pytest.mark.parametrize("method", ["VORONOI", "CHORDAL", "RASTER"])
+def test_multipart_gives_one_line_per_part(method):
+    # Trois bandes disjointes, paramètres par défaut : un seul calcul pour
+    # toutes les parties, et le tronc de chacune
+    polygons = [[rectangle(0, y, 200, y + 10)] for y in (0, 40, 80)]
+    lines, message, _ = compute_centerline(polygons, dict(DEFAULT_PARAMS, method=method))
+    assert message is None
+    assert len(lines) == 3
+    # Chaque ligne reste dans sa bande, et chaque bande a la sienne
+    bands = sorted(int(line[:, 1].min() // 40) for line in lines)
+    assert bands == [0, 1, 2]
+    for line in lines:
+        assert np.ptp(line[:, 1]) <= 10 and np.ptp(line[:, 0]) > 150
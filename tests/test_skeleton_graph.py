@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de l'élagage des branches (SkeletonGraph.prune).
+
+Lancement (depuis le dossier parent du plugin ou depuis le plugin) :
+    python -m pytest -q
+"""
+import numpy as np
+
+from ..skeleton_graph import SkeletonGraph
+
+
+def rectangle_skeleton():
+    """Axe médian d'une bande 100 x 20 : tronc et deux barbules de coin à chaque bout."""
+    coords = np.array([[10, 10], [90, 10], [0, 0], [0, 20], [100, 0], [100, 20]], dtype=float)
+    edges = [[0, 1], [0, 2], [0, 3], [1, 4], [1, 5]]
+    return SkeletonGraph(coords, edges)
+
+
+def test_prune_keeps_trunk_reached_twice():
+    # Après la suppression des barbules, le tronc est remis en file par sa
+    # jonction puis comme composante isolée, avec la même longueur relative
+    pruned = rectangle_skeleton().prune(20.0)
+    chains = pruned.chains()
+    assert len(chains) == 1
+    assert sorted(map(tuple, pruned.coords[chains[0]])) == [(10.0, 10.0), (90.0, 10.0)]
+
+
+def test_prune_width_drops_corner_spurs():
+    graph = rectangle_skeleton()
+    # Demi-largeur : distance au bord de la bande
+    x, y = graph.coords.T
+    radii = np.minimum(np.minimum(y, 20 - y), np.minimum(x, 100 - x))
+    pruned = graph.prune(5.0, radii, 1.0)
+    assert pruned.edge_count == 1
+    assert np.isclose(pruned.lengths.sum(), 80.0)
+
+
+def test_diameter_paths_one_per_component():
+    # Deux composantes : un tronc avec une branche, et un segment isolé
+    coords = np.array([[0, 0], [10, 0], [20, 0], [10, 3], [0, 50], [5, 50]], dtype=float)
+    graph = SkeletonGraph(coords, [[0, 1], [1, 2], [1, 3], [4, 5]])
+    paths = graph.diameter_paths()
+    assert [len(path) for path in paths] == [3, 2]
+    assert sorted(graph.coords[paths[0]][[0, -1], 0]) == [0.0, 20.0]
+    assert np.isclose(graph.path_length(paths[1]), 5.0)
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - squelette de Voronoï
+                                 A QGIS plugin
+ Squelette de Voronoï d'un polygone, d'un seul tenant ou par tuiles
+ ***************************************************************************/
+"""
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import Voronoi, cKDTree
+
+from .geometry_arrays import general_position, jitter_scale, principal_axis, ring_neighbours
+from .method_registry import DEFAULT_MAX_TILE_VERTICES
+from .profiling import NULL_PROFILER
+from .skeleton_graph import SkeletonGraph, graph_lines
+
+
+def _voronoi(sites, scale=None):
+    """
+    Diagramme de Voronoï des sites : (sommets, segments finis, sites de
+    chaque segment). scale est l'amplitude de la perturbation des sites
+    (voir general_position).
+    """
+    local, origin = general_position(sites, scale)
+    vor = Voronoi(local)
+    ridges, ridge_points = _finite_ridges(vor)
+    return vor.vertices + origin, ridges, ridge_points
+
+
+def _finite_ridges(vor):
+    """Segments Voronoï finis : (indices des sommets, indices des sites)."""
+    ridges = np.asarray(vor.ridge_vertices, dtype=np.intp).reshape(-1, 2)
+    finite = (ridges >= 0).all(axis=1)  # Ignorer les segments infinis
+    return ridges[finite], np.asarray(vor.ridge_points, dtype=np.intp)[finite]
+
+
+def _drop_edge_bisectors(ridges, ridge_points, labels):
+    """
+    Écarte les médiatrices des arêtes du contour (segments séparant deux
+    sommets consécutifs d'un même anneau) : elles aboutissent sur le contour
+    et ne peuvent pas être intérieures, inutile de les tester.
+    """
+    if labels is None:
+        return ridges, ridge_points
+    keep = ~ring_neighbours(ridge_points, labels)
+    return ridges[keep], ridge_points[keep]
+
+
+def voronoi_graph(sites, edges, labels=None, profiler=NULL_PROFILER):
+    """
+    Graphe du squelette : segments Voronoï des sites entièrement intérieurs
+    au polygone dont edges (BoundaryEdges) décrit le contour. labels donne
+    le numéro d'anneau de chaque site (voir PolygonRings.sites). Les étapes
+    « voronoi » et « ridge_filter » sont mesurées par profiler.
+    """
+    with profiler.stage("voronoi"):
+        vertices, ridges, ridge_points = _voronoi(sites)
+    with profiler.stage("ridge_filter"):
+        ridges, _ = _drop_edge_bisectors(ridges, ridge_points, labels)
+        inside = edges.interior_segments(vertices, ridges)
+    profiler.count("sites", len(sites))
+    profiler.count("ridges", len(ridges))
+    profiler.count("kept_ridges", np.count_nonzero(inside))
+    return SkeletonGraph(vertices, ridges[inside])
+
+
+def _skeleton_tile(sites, position, axis, edges, lo, hi, overlap, labels=None, scale=None,
+                   profiler=NULL_PROFILER):
+    """
+    Squelette d'une tuile : segments intérieurs dont le milieu se projette
+    dans [lo, hi) sur l'axe principal.
+
+    Les sites chargés couvrent [lo - overlap, hi + overlap]. Un sommet Voronoï
+    de la tuile est un sommet du diagramme complet si son cercle vide tient
+    entièrement dans cette bande : aucun site écarté ne peut s'y trouver.
+    Tant que ce n'est pas le cas, le recouvrement est doublé.
+    """
+    first, last = position.min(), position.max()
+    while True:
+        band_lo, band_hi = lo - overlap, hi + overlap
+        selected = (position >= band_lo) & (position <= band_hi)
+        complete_lo, complete_hi = band_lo <= first, band_hi >= last
+        tile_ids = np.flatnonzero(selected)
+        tile_sites = sites[tile_ids]
+        if len(tile_sites) < 4:
+            return np.zeros((0, 2)), np.zeros((0, 2), dtype=np.intp)
+
+        with profiler.stage("voronoi"):
+            vertices, ridges, ridge_points = _voronoi(tile_sites, scale)
+
+        with profiler.stage("ridge_filter"):
+            ridges, ridge_points = _drop_edge_bisectors(ridges, tile_ids[ridge_points], labels)
+
+            # Ne garder que les segments du cœur de la tuile
+            axis_center, axis_dir = axis
+            mid = vertices[ridges].mean(axis=1)
+            mid_position = (mid - axis_center) @ axis_dir
+            core = (mid_position >= lo) & (mid_position < hi)
+            ridges, ridge_points = ridges[core], ridge_points[core]
+            tested = len(ridges)
+
+            inside = edges.interior_segments(vertices, ridges)
+            ridges, ridge_points = ridges[inside], ridge_points[inside]
+        if len(ridges) == 0 or (complete_lo and complete_hi):
+            profiler.count("ridges", tested)
+            profiler.count("kept_ridges", len(ridges))
+            return vertices, ridges
+
+        # Rayon du cercle vide de chaque extrémité (distance à un site du segment)
+        ends = vertices[ridges]
+        radius = np.hypot(*(ends - sites[ridge_points[:, :1]]).transpose(2, 0, 1))
+        end_position = (ends - axis_center) @ axis_dir
+        valid = complete_lo or bool(np.all(end_position - radius >= band_lo))
+        valid = valid and (complete_hi or bool(np.all(end_position + radius <= band_hi)))
+        if valid:
+            profiler.count("ridges", tested)
+            profiler.count("kept_ridges", len(ridges))
+            return vertices, ridges
+        overlap *= 2.0
+
+
+def tiled_voronoi_graph(sites, edges, max_vertices=DEFAULT_MAX_TILE_VERTICES, workers=1, labels=None,
+                        profiler=NULL_PROFILER):
+    """
+    Squelette de Voronoï par tuiles, pour les polygones dont le nombre de
+    sites dépasse max_vertices.
+
+    Les sites sont découpés en bandes perpendiculaires à l'axe principal,
+    chacune contenant au plus max_vertices sites (quantiles de la
+    projection). Chaque bande est squelettisée séparément, éventuellement en
+    parallèle, avec un recouvrement suffisant pour que ses sommets soient
+    ceux du diagramme complet ; les squelettes partiels sont ensuite recousus
+    aux jonctions en fusionnant les extrémités confondues. La mémoire de pointe
+    dépend ainsi de la taille des tuiles et non de celle de l'entité.
+
+    Avec labels (numéro d'anneau de chaque site), les sites de tous les
+    anneaux, îles comprises, sont traités dans un même diagramme et les
+    médiatrices des arêtes du contour sont écartées avant le test
+    d'intériorité. Les durées des tuiles s'additionnent dans profiler.
+    """
+    sites = np.asarray(sites, dtype=float)
+    tile_count = int(math.ceil(len(sites) / float(max_vertices))) if max_vertices else 1
+    if tile_count <= 1:
+        return voronoi_graph(sites, edges, labels, profiler)
+
+    center, direction = principal_axis(sites)
+    position = (sites - center) @ direction
+    cuts = np.quantile(position, np.linspace(0.0, 1.0, tile_count + 1))
+    overlap = 0.1 * float(np.median(np.diff(cuts)))
+    cuts[0], cuts[-1] = -np.inf, np.inf
+
+    # Index spatial des arêtes construit une fois pour toutes les tuiles, et
+    # perturbation commune des sites partagés par deux tuiles
+    edges.tree
+    scale = jitter_scale(sites)
+
+    def run(i):
+        return _skeleton_tile(
+            sites, position, (center, direction), edges, cuts[i], cuts[i + 1], max(overlap, 1e-9), labels,
+            scale, profiler
+        )
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            tiles = list(executor.map(run, range(tile_count)))
+    else:
+        tiles = [run(i) for i in range(tile_count)]
+
+    profiler.count("sites", len(sites))
+    return stitch_tiles(tiles)
+
+
+def stitch_tiles(tiles, tolerance=None):
+    """
+    Recoud les squelettes partiels (sommets, segments) : les sommets calculés
+    dans deux tuiles voisines à partir des mêmes sites coïncident aux erreurs
+    d'arrondi près et sont fusionnés.
+    """
+    tiles = [(vertices, ridges) for vertices, ridges in tiles if len(ridges)]
+    if not tiles:
+        return SkeletonGraph(np.zeros((0, 2)), np.zeros((0, 2), dtype=np.intp))
+
+    offsets = np.cumsum([0] + [len(vertices) for vertices, _ in tiles])
+    coords = np.concatenate([vertices for vertices, _ in tiles])
+    ridges = np.concatenate([r + offset for (_, r), offset in zip(tiles, offsets[:-1])])
+
+    used = np.unique(ridges)
+    extent = np.ptp(coords[used], axis=0).max()
+    if tolerance is None:
+        tolerance = max(extent, 1.0) * 1e-9
+
+    pairs = cKDTree(coords[used]).query_pairs(tolerance, output_type='ndarray')
+    if len(pairs):
+        n = len(used)
+        links = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+        _, labels = connected_components(links, directed=False)
+        representative = np.zeros(n, dtype=np.intp)
+        representative[labels[::-1]] = np.arange(n)[::-1]
+        remap = np.arange(len(coords))
+        remap[used] = used[representative[labels]]
+        ridges = remap[ridges]
+
+    return SkeletonGraph(coords, ridges)
+
+
+def voronoi_lines(shape, params, profiler=NULL_PROFILER):
+    """
+    Centerline basée sur le diagramme de Voronoï.
+    Cette méthode est particulièrement adaptée aux formes complexes.
+    Si les branches doivent être élaguées ou conservées (voir graph_lines),
+    toutes les branches du squelette sont renvoyées au lieu du tronc de
+    chaque partie.
+    Au-delà de params["max_tile_vertices"] sites, le diagramme est calculé
+    par tuiles, sur params["tile_workers"] threads. Les sites sont les
+    sommets de toutes les parties et de tous les trous : un seul calcul
+    donne une ligne par partie d'un polygone multiple, et, avec
+    params["all_branches"], le réseau complet d'un chenal tressé autour de
+    ses îles.
+    """
+    points, labels = shape.sites(distinct=True)
+    if len(points) < 4:
+        return []
+
+    # Un seul diagramme pour toutes les parties et toutes les îles (sites
+    # étiquetés par anneau), par tuiles au-delà de max_tile_vertices, et
+    # graphe des segments entièrement intérieurs
+    graph = tiled_voronoi_graph(
+        points, shape.edges, params.get("max_tile_vertices", DEFAULT_MAX_TILE_VERTICES),
+        params.get("tile_workers", 1), labels, profiler
+    )
+
+    # Le tronc de chaque partie est le diamètre de sa composante (aucune union GEOS)
+    return graph_lines(graph, params)
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PolygonCenterline - lecture et écriture WKB
+                                 A QGIS plugin
+ Conversion directe entre WKB et tableaux de coordonnées NumPy
+ ***************************************************************************/
+"""
+import struct
+
+import numpy as np
+
+WKB_POINT = 1
+WKB_LINESTRING = 2
+WKB_POLYGON = 3
+WKB_MULTILINESTRING = 5
+WKB_MULTIPOLYGON = 6
+
+# Drapeaux EWKB (PostGIS) des dimensions Z et M
+EWKB_Z = 0x80000000
+EWKB_M = 0x40000000
+EWKB_SRID = 0x20000000
+
+# Décalage des codes ISO des géométries avec mesure M (LineStringM : 2002)
+ISO_M = 2000
+
+
+def _header(buffer, offset):
+    """
+    Lit l'en-tête d'une géométrie WKB (ISO ou EWKB). Renvoie (type de base,
+    nombre de dimensions, préfixe d'ordre des octets, position suivante,
+    présence d'une mesure M).
+    """
+    order = '<' if buffer[offset] == 1 else '>'
+    code, = struct.unpack_from(order + 'I', buffer, offset + 1)
+    offset += 5
+
+    dims = 2
+    if code & (EWKB_Z | EWKB_M | EWKB_SRID):
+        measured = bool(code & EWKB_M)
+        dims += bool(code & EWKB_Z) + measured
+        if code & EWKB_SRID:
+            offset += 4
+        code &= 0x0FFFFFFF
+    else:
+        measured = code // 1000 in (2, 3)
+        dims += {0: 0, 1: 1, 2: 1, 3: 2}.get(code // 1000, 0)
+        code %= 1000
+    return code, dims, order, offset, measured
+
+
+def _read_points(buffer, offset, order, dims, measured=False, measures=False):
+    """
+    Lit une suite de points : tableau (N, 2) et position suivante. Avec
+    measures, le tableau (N, 3) porte en dernière colonne la mesure M (NaN
+    si la géométrie n'en a pas).
+    """
+    count, = struct.unpack_from(order + 'I', buffer, offset)
+    offset += 4
+    values = np.frombuffer(buffer, dtype=order + 'f8', count=count * dims, offset=offset)
+    values = values.reshape(count, dims)
+    points = values[:, :2].astype(float)
+    if measures:
+        m = values[:, dims - 1] if measured else np.full(count, np.nan)
+        points = np.column_stack([points, m])
+    return points, offset + 8 * count * dims
+
+
+def _read_polygon(buffer, offset, order, dims):
+    count, = struct.unpack_from(order + 'I', buffer, offset)
+    offset += 4
+    rings = []
+    for _ in range(count):
+        ring, offset = _read_points(buffer, offset, order, dims)
+        if len(ring) > 1:
+            rings.append(ring)
+    return rings, offset
+
+
+def decode_polygons(wkb):
+    """
+    Décode un Polygon ou MultiPolygon WKB (2D, Z, M ou ZM) en une liste de
+    polygones, chacun étant une liste d'anneaux fermés (N, 2). Les
+    coordonnées sont lues en bloc par np.frombuffer, anneau par anneau :
+    aucun objet Python n'est créé par sommet.
+    """
+    buffer = memoryview(bytes(wkb))
+    code, dims, order, offset, _ = _header(buffer, 0)
+    if code == WKB_POLYGON:
+        return [_read_polygon(buffer, offset, order, dims)[0]]
+    if code == WKB_MULTIPOLYGON:
+        count, = struct.unpack_from(order + 'I', buffer, offset)
+        offset += 4
+        polygons = []
+        for _ in range(count):
+            _, part_dims, part_order, offset, _ = _header(buffer, offset)
+            rings, offset = _read_polygon(buffer, offset, part_order, part_dims)
+            polygons.append(rings)
+        return polygons
+    raise ValueError(f"Type WKB non géré pour un polygone : {code}")
+
+
+def decode_lines(wkb, measures=False):
+    """
+    Décode un LineString ou MultiLineString WKB en une liste de tableaux
+    (N, 2), ou (N, 3) avec la mesure M si measures.
+    """
+    buffer = memoryview(bytes(wkb))
+    code, dims, order, offset, measured = _header(buffer, 0)
+    if code == WKB_LINESTRING:
+        return [_read_points(buffer, offset, order, dims, measured, measures)[0]]
+    if code == WKB_MULTILINESTRING:
+        count, = struct.unpack_from(order + 'I', buffer, offset)
+        offset += 4
+        lines = []
+        for _ in range(count):
+            _, part_dims, part_order, offset, part_measured = _header(buffer, offset)
+            line, offset = _read_points(buffer, offset, part_order, part_dims, part_measured, measures)
+            lines.append(line)
+        return lines
+    raise ValueError(f"Type WKB non géré pour une ligne : {code}")
+
+
+def _points_bytes(points, dims=2):
+    points = np.ascontiguousarray(points, dtype='<f8').reshape(-1, dims)
+    return struct.pack('<I', len(points)) + points.tobytes()
+
+
+def _dims(points):
+    return 3 if np.ndim(points) == 2 and np.shape(points)[1] == 3 else 2
+
+
+def encode_linestring(points):
+    """
+    Encode un tableau (N, 2) en LineString WKB (petit-boutiste), ou un
+    tableau (N, 3) en LineStringM, la dernière colonne étant la mesure M.
+    """
+    dims = _dims(points)
+    code = WKB_LINESTRING + (ISO_M if dims == 3 else 0)
+    return struct.pack('<BI', 1, code) + _points_bytes(points, dims)
+
+
+def encode_multilinestring(lines):
+    """
+    Encode une liste de tableaux (N, 2) en MultiLineString WKB, ou de
+    tableaux (N, 3) en MultiLineStringM.
+    """
+    parts = [encode_linestring(line) for line in lines]
+    measured = bool(lines) and all(_dims(line) == 3 for line in lines)
+    code = WKB_MULTILINESTRING + (ISO_M if measured else 0)
+    return struct.pack('<BII', 1, code, len(parts)) + b''.join(parts)
+
+
+def encode_multipolygon(polygons):
+    """Encode une liste de polygones (listes d'anneaux (N, 2)) en MultiPolygon WKB."""
+    parts = []
+    for rings in polygons:
+        parts.append(struct.pack('<BII', 1, WKB_POLYGON, len(rings)))
+        parts.extend(_points_bytes(ring) for ring in rings)
+    return struct.pack('<BII', 1, WKB_MULTIPOLYGON, len(polygons)) + b''.join(parts)